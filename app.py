@@ -1,18 +1,32 @@
+# First, so the startup profile times the imports below
+import modules.startup_profile as startup_profile
+
+import copy
+
 import dash
+import flask
 
 from dash import html
+from dash.development.base_component import Component
 
 import dash_bootstrap_components as dbc
 
+import modules.datastore as datastore
+import modules.providers as providers
+
+from modules.callback_cache import cache_report
+from modules.datastore.memory import rss_report
+
 
 ####### Initialize the Dash app #######
 
 style_sheet = [dbc.themes.LUX]
-app = dash.Dash(
-    __name__,
-    external_stylesheets=style_sheet,
-    use_pages=True,
-)
+with startup_profile.span('dash.Dash (imports the pages)', 'layout'):
+    app = dash.Dash(
+        __name__,
+        external_stylesheets=style_sheet,
+        use_pages=True,
+    )
 app.title = 'DSP 2025 - Team 897'
 server = app.server
 
@@ -108,11 +122,108 @@ imprint_section = html.Footer(
 ########## Set up the layout ##########
 
 #Structure AI generated
-app.layout = dbc.Container(
-    [navbar, html.Br(), dash.page_container, html.Br(), imprint_section],
-    fluid=True,
-    className='bg-dark text-light', style={'backgroundColor': 'black'}
-)
+with startup_profile.span('app.layout', 'layout'):
+    app.layout = dbc.Container(
+        [navbar, html.Br(), dash.page_container, html.Br(), imprint_section],
+        fluid=True,
+        className='bg-dark text-light', style={'backgroundColor': 'black'}
+    )
+
+# The validation layout Dash sends with every page, see below
+_validation_layout = None
+
+
+def _id_components(layout):
+    # The components of 'layout' that have an id, also in nested lists of
+    # children, which Component._traverse skips
+    if isinstance(layout, (list, tuple)):
+        for child in layout:
+            yield from _id_components(child)
+    elif isinstance(layout, Component):
+        if getattr(layout, 'id', None) is not None:
+            yield layout
+        yield from _id_components(getattr(layout, 'children', None))
+
+
+def _skeleton(component):
+    # A copy of 'component' with only its id
+    component = copy.copy(component)
+    for prop in component._prop_names:
+        if prop != 'id' and hasattr(component, prop):
+            delattr(component, prop)
+    return component
+
+
+@server.before_request
+def slim_validation_layout():
+    """
+    Replaces the validation layout, the layouts of all pages Dash builds
+    on the first request (in its own hook, which runs before this one) to
+    check the callbacks against, by the components with an id, which is
+    all the browser checks. Dash sends it with every page, like this it
+    is about 3 KiB instead of 240 KiB
+    """
+    global _validation_layout
+    if app.validation_layout is not _validation_layout:
+        _validation_layout = html.Div(
+            [
+                _skeleton(component)
+                for component in _id_components(app.validation_layout)
+            ]
+        )
+        app.validation_layout = _validation_layout
+
+
+########## Status endpoints ###########
+
+@server.route('/_status/memory')
+def memory_status():
+    """
+    Reports the memory usage of the worker answering the request together
+    with the datasets it has loaded
+    """
+    return flask.jsonify(
+        worker=rss_report(),
+        datasets=datastore.load_report().to_dict('records'),
+    )
+
+
+@server.before_request
+def prewarm():
+    """
+    Starts computing the page data in the background once the worker
+    answers its first request
+    """
+    providers.start_prewarm()
+
+
+@server.route('/_status/ready')
+def ready_status():
+    """
+    Reports which providers of page data are computed, with status 503
+    until all of them are
+    """
+    report = providers.provider_report()
+    ready = bool(report['ready'].all())
+    return flask.jsonify(
+        ready=ready,
+        providers=report.to_dict('records'),
+    ), (200 if ready else 503)
+
+
+@server.route('/_status/callbacks')
+def callback_status():
+    """
+    Reports size, hits, misses and evictions of the callback caches of
+    the worker answering the request
+    """
+    return flask.jsonify(
+        data_version=datastore.data_version(),
+        callbacks=cache_report().to_dict('records'),
+    )
+
+
+startup_profile.write()
 
 
 ############# Run the app #############
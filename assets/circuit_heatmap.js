@@ -0,0 +1,95 @@
+/*
+ * Builds the circuit dropdown and the circuit heatmap of the grid
+ * position page in the browser, the same outputs as
+ * 'create_circuit_heatmap' of 'modules/driver_standings_vis_mod.py'
+ * gives on the server. The data is the store of
+ * 'circuit_heatmap_store_data': the grid by finish counts of every
+ * circuit, so changing the slider or the circuit needs no request to the
+ * server.
+ */
+(function () {
+    'use strict';
+
+    // Like Python's str.capitalize
+    function capitalize(text) {
+        return text.charAt(0).toUpperCase() + text.slice(1).toLowerCase();
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        circuitHeatmap: {
+            update: function (sliderValue, selectedCircuit, store) {
+                // Circuits with enough rows, in alphabetical order
+                var number = sliderValue * 20;
+                var options = store.circuits.filter(function (_, position) {
+                    return store.rows[position] >= number;
+                }).sort().map(function (circuit) {
+                    return {label: capitalize(circuit), value: circuit};
+                });
+                var selected = options.some(function (option) {
+                    return option.value === selectedCircuit;
+                }) ? selectedCircuit : store.default;
+
+                // Only starting and finishing positions that occured
+                var size = store.size;
+                var position = store.circuits.indexOf(selected);
+                var matrix = position < 0 ? [] : store.matrices[position];
+                var count = function (grid, finish) {
+                    return matrix.length ? matrix[grid * size + finish] : 0;
+                };
+                var positions = [];
+                for (var i = 0; i < size; i++) {
+                    positions.push(i);
+                }
+                var grid = positions.filter(function (row) {
+                    return positions.some(function (column) {
+                        return count(row, column) > 0;
+                    });
+                });
+                var finish = positions.filter(function (column) {
+                    return positions.some(function (row) {
+                        return count(row, column) > 0;
+                    });
+                });
+
+                // Finish positions as rows, empty cells are left out
+                var z = finish.map(function (column) {
+                    return grid.map(function (row) {
+                        return count(row, column);
+                    });
+                });
+                var empty = z.some(function (values) {
+                    return values.indexOf(0) >= 0;
+                });
+                if (empty) {
+                    z = z.map(function (values) {
+                        return values.map(function (value) {
+                            return value === 0 ? null : value;
+                        });
+                    });
+                }
+                var x = grid.map(function (row) {
+                    return row + 1;
+                });
+                var y = finish.map(function (column) {
+                    return column + 1;
+                });
+
+                var figure = JSON.parse(JSON.stringify(store.figure));
+                var trace = figure.data[0];
+                trace.z = z;
+                trace.x = x;
+                trace.y = y;
+                trace.text = z;
+                trace.hovertext = z;
+                var title = capitalize(selected);
+                figure.layout.title = {
+                    text: store.title.replace('{circuit}', title)
+                };
+                figure.layout.xaxis.tickvals = x;
+                figure.layout.yaxis.tickvals = y;
+
+                return [options, selected, figure];
+            }
+        }
+    });
+}());
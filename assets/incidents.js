@@ -0,0 +1,118 @@
+/*
+ * Builds the incidents by circuit figure of the retirements page in the
+ * browser, the same figure as 'create_incidents_figure' of
+ * 'modules/crash_vis_mod.py' builds on the server. The data is the store
+ * of 'incidents_store_data': cumulative sums per circuit and year, so
+ * moving a slider needs no request to the server.
+ */
+(function () {
+    'use strict';
+
+    // Like Python's '{:.2f}', which rounds exact halves (e.g. 0.125) to even
+    function formatFixed2(value) {
+        var hundredths = value * 100;
+        if (Number.isInteger(value * 8) && !Number.isInteger(value * 4)) {
+            var lower = Math.floor(hundredths);
+            return ((lower % 2 ? lower + 1 : lower) / 100).toFixed(2);
+        }
+        return value.toFixed(2);
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        incidents: {
+            figure: function (selectedYears, minRaceCount, typeValue, store) {
+                var years = store.years;
+                var counts = store.counts;
+                var stride = years.length + 1;
+
+                // Positions of the year range in the cumulative sums
+                var first = selectedYears[0];
+                var last = selectedYears[1];
+                var start = 0;
+                while (start < years.length && years[start] < first) {
+                    start++;
+                }
+                var stop = 0;
+                while (stop < years.length && years[stop] <= last) {
+                    stop++;
+                }
+                stop = Math.max(stop, start);
+
+                function sum(column, circuit) {
+                    return counts[column][circuit * stride + stop] -
+                        counts[column][circuit * stride + start];
+                }
+
+                // Incidents per race and rates as in 'filter_incidents'
+                var rows = [];
+                store.circuits.forEach(function (circuit, position) {
+                    var races = sum('race_count', position);
+                    if (races <= 0 || races < minRaceCount) {
+                        return;
+                    }
+                    var total = sum('Total', position);
+                    var incidents = {
+                        crashes: sum('Race Incident/Crash', position),
+                        failures: sum('Technical Failure', position),
+                        retirements: sum('Total_Retirements', position)
+                    };
+                    var row = {circuit_id: circuit, race_count: races};
+                    Object.keys(incidents).forEach(function (name) {
+                        row[name + '_per_race'] = incidents[name] / races;
+                        row[name + '_per_race_driver'] =
+                            (incidents[name] / total) * 100;
+                    });
+                    rows.push(row);
+                });
+
+                if (!rows.length) {
+                    return store.empty;
+                }
+
+                var type = typeValue === 1 ? 'per_race_driver' : 'per_race';
+                var layout = JSON.parse(JSON.stringify(store.layout));
+                layout.annotations.forEach(function (annotation, position) {
+                    annotation.text = store.subplot_titles[type][position];
+                });
+                layout.title = {
+                    text: store.title
+                        .replace('{start_year}', first)
+                        .replace('{end_year}', last)
+                        .replace('{min_race_count}', minRaceCount)
+                };
+
+                var data = store.bars[type].map(function (bar, position) {
+                    // Stable, equal values keep the circuit order
+                    var sorted = rows.slice().sort(function (a, b) {
+                        return a[bar.column] - b[bar.column];
+                    });
+                    var values = sorted.map(function (row) {
+                        return row[bar.column];
+                    });
+                    var axis = position ? String(position + 1) : '';
+                    return {
+                        type: 'bar',
+                        x: values,
+                        y: sorted.map(function (row) {
+                            return row.circuit_id;
+                        }),
+                        orientation: 'h',
+                        marker: {color: values, colorscale: bar.colorscale},
+                        name: bar.name,
+                        hovertext: sorted.map(function (row) {
+                            return 'Races: ' + row.race_count + '<br>' +
+                                bar.label.replace(
+                                    '{:.2f}', formatFixed2(row[bar.column])
+                                );
+                        }),
+                        hoverinfo: 'text',
+                        xaxis: 'x' + axis,
+                        yaxis: 'y' + axis
+                    };
+                });
+
+                return {data: data, layout: layout};
+            }
+        }
+    });
+}());
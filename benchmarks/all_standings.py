@@ -0,0 +1,71 @@
+"""
+Latency benchmark of the grid and finish standings counts.
+
+Compares the former loop of 'value_counts' and 'pd.concat' per grid
+position with 'count_standings'. Run from the repository root:
+
+    python -m benchmarks.all_standings [repeats]
+"""
+
+import statistics
+import sys
+import time
+
+import pandas as pd
+
+import modules.datastore as datastore
+import modules.driver_standings_mod as ds
+
+
+def _median_ms(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def _loop_standings(df, max):
+    df_all_standings_count = pd.DataFrame()
+    for grid_pos in range(1, max):
+        df_filtered = df[df['grid_position'] == grid_pos]
+        df_temp = df_filtered['finish_position'].value_counts().reset_index()
+        df_temp['grid_position'] = grid_pos
+        df_temp = df_temp[['grid_position', 'finish_position', 'count']]
+        df_all_standings_count = pd.concat(
+            [df_all_standings_count, df_temp], ignore_index=True
+        )
+    return df_all_standings_count
+
+
+def _by_positions(df):
+    return df.sort_values(['grid_position', 'finish_position']).reset_index(
+        drop=True
+    )
+
+
+def main(repeats=20):
+    df = datastore.get('season_results')
+    frames = {
+        'season_results': df,
+        'season_results_weather': datastore.get('season_results_weather'),
+        "circuit_id == 'monza'": df[df['circuit_id'] == 'monza'],
+    }
+    print(f'{"frame (ms)":<32}{"loop":>10}{"matrix":>10}{"speedup":>10}')
+    for label, frame in frames.items():
+        # Equal counts of a grid position may be ordered differently
+        pd.testing.assert_frame_equal(
+            _by_positions(_loop_standings(frame, 23)),
+            _by_positions(ds.get_all_standings(frame, 23)),
+        )
+        loop = _median_ms(lambda: _loop_standings(frame, 23), repeats)
+        matrix = _median_ms(lambda: ds.count_standings(frame, 23), repeats)
+        print(
+            f'{label:<32}{loop:>10.3f}{matrix:>10.3f}'
+            f'{loop / matrix:>9.1f}x'
+        )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
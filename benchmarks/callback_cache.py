@@ -0,0 +1,150 @@
+"""
+Hit latency benchmark of the callback cache backends.
+
+Stores the result of the circuit heatmap callback in every backend and
+measures the latency of a hit: the per process cache, the SQLite file
+and a Redis compatible server (with the redis package installed).
+Without a Redis server a local stand-in speaking the same protocol is
+started. Run from the repository root:
+
+    python -m benchmarks.callback_cache [repeats] [redis url]
+"""
+
+import json
+import os
+import socketserver
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from plotly.io.json import to_json_plotly
+
+import modules.datastore as datastore
+import modules.driver_standings_vis_mod as dsv
+import modules.shared_cache as shared_cache
+
+from modules.callback_cache import cached_callback
+
+
+class _StandinHandler(socketserver.StreamRequestHandler):
+    """
+    Answers the Redis commands used by the shared cache from a dict
+    """
+
+    def _reply(self, value):
+        if value is None:
+            self.wfile.write(b'$-1\r\n')
+        elif isinstance(value, int):
+            self.wfile.write(b':%d\r\n' % value)
+        elif isinstance(value, list):
+            self.wfile.write(b'*%d\r\n' % len(value))
+            for item in value:
+                self._reply(item)
+        elif value == 'OK' or value == 'PONG':
+            self.wfile.write(b'+%s\r\n' % value.encode())
+        else:
+            self.wfile.write(b'$%d\r\n%s\r\n' % (len(value), value))
+
+    def handle(self):
+        store = self.server.store
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            parts = []
+            for _ in range(int(line[1:])):
+                size = int(self.rfile.readline()[1:])
+                parts.append(self.rfile.read(size + 2)[:-2])
+            command = parts[0].upper()
+            if command == b'GET':
+                self._reply(store.get(parts[1]))
+            elif command == b'SET':
+                store[parts[1]] = parts[2]
+                self._reply('OK')
+            elif command == b'DEL':
+                removed = [store.pop(key, None) for key in parts[1:]]
+                self._reply(sum(value is not None for value in removed))
+            elif command == b'SCAN':
+                self._reply([b'0', list(store)])
+            else:
+                self._reply('OK' if command != b'PING' else 'PONG')
+            self.wfile.flush()
+
+
+def start_standin():
+    """
+    Starts the Redis stand-in on a free local port
+
+    Returns its url
+    """
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _StandinHandler)
+    server.daemon_threads = True
+    server.store = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'redis://127.0.0.1:{server.server_address[1]}/0'
+
+
+def _median_ms(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main(repeats=200, redis_url=None):
+    df = datastore.get('season_results')
+    result = dsv.create_circuit_heatmap(5, 'monaco', df)
+    payload = to_json_plotly(result)
+    version = datastore.data_version()
+    key = shared_cache.entry_key(version, 'benchmark', 'monaco')
+    print(f'payload: {len(payload) / 2**10:.1f} KiB')
+    print()
+
+    with tempfile.TemporaryDirectory() as directory:
+        backends = {
+            'sqlite': shared_cache.SqliteBackend(
+                os.path.join(directory, 'callback_cache.sqlite')
+            ),
+        }
+        if shared_cache.redis is not None:
+            backends['redis' if redis_url else 'redis (stand-in)'] = (
+                shared_cache.RedisBackend(redis_url or start_standin())
+            )
+
+        @cached_callback()
+        def heatmap(slider_value, selected_circuit):
+            return dsv.create_circuit_heatmap(
+                slider_value, selected_circuit, df
+            )
+
+        heatmap(5, 'monaco')
+        operations = {
+            'callback without cache': lambda: dsv.create_circuit_heatmap(
+                5, 'monaco', df
+            ),
+            'per process hit (with json.loads)': lambda: heatmap(5, 'monaco'),
+        }
+        for label, backend in backends.items():
+            backend.set(key, payload)
+            assert backend.get(key) == payload
+            operations[f'{label} get'] = lambda backend=backend: (
+                backend.get(key)
+            )
+            operations[f'{label} hit (with json.loads)'] = (
+                lambda backend=backend: json.loads(backend.get(key))
+            )
+
+        print(f'{"operation (ms)":<44}{"median":>10}')
+        for label, operation in operations.items():
+            print(f'{label:<44}{_median_ms(operation, repeats):>10.3f}')
+
+
+if __name__ == '__main__':
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+        sys.argv[2] if len(sys.argv) > 2 else None,
+    )
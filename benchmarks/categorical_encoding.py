@@ -0,0 +1,73 @@
+"""
+Memory and filter benchmark of the categorical string columns.
+
+Compares every dataset with categorical columns against the same data
+with plain string (object) columns. Run from the repository root:
+
+    python -m benchmarks.categorical_encoding [repeats]
+"""
+
+import statistics
+import sys
+import time
+
+import modules.datastore as datastore
+from modules.datastore import schema
+
+
+def _median_ms(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main(repeats=50):
+    print(f'{"dataset":<24}{"object MB":>11}{"category MB":>13}{"saved":>8}')
+    frames = {}
+    for name in datastore.DATASETS:
+        columns = schema.category_columns(name)
+        if not columns:
+            continue
+        encoded = datastore.get(name)
+        plain = encoded.astype({column: object for column in columns})
+        frames[name] = (plain, encoded)
+
+        before = plain.memory_usage(deep=True).sum() / 2**20
+        after = encoded.memory_usage(deep=True).sum() / 2**20
+        print(
+            f'{name:<24}{before:>11.2f}{after:>13.2f}'
+            f'{1 - after / before:>8.0%}'
+        )
+
+    print()
+    print(f'{"operation (ms)":<48}{"object":>10}{"category":>10}')
+    plain, encoded = frames['season_results']
+    operations = {
+        "df['driver_name'] == 'Lewis Hamilton'": lambda df: (
+            df[df['driver_name'] == 'Lewis Hamilton']
+        ),
+        "df['circuit_id'] == 'monaco'": lambda df: (
+            df[df['circuit_id'] == 'monaco']
+        ),
+        "groupby('driver_name')['finish_position'].mean()": lambda df: (
+            df.groupby('driver_name', observed=True)[
+                'finish_position'
+            ].mean()
+        ),
+        "groupby('circuit_id').size()": lambda df: (
+            df.groupby('circuit_id', observed=True).size()
+        ),
+    }
+    for label, operation in operations.items():
+        print(
+            f'{label:<48}'
+            f'{_median_ms(lambda: operation(plain), repeats):>10.3f}'
+            f'{_median_ms(lambda: operation(encoded), repeats):>10.3f}'
+        )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,73 @@
+"""
+Latency benchmark of the circuit heatmap callback.
+
+Compares building the heatmap from the circuit rows with slicing the
+precomputed circuit standings tensor. Run from the repository root:
+
+    python -m benchmarks.circuit_heatmap [repeats]
+"""
+
+import statistics
+import sys
+import time
+
+import modules.datastore as datastore
+import modules.driver_standings_mod as ds
+import modules.driver_standings_vis_mod as dsv
+
+
+def _median_ms(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main(repeats=50):
+    df = datastore.get('season_results')
+    index = datastore.row_index('season_results', 'circuit_id')
+
+    start = time.perf_counter()
+    tensor = ds.circuit_standings_tensor(df)
+    build = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    tensor_by_year = ds.circuit_standings_tensor(df, by_year=True)
+    build_by_year = (time.perf_counter() - start) * 1000
+    print(
+        f'tensor build: {build:.2f} ms '
+        f'({tensor["counts"].nbytes / 2**10:.0f} KiB), '
+        f'by year: {build_by_year:.2f} ms '
+        f'({tensor_by_year["counts"].nbytes / 2**20:.1f} MiB)'
+    )
+    print()
+
+    def counts_from_rows(circuit):
+        rows = ds.circuit_rows(circuit, df, index)
+        return ds.circuit_standings(ds.circuit_standings_tensor(rows), circuit)
+
+    print(f'{"operation (ms)":<40}{"rows":>10}{"tensor":>10}{"speedup":>10}')
+    for circuit in ['monza', 'monaco', 'nurburgring']:
+        operations = {
+            f"counts('{circuit}')": (
+                lambda: counts_from_rows(circuit),
+                lambda: ds.circuit_standings(tensor, circuit),
+            ),
+            f"create_circuit_heatmap('{circuit}')": (
+                lambda: dsv.create_circuit_heatmap(1, circuit, df, index),
+                lambda: dsv.create_circuit_heatmap(
+                    1, circuit, df, index, tensor
+                ),
+            ),
+        }
+        for label, (from_rows, from_tensor) in operations.items():
+            rows = _median_ms(from_rows, repeats)
+            sliced = _median_ms(from_tensor, repeats)
+            print(
+                f'{label:<40}{rows:>10.3f}{sliced:>10.3f}'
+                f'{rows / sliced:>9.1f}x'
+            )
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,131 @@
+"""
+Equivalence check and benchmark of the clientside circuit heatmap.
+
+Builds the circuit dropdown and heatmap of the grid position page for
+every slider value and circuit with 'assets/circuit_heatmap.js' (run by
+Node.js) and with 'create_circuit_heatmap', compares the outputs and
+times both. Run from the repository root:
+
+    python -m benchmarks.circuit_heatmap_clientside
+"""
+
+import base64
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+
+from plotly.io.json import to_json_plotly
+
+import modules.datastore as datastore
+import modules.driver_standings_mod as ds
+import modules.driver_standings_vis_mod as dsv
+
+
+SCRIPT = os.path.join(
+    os.path.dirname(__file__), os.pardir, 'assets', 'circuit_heatmap.js'
+)
+
+# Runs the clientside callback for every case, prints figures and timings
+_RUNNER = """
+const fs = require('fs');
+globalThis.window = globalThis;
+eval(fs.readFileSync(process.argv[2], 'utf8'));
+const {store, cases} = JSON.parse(fs.readFileSync(process.argv[3], 'utf8'));
+const update = window.dash_clientside.circuitHeatmap.update;
+const outputs = [];
+const timings = [];
+for (const [sliderValue, circuit] of cases) {
+    const start = performance.now();
+    outputs.push(update(sliderValue, circuit, store));
+    timings.push(performance.now() - start);
+}
+process.stdout.write(JSON.stringify({outputs, timings}));
+"""
+
+
+def _decode(value):
+    # Plotly sends numeric arrays base64 encoded, NaN is sent as null
+    if isinstance(value, dict):
+        if set(value) in ({'dtype', 'bdata'}, {'dtype', 'bdata', 'shape'}):
+            array = np.frombuffer(
+                base64.b64decode(value['bdata']), dtype=value['dtype']
+            )
+            if 'shape' in value:
+                array = array.reshape(
+                    [int(size) for size in value['shape'].split(',')]
+                )
+            return _decode(array.tolist())
+        return {key: _decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def main():
+    if shutil.which('node') is None:
+        print('Node.js is needed to run the clientside callback')
+        return
+
+    df = datastore.get('season_results')
+    index = datastore.row_index('season_results', 'circuit_id')
+    tensor = ds.circuit_standings_tensor(df)
+    store = dsv.circuit_heatmap_store_data(tensor, df, index)
+    # Dropdown values are the initial value, cleared (None) or a circuit
+    cases = [
+        [slider_value, circuit]
+        for slider_value in range(1, 31)
+        for circuit in [None, 'Silverstone'] + sorted(store['circuits'])
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        data_path = os.path.join(directory, 'cases.json')
+        with open(data_path, 'w', encoding='utf-8') as file:
+            json.dump({'store': store, 'cases': cases}, file)
+        runner_path = os.path.join(directory, 'runner.js')
+        with open(runner_path, 'w', encoding='utf-8') as file:
+            file.write(_RUNNER)
+        result = json.loads(subprocess.run(
+            ['node', runner_path, SCRIPT, data_path],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout)
+
+    timings = []
+    differences = 0
+    for (slider_value, circuit), clientside in zip(cases, result['outputs']):
+        start = time.perf_counter()
+        outputs = dsv.create_circuit_heatmap(
+            slider_value, circuit, df, index, tensor
+        )
+        payload = to_json_plotly(outputs)
+        timings.append(time.perf_counter() - start)
+        if _decode(json.loads(payload)) != _decode(clientside):
+            differences += 1
+            print(f'differs: {slider_value} {circuit}')
+
+    store_size = len(json.dumps(store, separators=(',', ':')))
+    print(f'store: {store_size / 2**10:.1f} KiB, sent once per page')
+    print(f'{len(cases)} outputs, {differences} differ')
+    print()
+    print(f'{"outputs (ms)":<40}{"median":>10}')
+    print(
+        f'{"server (create + serialize)":<40}'
+        f'{statistics.median(timings) * 1000:>10.3f}'
+    )
+    print(
+        f'{"clientside (circuit_heatmap.js)":<40}'
+        f'{statistics.median(result["timings"]):>10.3f}'
+    )
+
+
+if __name__ == '__main__':
+    main()
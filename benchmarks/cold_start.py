@@ -0,0 +1,101 @@
+"""
+Cold start benchmark of the app.
+
+Boots the app in a fresh Python process 'runs' times and reports the
+median time from starting the process until the app is imported, until
+it answered its first request (the home page) and until all page data
+is computed (see 'modules.providers'). With --profile every boot also
+records a startup profile (see 'modules.startup_profile') and the
+median seconds per kind of span are reported. Run from the repository
+root:
+
+    python -m benchmarks.cold_start [runs] [--profile]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+# Boot of the app in the child process, prints the wall clock times of
+# every stage
+_BOOT = """
+import json, time
+import app
+imported = time.time()
+app.server.test_client().get('/')
+answered = time.time()
+import modules.providers as providers
+providers.warm_all()
+print(json.dumps([imported, answered, time.time()]))
+"""
+
+STAGES = ('import app', 'first response', 'all page data')
+
+
+def boot(env):
+    """
+    Boots the app once with the environment 'env'
+
+    Returns the seconds from starting the process until every stage
+    """
+    start = time.time()
+    output = subprocess.run(
+        [sys.executable, '-c', _BOOT],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return [stage - start for stage in json.loads(output.splitlines()[-1])]
+
+
+def _load_profiles(path):
+    # Profiles of every booted process, written once the page data is done
+    profiles = []
+    for name in sorted(os.listdir(path)):
+        if name.endswith('.json'):
+            with open(os.path.join(path, name), encoding='utf-8') as file:
+                profiles.append(json.load(file))
+    return profiles
+
+
+def main(runs=5, profile=False):
+    env = dict(os.environ, F1_PREWARM='0')
+    with tempfile.TemporaryDirectory() as path:
+        if profile:
+            env.update(F1_STARTUP_PROFILE='1', F1_STARTUP_PROFILE_PATH=path)
+        timings = [boot(env) for _ in range(runs)]
+        profiles = _load_profiles(path)
+
+    print(f'{runs} cold starts{" with startup profile" if profile else ""}')
+    print(f'{"stage (s)":<24}{"median":>10}{"min":>10}{"max":>10}')
+    for stage, seconds in zip(STAGES, zip(*timings)):
+        print(
+            f'{stage:<24}{statistics.median(seconds):>10.3f}'
+            f'{min(seconds):>10.3f}{max(seconds):>10.3f}'
+        )
+    if not profiles:
+        return
+
+    print()
+    print(f'{"span kind (s)":<24}{"spans":>10}{"median":>10}')
+    kinds = sorted({kind for run in profiles for kind in run['totals']})
+    for kind in kinds:
+        empty = {'spans': 0, 'seconds': 0.0}
+        totals = [run['totals'].get(kind, empty) for run in profiles]
+        spans = statistics.median(total['spans'] for total in totals)
+        seconds = statistics.median(total['seconds'] for total in totals)
+        print(f'{kind:<24}{spans:>10.0f}{seconds:>10.3f}')
+
+
+if __name__ == '__main__':
+    arguments = [argument for argument in sys.argv[1:] if argument[:2] != '--']
+    main(
+        int(arguments[0]) if arguments else 5,
+        profile='--profile' in sys.argv[1:],
+    )
@@ -0,0 +1,77 @@
+"""
+Latency benchmark of the average placements per weather condition.
+
+Compares the former loop over drivers of 'driver_grid_pos' and
+'driver_finish_pos' with the single groupby of 'condition_placements'.
+Run from the repository root:
+
+    python -m benchmarks.condition_placements [repeats]
+"""
+
+import statistics
+import sys
+import time
+
+import pandas as pd
+
+import modules.datastore as datastore
+import modules.driver_standings_mod as ds
+
+
+def _median_ms(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def _loop_averages(df, conditions, drivers):
+    df_filtered = df[df['condition'].isin(conditions)]
+    rows = []
+    for name in drivers:
+        grid = ds.driver_grid_pos(name, df_filtered)
+        finish = ds.driver_finish_pos(name, df_filtered)
+        if grid['count_grid'].sum() != 0:
+            rows.append(
+                [
+                    name,
+                    grid.prod(axis=1).sum() / grid['count_grid'].sum(),
+                    finish.prod(axis=1).sum() / finish['count_finish'].sum(),
+                ]
+            )
+    return pd.DataFrame(rows, columns=['driver_name', 'start', 'finish'])
+
+
+def main(repeats=20):
+    df = datastore.get('season_results_weather')
+    drivers = ds.driver_list(20, df[df['condition'].isin(['Mixed', 'Wet'])])
+
+    def loop():
+        _loop_averages(df, ['Mixed', 'Wet'], drivers)
+        _loop_averages(df, ['Dry'], drivers)
+
+    def groupby():
+        placements = ds.condition_placements(df)
+        liste = ds.condition_driver_list(20, placements, 'Wet/Mixed')
+        ds.condition_averages(placements, 'Wet/Mixed', liste)
+        ds.condition_averages(placements, 'Dry', liste)
+
+    placements = ds.condition_placements(df)
+    print(f'{"operation (ms)":<40}{"median":>10}')
+    operations = {
+        'loop over drivers (mw + dry)': loop,
+        'condition_placements + lookups': groupby,
+        'lookups only (min 5 races)': lambda: ds.condition_averages(
+            placements,
+            'Dry',
+            ds.condition_driver_list(5, placements, 'Wet/Mixed'),
+        ),
+    }
+    for label, operation in operations.items():
+        print(f'{label:<40}{_median_ms(operation, repeats):>10.3f}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
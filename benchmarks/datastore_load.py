@@ -0,0 +1,57 @@
+"""
+Startup benchmark comparing CSV parsing with the binary cache.
+
+Run from the repository root:
+
+    python -m benchmarks.datastore_load [repeats]
+"""
+
+import statistics
+import sys
+import time
+
+import modules.datastore as datastore
+from modules.datastore import cache, loader
+
+
+def _median_seconds(func, repeats):
+    """
+    Returns the median runtime of 'func' over 'repeats' calls
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(repeats=10):
+    if not cache.available():
+        print('Binary cache not available (pyarrow missing or disabled)')
+        return
+
+    print(f'{"dataset":<24}{"csv ms":>10}{"cache ms":>10}{"speedup":>10}')
+    total_csv = total_cache = 0
+    for name in datastore.DATASETS:
+        # Make sure a fresh cache exists before timing it
+        if not cache.is_fresh(name):
+            cache.write(name, loader.read_csv(name))
+
+        csv_seconds = _median_seconds(lambda: loader.read_csv(name), repeats)
+        cache_seconds = _median_seconds(lambda: cache.read(name), repeats)
+        total_csv += csv_seconds
+        total_cache += cache_seconds
+        print(
+            f'{name:<24}{csv_seconds * 1000:>10.1f}'
+            f'{cache_seconds * 1000:>10.1f}'
+            f'{csv_seconds / cache_seconds:>9.1f}x'
+        )
+    print(
+        f'{"total":<24}{total_csv * 1000:>10.1f}{total_cache * 1000:>10.1f}'
+        f'{total_csv / total_cache:>9.1f}x'
+    )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
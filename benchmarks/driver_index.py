@@ -0,0 +1,65 @@
+"""
+Latency benchmark of the per driver and per circuit row indexes.
+
+Compares the driver_standings_mod helpers with and without the row index
+of the season results. Run from the repository root:
+
+    python -m benchmarks.driver_index [repeats]
+"""
+
+import statistics
+import sys
+import time
+
+import modules.datastore as datastore
+import modules.driver_standings_mod as ds
+
+
+def _median_ms(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main(repeats=200):
+    df = datastore.get('season_results')
+
+    start = time.perf_counter()
+    driver_index = datastore.row_index('season_results', 'driver_name')
+    circuit_index = datastore.row_index('season_results', 'circuit_id')
+    build = (time.perf_counter() - start) * 1000
+    print(f'index build: {build:.2f} ms')
+    print()
+
+    operations = {
+        "driver_rows('Lewis Hamilton')": lambda index: (
+            ds.driver_rows('Lewis Hamilton', df, index and driver_index)
+        ),
+        "circuit_rows('monaco')": lambda index: (
+            ds.circuit_rows('monaco', df, index and circuit_index)
+        ),
+        "driver_finish_pos('Lewis Hamilton')": lambda index: (
+            ds.driver_finish_pos('Lewis Hamilton', df, index and driver_index)
+        ),
+        'driver_list(50)': lambda index: (
+            ds.driver_list(50, df, index and driver_index)
+        ),
+        'circuit_list(10)': lambda index: (
+            ds.circuit_list(10, df, index and circuit_index)
+        ),
+    }
+    print(f'{"operation (ms)":<40}{"scan":>10}{"index":>10}{"speedup":>10}')
+    for label, operation in operations.items():
+        scan = _median_ms(lambda: operation(None), repeats)
+        indexed = _median_ms(lambda: operation(True), repeats)
+        print(
+            f'{label:<40}{scan:>10.3f}{indexed:>10.3f}'
+            f'{scan / indexed:>9.1f}x'
+        )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,80 @@
+"""
+Latency benchmark of the slider driven dropdown options.
+
+Compares building the driver and circuit dropdown options by counting
+the rows of the season results, by a binary search in the values of the
+row index ordered by their amount of rows, and by looking them up in the
+options built once for every slider step. Run from the repository root:
+
+    python -m benchmarks.dropdown_options [repeats]
+"""
+
+import statistics
+import sys
+import time
+
+import modules.datastore as datastore
+import modules.driver_standings_vis_mod as dsv
+
+
+def _median_ms(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main(repeats=200):
+    df = datastore.get('season_results')
+    driver_index = datastore.row_index('season_results', 'driver_name')
+    circuit_index = datastore.row_index('season_results', 'circuit_id')
+
+    start = time.perf_counter()
+    driver_options = {
+        driver_count: dsv.get_driver_options(driver_count, df, driver_index)
+        for driver_count in dsv.RACES_SLIDER_STEPS
+    }
+    circuit_options = {
+        slider_value: dsv.get_circuit_options(
+            slider_value * 20, df, circuit_index
+        )
+        for slider_value in dsv.CIRCUIT_SLIDER_STEPS
+    }
+    build = (time.perf_counter() - start) * 1000
+    print(f'options of all slider steps: {build:.2f} ms')
+
+    differences = sum(
+        options != dsv.get_driver_options(driver_count, df)
+        for driver_count, options in driver_options.items()
+    ) + sum(
+        options != dsv.get_circuit_options(slider_value * 20, df)
+        for slider_value, options in circuit_options.items()
+    )
+    print(f'{differences} option lists differ from counting the rows')
+    print()
+
+    operations = {
+        'driver options (130 races)': (
+            lambda: dsv.get_driver_options(130, df),
+            lambda: dsv.get_driver_options(130, df, driver_index),
+            lambda: driver_options[130],
+        ),
+        'circuit options (slider 5)': (
+            lambda: dsv.get_circuit_options(100, df),
+            lambda: dsv.get_circuit_options(100, df, circuit_index),
+            lambda: circuit_options[5],
+        ),
+    }
+    print(f'{"operation (ms)":<32}{"count":>10}{"search":>10}{"lookup":>10}')
+    for label, (count, search, lookup) in operations.items():
+        print(
+            f'{label:<32}{_median_ms(count, repeats):>10.3f}'
+            f'{_median_ms(search, repeats):>10.3f}'
+            f'{_median_ms(lookup, repeats):>10.4f}'
+        )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,134 @@
+"""
+Latency benchmark of the pit stop speed categories.
+
+Compares categorizing the pit stop times of one race or driver with
+'pd.cut' and summing up every category with separate masks, as the plots
+of the pit stop page did per request, with the categories and summaries
+of all races and drivers that 'categorize_durations' builds in one pass.
+Checks both give the same categories and summaries for every race and
+driver. Run from the repository root:
+
+    python -m benchmarks.duration_categories [repeats]
+"""
+
+import statistics
+import sys
+import time
+
+import pandas as pd
+
+import modules.datastore as datastore
+import modules.pitstop_mod as ptm
+
+
+def _median_ms(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def _per_call(durations):
+    # Categories and summary as computed per request before
+    categories = pd.cut(
+        durations,
+        bins=[durations.min()]
+        + durations.quantile(ptm.DURATION_QUANTILES).tolist(),
+        labels=ptm.DURATION_CATEGORIES,
+        include_lowest=True,
+    )
+    counts = categories.value_counts().to_dict()
+    return categories, {
+        category: (
+            counts.get(category, 0),
+            durations[categories == category].min(),
+            durations[categories == category].max(),
+        )
+        for category in ptm.DURATION_CATEGORIES
+    }
+
+
+def _differences(durations, groups, categories, summaries):
+    # Groups where the batch result differs from the per call result
+    differences = 0
+    for key, rows in durations.groupby(groups, observed=True):
+        try:
+            expected, summary = _per_call(rows)
+        except ValueError:
+            expected, summary = None, None
+        if expected is None:
+            differences += categories[rows.index].notna().any()
+            differences += key in summaries
+            continue
+        differences += not categories[rows.index].equals(expected)
+        differences += summaries.get(key) != summary
+    return differences
+
+
+def main(repeats=200):
+    df = datastore.get('pitstops')
+    durations = df.dropna(subset=['duration'])
+
+    start = time.perf_counter()
+    summary = ptm.pitstop_summary(df)
+    build_races = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    driver_categories, driver_summaries = ptm.categorize_durations(
+        durations['duration'], durations['driver_name']
+    )
+    build_drivers = (time.perf_counter() - start) * 1000
+    print(
+        f'race summary with categories: {build_races:.2f} ms, '
+        f'driver categories: {build_drivers:.2f} ms'
+    )
+
+    table = summary['table']
+    completed = table[table['race_completed']]
+    race_keys = list(zip(completed['race_name'], completed['year']))
+    differences = _differences(
+        completed['duration'],
+        pd.MultiIndex.from_tuples(race_keys),
+        completed['duration_category'],
+        summary['categories'],
+    ) + _differences(
+        durations['duration'],
+        durations['driver_name'],
+        driver_categories,
+        driver_summaries,
+    )
+    print(
+        f'{len(summary["categories"])} races and {len(driver_summaries)} '
+        f'drivers, {differences} differences to the per call categories'
+    )
+    print()
+
+    race = ptm.race_pitstops(summary, 'German Grand Prix', 2018)
+    race = race[race['race_completed']]['duration']
+    driver = durations[durations['driver_name'] == 'Lewis Hamilton']
+    operations = {
+        "race('German Grand Prix', 2018)": (
+            lambda: _per_call(race),
+            lambda: summary['categories'][('German Grand Prix', 2018)],
+        ),
+        "driver('Lewis Hamilton')": (
+            lambda: _per_call(driver['duration']),
+            lambda: driver_summaries['Lewis Hamilton'],
+        ),
+    }
+    print(
+        f'{"operation (ms)":<40}{"per call":>10}{"lookup":>10}'
+        f'{"speedup":>10}'
+    )
+    for label, (per_call, lookup) in operations.items():
+        per_call = _median_ms(per_call, repeats)
+        lookup = _median_ms(lookup, repeats)
+        print(
+            f'{label:<40}{per_call:>10.3f}{lookup:>10.4f}'
+            f'{per_call / lookup:>9.0f}x'
+        )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,104 @@
+"""
+Payload size comparison of whole figures and figure patches.
+
+Sends every reachable interaction of the patched graphs of the grid
+position page once as the whole figure and once as the patch of
+'figure_patch', checks that the patch turns the initial figure into the
+whole figure and compares the bytes per interaction, as sent and
+gzip compressed. Run from the repository root:
+
+    python -m benchmarks.figure_patch
+"""
+
+import copy
+import gzip
+import json
+import statistics
+
+from plotly.io.json import to_json_plotly
+
+import modules.datastore as datastore
+import modules.driver_standings_mod as ds
+import modules.driver_standings_vis_mod as dsv
+
+from modules.figure_patch import figure_patch
+
+
+def _apply(figure, patch):
+    # Only the assignments 'figure_patch' makes, or the whole figure
+    if '__dash_patch_update' not in patch:
+        return patch
+    figure = copy.deepcopy(figure)
+    for operation in patch['operations']:
+        assert operation['operation'] == 'Assign'
+        *path, name = operation['location']
+        target = figure
+        for key in path:
+            target = target[key]
+        target[name] = operation['params']['value']
+    return figure
+
+
+def main():
+    df = datastore.get('season_results')
+    df_weather = datastore.get('season_results_weather')
+    index = datastore.row_index('season_results', 'driver_name')
+    careers = ds.driver_careers(df, df_weather)
+    placements = ds.condition_placements(df_weather)
+    drivers = [None] + sorted(ds.driver_list(0, df, index))
+
+    # Initial figure and the figures of all interactions of every graph
+    graphs = {
+        'grid-finish-positions': (
+            dsv.create_grid_finish_figure(dsv.DEFAULT_DRIVER, df, index),
+            [
+                dsv.create_grid_finish_figure(driver, df, index)
+                for driver in drivers
+            ],
+        ),
+        'driver-placements': (
+            dsv.create_avg_all_drivers_figure(
+                dsv.DEFAULT_RACES, df, df_weather, careers
+            ),
+            list(
+                dsv.create_avg_all_drivers_figures(
+                    df, df_weather, careers
+                ).values()
+            ),
+        ),
+        'graph': (
+            dsv.driver_standings_dry(df_weather, placements=placements),
+            [
+                dsv.driver_standings_dry(df_weather, placements=placements),
+                dsv.driver_standings_mw(df_weather, placements=placements),
+            ],
+        ),
+    }
+
+    print(
+        f'{"bytes per interaction (median)":<32}{"updates":>8}'
+        f'{"figure":>10}{"patch":>10}{"gzip fig":>10}{"gzip pat":>10}'
+    )
+    for graph, (initial, figures) in graphs.items():
+        initial = json.loads(to_json_plotly(initial))
+        sizes = []
+        for figure in figures:
+            whole = to_json_plotly(figure).encode()
+            patch = to_json_plotly(figure_patch(figure)).encode()
+            if _apply(initial, json.loads(patch)) != json.loads(whole):
+                print(f'{graph}: patch differs from the figure')
+            sizes.append((
+                len(whole),
+                len(patch),
+                len(gzip.compress(whole)),
+                len(gzip.compress(patch)),
+            ))
+        medians = [statistics.median(size) for size in zip(*sizes)]
+        print(
+            f'{graph:<32}{len(figures):>8}'
+            + ''.join(f'{median:>10.0f}' for median in medians)
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Equivalence check and benchmark of the clientside incidents figure.
+
+Builds the incidents by circuit figure of the retirements page for
+sampled slider values with 'assets/incidents.js' (run by Node.js) and
+with 'create_incidents_figure', compares the figures and times both.
+Run from the repository root:
+
+    python -m benchmarks.incidents_clientside [samples]
+"""
+
+import base64
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from plotly.io.json import to_json_plotly
+
+import modules.crash_vis_mod as cvm
+import modules.datastore as datastore
+
+
+SCRIPT = os.path.join(
+    os.path.dirname(__file__), os.pardir, 'assets', 'incidents.js'
+)
+
+# Runs the clientside callback for every case, prints figures and timings
+_RUNNER = """
+const fs = require('fs');
+globalThis.window = globalThis;
+eval(fs.readFileSync(process.argv[2], 'utf8'));
+const {store, cases} = JSON.parse(fs.readFileSync(process.argv[3], 'utf8'));
+const figure = window.dash_clientside.incidents.figure;
+const figures = [];
+const timings = [];
+for (const [years, minRaceCount, typeValue] of cases) {
+    const start = performance.now();
+    figures.push(figure(years, minRaceCount, typeValue, store));
+    timings.push(performance.now() - start);
+}
+process.stdout.write(JSON.stringify({figures, timings}));
+"""
+
+
+def _decode(value):
+    # Plotly sends numeric arrays base64 encoded
+    if isinstance(value, dict):
+        if set(value) == {'dtype', 'bdata'}:
+            return np.frombuffer(
+                base64.b64decode(value['bdata']), dtype=value['dtype']
+            ).tolist()
+        return {key: _decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    return value
+
+
+def main(samples=500):
+    if shutil.which('node') is None:
+        print('Node.js is needed to run the clientside callback')
+        return
+
+    df = datastore.get('race_status')
+    cumulative = cvm.cumulative_incidents(df)
+    store = cvm.incidents_store_data(cumulative)
+    years = cumulative['years'].tolist()
+    cases = [
+        [[start_year, end_year], min_race_count, type_value]
+        for start_year in years
+        for end_year in years
+        if start_year <= end_year
+        for min_race_count in range(1, 31)
+        for type_value in (0, 1)
+    ]
+    # Always include a selection without any circuit
+    cases = [[[years[-1], years[-1]], 30, 0]] + random.Random(0).sample(
+        cases, min(samples, len(cases))
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        data_path = os.path.join(directory, 'cases.json')
+        with open(data_path, 'w', encoding='utf-8') as file:
+            json.dump({'store': store, 'cases': cases}, file)
+        runner_path = os.path.join(directory, 'runner.js')
+        with open(runner_path, 'w', encoding='utf-8') as file:
+            file.write(_RUNNER)
+        result = json.loads(subprocess.run(
+            ['node', runner_path, SCRIPT, data_path],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout)
+
+    timings = []
+    differences = 0
+    for (selected_years, min_race_count, type_value), clientside in zip(
+        cases, result['figures']
+    ):
+        start = time.perf_counter()
+        figure = cvm.create_incidents_figure(
+            df,
+            *selected_years,
+            min_race_count,
+            ['per_race', 'per_race_driver'][type_value],
+            cumulative,
+        )
+        payload = to_json_plotly(figure)
+        timings.append(time.perf_counter() - start)
+        if _decode(json.loads(payload)) != clientside:
+            differences += 1
+            print(f'differs: {selected_years} {min_race_count} {type_value}')
+
+    store_size = len(json.dumps(store, separators=(',', ':')))
+    print(f'store: {store_size / 2**10:.1f} KiB, sent once per page')
+    print(f'{len(cases)} figures, {differences} differ')
+    print()
+    print(f'{"figure (ms)":<40}{"median":>10}')
+    print(
+        f'{"server (create + serialize)":<40}'
+        f'{statistics.median(timings) * 1000:>10.3f}'
+    )
+    print(
+        f'{"clientside (incidents.js)":<40}'
+        f'{statistics.median(result["timings"]):>10.3f}'
+    )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
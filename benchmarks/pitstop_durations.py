@@ -0,0 +1,60 @@
+"""
+Benchmark of pit stop duration parsing on synthetic duration columns.
+
+Compares the row-by-row 'convert_duration_to_seconds' with the vectorized
+'parse_durations'. Run from the repository root:
+
+    python -m benchmarks.pitstop_durations [rows]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import modules.pitstop_mod as ptm
+
+
+def synthetic_durations(rows, seed=0):
+    """
+    Returns a string series like the 'duration' column of the pit stop
+    data: mostly seconds, some MM:SS.sss values, invalid and missing ones
+    """
+    rng = np.random.default_rng(seed)
+    seconds = rng.uniform(18, 40, rows).round(3).astype(str)
+    minutes = rng.integers(1, 30, rows).astype(str)
+    rest = rng.uniform(0, 60, rows).round(3)
+    long_stops = np.char.add(
+        np.char.add(minutes, ':'), np.char.zfill(rest.astype(str), 6)
+    )
+
+    values = seconds.astype(object)
+    kind = rng.random(rows)
+    values[kind < 0.08] = long_stops[kind < 0.08]
+    values[(kind >= 0.08) & (kind < 0.09)] = 'invalid'
+    values[(kind >= 0.09) & (kind < 0.10)] = np.nan
+    return pd.Series(values, name='duration')
+
+
+def main(rows=1_000_000):
+    durations = synthetic_durations(rows)
+
+    start = time.perf_counter()
+    expected = durations.apply(ptm.convert_duration_to_seconds)
+    apply_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = ptm.parse_durations(durations)
+    vectorized_seconds = time.perf_counter() - start
+
+    pd.testing.assert_series_equal(result, expected)
+
+    print(f'rows:              {rows:,}')
+    print(f'Series.apply:      {apply_seconds * 1000:.0f} ms')
+    print(f'parse_durations:   {vectorized_seconds * 1000:.0f} ms')
+    print(f'speedup:           {apply_seconds / vectorized_seconds:.1f}x')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
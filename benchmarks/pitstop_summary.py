@@ -0,0 +1,116 @@
+"""
+Latency benchmark of the pit stop summary of the circuit callbacks.
+
+Compares scanning the pit stops for the years of a circuit and for the
+total pit stop time per driver of a race with looking them up in the
+summary of 'pitstop_summary', and checks both give the same result for
+every race. Run from the repository root:
+
+    python -m benchmarks.pitstop_summary [repeats]
+"""
+
+import statistics
+import sys
+import time
+
+import modules.datastore as datastore
+import modules.pitstop_mod as ptm
+
+
+def _median_ms(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def _scan_years(df, race_name):
+    # Year dropdown as computed before the summary
+    years = df[df['race_name'] == race_name]['year'].unique()
+    return sorted(years), years[0] if len(years) > 0 else None
+
+
+def _scan_pitstops(df_unique, race_name, year):
+    # Total pit stop time per driver as computed before the summary
+    race = df_unique[
+        (df_unique['race_name'] == race_name) & (df_unique['year'] == year)
+    ]
+    race = race[race['race_completed']]
+    return (
+        race.groupby(['driver_name', 'finish_position'], observed=True)[
+            'duration'
+        ]
+        .sum()
+        .reset_index()
+        .sort_values('duration')
+    )
+
+
+def _lookup_years(summary, race_name):
+    return (
+        summary['years'].get(race_name, []),
+        summary['first_years'].get(race_name),
+    )
+
+
+def _lookup_pitstops(summary, race_name, year):
+    race = ptm.race_pitstops(summary, race_name, year)
+    return (
+        race[race['race_completed']][
+            ['driver_name', 'finish_position', 'duration']
+        ]
+        .reset_index(drop=True)
+        .sort_values('duration')
+    )
+
+
+def main(repeats=200):
+    df = datastore.get('pitstops')
+    df_unique = df.dropna(subset=['duration'])
+
+    start = time.perf_counter()
+    summary = ptm.pitstop_summary(df)
+    build = (time.perf_counter() - start) * 1000
+    print(
+        f'summary build: {build:.2f} ms '
+        f'({len(summary["table"])} rows, {len(summary["ranges"])} races)'
+    )
+
+    differences = sum(
+        list(_scan_years(df, race_name))
+        != list(_lookup_years(summary, race_name))
+        for race_name in df['race_name'].unique()
+    ) + sum(
+        not _scan_pitstops(df_unique, race_name, year).equals(
+            _lookup_pitstops(summary, race_name, year)
+        )
+        for race_name, year in summary['ranges']
+    )
+    print(f'{differences} races differ from scanning the pit stops')
+    print()
+
+    race_name, year = 'German Grand Prix', 2018
+    operations = {
+        f"years('{race_name}')": (
+            lambda: _scan_years(df, race_name),
+            lambda: _lookup_years(summary, race_name),
+        ),
+        f"pitstops('{race_name}', {year})": (
+            lambda: _scan_pitstops(df_unique, race_name, year),
+            lambda: _lookup_pitstops(summary, race_name, year),
+        ),
+    }
+    print(f'{"operation (ms)":<44}{"scan":>10}{"lookup":>10}{"speedup":>10}')
+    for label, (scan, lookup) in operations.items():
+        scan = _median_ms(scan, repeats)
+        lookup = _median_ms(lookup, repeats)
+        print(
+            f'{label:<44}{scan:>10.3f}{lookup:>10.3f}'
+            f'{scan / lookup:>9.1f}x'
+        )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
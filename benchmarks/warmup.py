@@ -0,0 +1,64 @@
+"""
+Wall time of building the import time figures serially and in parallel.
+
+Builds every figure of 'warmup.FIGURES' one after another, as importing
+the pages did, and in warm-up processes, as the warm-up does, lists the
+build time of each figure and checks both give the same plotly JSON. The
+wall time includes starting the processes, the speedup depends on the
+cores available. Run from the repository root:
+
+    python -m benchmarks.warmup [jobs]
+"""
+
+import os
+import sys
+import time
+
+import modules.datastore as datastore
+import modules.warmup as warmup
+
+
+def main(jobs=None):
+    jobs = jobs or max(warmup.JOBS, 1)
+    # Datasets and row indexes the pages load before building the figures
+    for name in (
+        'season_results',
+        'season_results_weather',
+        'race_status',
+        'crashes_weather',
+    ):
+        datastore.get(name)
+    datastore.row_index('season_results', 'driver_name')
+
+    start = time.perf_counter()
+    serial = {name: warmup.build(name) for name in warmup.FIGURES}
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    futures = warmup.spawn(warmup.FIGURES, jobs)
+    parallel = {
+        name: future.result()[1:] for name, future in futures.items()
+    }
+    parallel_time = time.perf_counter() - start
+
+    print(f'{"figure (ms)":<32}{"serial":>10}{"worker":>10}{"KiB":>8}')
+    differences = 0
+    for name, (_, payload, seconds) in serial.items():
+        differences += parallel[name][0] != payload
+        print(
+            f'{name:<32}{seconds * 1000:>10.1f}'
+            f'{parallel[name][1] * 1000:>10.1f}{len(payload) / 1024:>8.1f}'
+        )
+    print()
+    print(
+        f'{len(serial)} figures, {differences} differ between serial and '
+        f'warm-up process builds ({os.cpu_count()} cores)'
+    )
+    print(
+        f'serial: {serial_time * 1000:.0f} ms, {jobs} warm-up processes: '
+        f'{parallel_time * 1000:.0f} ms'
+    )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else None)
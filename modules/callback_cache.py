@@ -0,0 +1,230 @@
+"""
+Bounded LRU cache for the results of page callbacks.
+
+Callbacks decorated with 'cached_callback' store their serialized result
+keyed on their normalized inputs and the version of the loaded data.
+The results of all callbacks share one budget per process, at most
+F1_CALLBACK_CACHE_ENTRIES results (default 4096) of together at most
+F1_CALLBACK_CACHE_BYTES (default 16 MiB), the least recently used
+result of any callback is evicted first. Results are also shared with
+the other workers if a shared backend is configured (see 'shared_cache')
+and answered from the static snapshot if it is served (see 'prerender').
+"""
+
+import collections
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import pandas as pd
+
+from plotly.io.json import to_json_plotly
+
+import modules.datastore as datastore
+import modules.prerender as prerender
+import modules.shared_cache as shared_cache
+
+
+logger = logging.getLogger(__name__)
+
+# Set F1_CALLBACK_CACHE=0 to always run the callbacks
+ENABLED = os.environ.get('F1_CALLBACK_CACHE', '1') != '0'
+
+# Results and bytes of the results of all callbacks together
+MAX_ENTRIES = int(os.environ.get('F1_CALLBACK_CACHE_ENTRIES', 4096))
+MAX_BYTES = int(os.environ.get('F1_CALLBACK_CACHE_BYTES', 16 * 2**20))
+
+# Caches of all decorated callbacks by callback name and the results of
+# all of them in least recently used order, keyed on the callback name
+# and 'cache_key'
+_caches = {}
+_entries = collections.OrderedDict()
+_lock = threading.Lock()
+
+
+def _json_default(value):
+    # NumPy scalars are sent by Dash as plain numbers
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def cache_key(args, kwargs):
+    """
+    Returns the key of the callback inputs 'args' and 'kwargs' together
+    with the current data version, equal inputs (e.g. lists and tuples)
+    give equal keys
+    """
+    inputs = json.dumps(
+        [args, kwargs],
+        sort_keys=True,
+        default=_json_default,
+        separators=(',', ':'),
+    )
+    return datastore.data_version(), inputs
+
+
+def callbacks():
+    """
+    Returns all decorated callbacks by callback name, the undecorated
+    callback is available as '__wrapped__'
+    """
+    with _lock:
+        return dict(_caches)
+
+
+def _remember(name, key, payload):
+    """
+    Stores 'payload' of callback 'name' and evicts the least recently
+    used results of all callbacks until they fit in MAX_ENTRIES and
+    MAX_BYTES
+    """
+    with _lock:
+        if len(payload) > MAX_BYTES or (name, key) in _entries:
+            return
+        _entries[(name, key)] = payload
+        stats = _caches[name].cache_stats
+        stats['entries'] += 1
+        stats['bytes'] += len(payload)
+        total = sum(
+            callback.cache_stats['bytes'] for callback in _caches.values()
+        )
+        while len(_entries) > MAX_ENTRIES or total > MAX_BYTES:
+            (evicted_name, _), evicted = _entries.popitem(last=False)
+            stats = _caches[evicted_name].cache_stats
+            stats['entries'] -= 1
+            stats['bytes'] -= len(evicted)
+            stats['evictions'] += 1
+            total -= len(evicted)
+
+
+def cached_callback():
+    """
+    Decorator for page callbacks, place it below 'dash.callback'
+
+    Results are stored serialized the same way Dash sends them, a hit
+    returns the deserialized result without running the callback. The
+    results of all callbacks share MAX_ENTRIES and MAX_BYTES, the least
+    recently used ones are evicted first. On a miss the shared backend
+    is asked before the callback runs.
+    """
+
+    def decorator(func):
+        if not ENABLED and not prerender.SERVING:
+            return func
+
+        name = f'{func.__module__}.{func.__name__}'
+        stats = {
+            'callback': name,
+            'entries': 0,
+            'bytes': 0,
+            'prerendered_hits': 0,
+            'hits': 0,
+            'shared_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+        }
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = cache_key(args, kwargs)
+            if prerender.SERVING:
+                payload = prerender.lookup(name, *key)
+                if payload is not None:
+                    with _lock:
+                        stats['prerendered_hits'] += 1
+                    return json.loads(payload)
+            if not ENABLED:
+                return func(*args, **kwargs)
+
+            with _lock:
+                payload = _entries.get((name, key))
+                if payload is not None:
+                    _entries.move_to_end((name, key))
+                    stats['hits'] += 1
+            if payload is not None:
+                return json.loads(payload)
+
+            shared = shared_cache.backend()
+            if shared is not None:
+                version, inputs = key
+                shared_key = shared_cache.entry_key(
+                    version, name, hashlib.sha256(inputs.encode()).hexdigest()
+                )
+                try:
+                    payload = shared.get(shared_key)
+                except shared_cache.ERRORS as error:
+                    logger.warning('Shared cache get failed: %s', error)
+                if payload is not None:
+                    with _lock:
+                        stats['shared_hits'] += 1
+                    _remember(name, key, payload)
+                    return json.loads(payload)
+
+            result = func(*args, **kwargs)
+            payload = to_json_plotly(result)
+            with _lock:
+                stats['misses'] += 1
+            _remember(name, key, payload)
+
+            if shared is not None:
+                try:
+                    shared.set(shared_key, payload)
+                except shared_cache.ERRORS as error:
+                    logger.warning('Shared cache set failed: %s', error)
+            return result
+
+        def clear():
+            with _lock:
+                for entry in [entry for entry in _entries if entry[0] == name]:
+                    del _entries[entry]
+                stats['entries'] = 0
+                stats['bytes'] = 0
+
+        wrapper.cache_stats = stats
+        wrapper.cache_clear = clear
+        with _lock:
+            _caches[name] = wrapper
+        return wrapper
+
+    return decorator
+
+
+def cache_report():
+    """
+    Returns a dataframe with size, hits, misses and evictions of every
+    callback cache in this process
+    """
+    with _lock:
+        callbacks = list(_caches.values())
+    return pd.DataFrame(
+        [dict(callback.cache_stats) for callback in callbacks],
+        columns=[
+            'callback',
+            'entries',
+            'bytes',
+            'prerendered_hits',
+            'hits',
+            'shared_hits',
+            'misses',
+            'evictions',
+        ],
+    )
+
+
+def clear_all():
+    """
+    Removes the entries of every callback cache in this process and of
+    the shared backend
+    """
+    with _lock:
+        callbacks = list(_caches.values())
+    for callback in callbacks:
+        callback.cache_clear()
+
+    shared = shared_cache.backend()
+    if shared is not None:
+        shared.clear()
@@ -1,4 +1,8 @@
+import os
+
 from dash import dcc, html
+import numpy as np
+import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
@@ -172,6 +176,15 @@ def average_yearly_retirements(df):
     return fig
 
 
+# Incident columns summed per circuit
+INCIDENT_COLUMNS = [
+    'Race Incident/Crash',
+    'Technical Failure',
+    'Total_Retirements',
+    'Total',
+]
+
+
 def calculate_incidents(df, min_race_count):
     """
     Calculates the incident statistics per race and as a percentage of the
@@ -193,22 +206,38 @@ def calculate_incidents(df, min_race_count):
         filtered by the minimum race count.
     """
     races_per_circuit = (
-        df.groupby('circuit_id').size().reset_index(name='race_count')
+        df.groupby('circuit_id', observed=True)
+        .size()
+        .reset_index(name='race_count')
     )
     track_incidents = (
-        df.groupby('circuit_id')[
-            [
-                'Race Incident/Crash',
-                'Technical Failure',
-                'Total_Retirements',
-                'Total',
-            ]
-        ]
+        df.groupby('circuit_id', observed=True)[INCIDENT_COLUMNS]
         .sum()
         .reset_index()
     )
     track_incidents = track_incidents.merge(races_per_circuit, on='circuit_id')
 
+    return filter_incidents(track_incidents, min_race_count)
+
+
+def filter_incidents(track_incidents, min_race_count):
+    """
+    Adds the incidents per race and the incident rates to the summed
+    incidents of each circuit and filters the circuits by race count.
+
+    Input:
+        A DataFrame containing per circuit:
+            circuit_id
+            the sums of 'INCIDENT_COLUMNS'
+            race_count
+
+        min_race_count (int):
+            Minimum number of races required for a circuit to be included
+            in the returned Dataframe.
+
+    Returns:
+        The DataFrame as returned by 'calculate_incidents'.
+    """
     # Calculate incidents per race for each type
     track_incidents['crashes_per_race'] = (
         track_incidents['Race Incident/Crash'] / track_incidents['race_count']
@@ -241,311 +270,362 @@ def calculate_incidents(df, min_race_count):
     return track_incidents
 
 
-# Modified by Claude
-def create_incidents_figure(df, start_year, end_year, min_race_count, type):
+def cumulative_incidents(df):
     """
-    Creates a Plotly figure visualizing race incident statistics by circuit.
+    Precomputes the race count and the incident sums of each circuit,
+    cumulated over the years, so the incidents of any range of years are
+    the difference of two years.
 
     Input:
         A DataFrame containing:
             year
-            incidents
-            failures
-            retirements
+            circuit_id
+            the columns of 'INCIDENT_COLUMNS'
+
+    Returns:
+        A dict with the years, the circuit id dtype, the incident column
+        dtypes and the cumulative sums per circuit, per year (with a
+        leading zero year) and per race count and incident column.
+    """
+    circuit_id = df['circuit_id'].astype('category')
+    circuit_codes = circuit_id.cat.codes.to_numpy()
+    years, year_codes = np.unique(df['year'].to_numpy(), return_inverse=True)
+
+    rows = circuit_codes >= 0
+    size = len(circuit_id.cat.categories) * len(years)
+    keys = circuit_codes[rows].astype(np.int64) * len(years) + year_codes[rows]
+    values = [np.ones(len(df), dtype=np.int64)] + [
+        df[column].to_numpy(dtype=np.int64) for column in INCIDENT_COLUMNS
+    ]
+    sums = np.stack(
+        [np.bincount(keys, value[rows], minlength=size) for value in values],
+        axis=-1,
+    ).astype(np.int64)
+    sums = sums.reshape(len(circuit_id.cat.categories), len(years), -1)
+
+    counts = np.zeros(
+        (sums.shape[0], len(years) + 1, sums.shape[2]), dtype=np.int64
+    )
+    np.cumsum(sums, axis=1, out=counts[:, 1:])
+    return {
+        'years': years,
+        'circuit_dtype': circuit_id.dtype,
+        'dtypes': df[INCIDENT_COLUMNS].dtypes,
+        'counts': counts,
+    }
+
+
+def calculate_incidents_for_years(
+    cumulative, start_year, end_year, min_race_count
+):
+    """
+    Calculates the same statistics as 'calculate_incidents' for the races
+    from 'start_year' to 'end_year' out of the cumulative sums.
+
+    Input:
+        cumulative (dict): The sums returned by 'cumulative_incidents'.
         start_year (int): The starting year for the analysis.
         end_year (int): The ending year for the analysis.
         min_race_count (int): Minimum number of races required for inclusion.
-        type (str): Determines the visualization type.
 
     Returns:
-        Bar charts displaying incidents by circuit.
+        The DataFrame as returned by 'calculate_incidents'.
     """
-    # Filter for the selected year range
-    df_filtered = df[(df['year'] >= start_year) & (df['year'] <= end_year)]
-
-    track_incidents = calculate_incidents(df_filtered, min_race_count)
-
-    # Return an empty figure if no data matches criteria
-    if track_incidents.empty:
-        fig = go.Figure()
-        fig.update_layout(
-            height=850,
-            annotations=[
-                dict(
-                    text='No circuits with enough races in selected period',
-                    xref='paper',
-                    yref='paper',
-                    x=0.5,
-                    y=0.5,
-                    showarrow=False,
-                    font=dict(size=20),
+    years = cumulative['years']
+    start = np.searchsorted(years, start_year, side='left')
+    stop = np.searchsorted(years, end_year, side='right')
+    if stop < start:
+        stop = start
+    sums = cumulative['counts'][:, stop] - cumulative['counts'][:, start]
+
+    circuits = np.flatnonzero(sums[:, 0] > 0)
+    sums = sums[circuits]
+    track_incidents = pd.DataFrame(
+        {
+            'circuit_id': pd.Categorical.from_codes(
+                circuits, dtype=cumulative['circuit_dtype']
+            ),
+            **{
+                column: sums[:, position + 1].astype(
+                    cumulative['dtypes'][column]
                 )
-            ],
-        )
-        return fig
+                for position, column in enumerate(INCIDENT_COLUMNS)
+            },
+            'race_count': sums[:, 0],
+        }
+    )
 
-    if type == 'per_race':
-        subplot_titles = [
-            'Average Amount of Crashes per Race',
-            'Average Amount of Technical Failures per Race',
-            'Average Amount of Total Retirements per Race',
-        ]
-    else:  # per_race_driver
-        subplot_titles = [
-            'Average Rate of Crashes in Percent',
-            'Average Rate of Technical Failures in Percent',
-            'Average Rate of Total Retirements in Percent',
-        ]
+    return filter_incidents(track_incidents, min_race_count)
+
+
+# Title of the incidents figure, formatted with the selected slider values
+INCIDENTS_TITLE = (
+    'Incidents by Circuit ({start_year} - {end_year})\n'
+    '(Minimum {min_race_count} races)'
+)
+
+# Bars of the three subplots per figure type: the plotted column of
+# 'filter_incidents', the trace name, the colorscale and the hover label
+# of the value
+INCIDENT_BARS = {
+    'per_race': [
+        (
+            'crashes_per_race',
+            'Crashes',
+            ['orangered', 'firebrick', 'darkred'],
+            'Crashes per Race: {:.2f}',
+        ),
+        (
+            'failures_per_race',
+            'Failures',
+            ['deepskyblue', 'mediumblue', 'darkblue'],
+            'Technical Failures per Race: {:.2f}',
+        ),
+        (
+            'retirements_per_race',
+            'Retirements',
+            ['limegreen', 'forestgreen', 'darkgreen'],
+            'Total Retirements per Race: {:.2f}',
+        ),
+    ],
+    'per_race_driver': [
+        (
+            'crashes_per_race_driver',
+            'Crashes',
+            ['orangered', 'firebrick', 'darkred'],
+            'Crash Rate: {:.2f}%',
+        ),
+        (
+            'failures_per_race_driver',
+            'Failures',
+            ['deepskyblue', 'mediumblue', 'darkblue'],
+            'Technical Failure Rate: {:.2f}%',
+        ),
+        (
+            'retirements_per_race_driver',
+            'Retirements',
+            ['limegreen', 'forestgreen', 'darkgreen'],
+            'Total Retirements Rate: {:.2f}%',
+        ),
+    ],
+}
+
+INCIDENT_SUBPLOT_TITLES = {
+    'per_race': [
+        'Average Amount of Crashes per Race',
+        'Average Amount of Technical Failures per Race',
+        'Average Amount of Total Retirements per Race',
+    ],
+    'per_race_driver': [
+        'Average Rate of Crashes in Percent',
+        'Average Rate of Technical Failures in Percent',
+        'Average Rate of Total Retirements in Percent',
+    ],
+}
+
+# Set F1_CLIENTSIDE_INCIDENTS=0 to build the incidents figure on the
+# server instead of in the browser (see 'assets/incidents.js')
+CLIENTSIDE_INCIDENTS = os.environ.get('F1_CLIENTSIDE_INCIDENTS', '1') != '0'
+
+
+def empty_incidents_figure():
+    """
+    Creates the figure shown if no circuit matches the selection of the
+    incidents dashboard.
 
-    fig = make_subplots(rows=1, cols=3, subplot_titles=subplot_titles)
+    Returns:
+        A Plotly figure with a notice instead of data.
+    """
+    fig = go.Figure()
+    fig.update_layout(
+        height=850,
+        annotations=[
+            dict(
+                text='No circuits with enough races in selected period',
+                xref='paper',
+                yref='paper',
+                x=0.5,
+                y=0.5,
+                showarrow=False,
+                font=dict(size=20),
+            )
+        ],
+    )
+    return fig
 
-    if type == 'per_race':
-        # Sort by highest crash incidents per race
-        track_incidents_sorted = track_incidents.sort_values(
-            by='crashes_per_race', ascending=True
-        )
 
-        fig.add_trace(
-            go.Bar(
-                x=track_incidents_sorted['crashes_per_race'],
-                y=track_incidents_sorted['circuit_id'],
-                orientation='h',
-                marker=dict(
-                    color=track_incidents_sorted['crashes_per_race'],
-                    colorscale=[
-                        [0, 'orangered'],
-                        [0.5, 'firebrick'],
-                        [1, 'darkred'],
-                    ],
-                ),
-                name='Crashes',
-                hovertext=track_incidents_sorted.apply(
-                    lambda row: (
-                        f'Races: {row["race_count"]}<br>'
-                        f'Crashes per Race: {row["crashes_per_race"]:.2f}'
-                    ),
-                    axis=1,
-                ),
-                hoverinfo='text',
-            ),
-            row=1,
-            col=1,
-        )
+def incidents_subplots(type):
+    """
+    Creates the three empty subplots of the incidents figure.
 
-        # Sort by highest failures per race
-        track_incidents_sorted = track_incidents.sort_values(
-            by='failures_per_race', ascending=True
-        )
+    Input:
+        type (str): Determines the visualization type.
 
-        fig.add_trace(
-            go.Bar(
-                x=track_incidents_sorted['failures_per_race'],
-                y=track_incidents_sorted['circuit_id'],
-                orientation='h',
-                marker=dict(
-                    color=track_incidents_sorted['failures_per_race'],
-                    colorscale=[
-                        [0, 'deepskyblue'],
-                        [0.5, 'mediumblue'],
-                        [1, 'darkblue'],
-                    ],
-                ),
-                name='Failures',
-                hovertext=track_incidents_sorted.apply(
-                    lambda row: (
-                        f'Races: {row["race_count"]}<br>'
-                        f'Technical Failures per Race: '
-                        f'{row["failures_per_race"]:.2f}'
-                    ),
-                    axis=1,
-                ),
-                hoverinfo='text',
-            ),
-            row=1,
-            col=2,
-        )
+    Returns:
+        A Plotly figure with the layout but without title and bars.
+    """
+    subplot_titles = INCIDENT_SUBPLOT_TITLES[type]
+    fig = make_subplots(rows=1, cols=3, subplot_titles=subplot_titles)
+    fig.update_layout(
+        height=850,
+        autosize=True,
+        # Put the x-axis scale on top
+        xaxis=dict(side='top'),
+        xaxis2=dict(side='top'),
+        xaxis3=dict(side='top'),
+        margin=dict(t=100, b=20, l=50, r=30),
+        template='plotly_dark',
+        showlegend=False,
+        annotations=[
+            dict(
+                x=x,
+                y=1.02,
+                text=text,
+                showarrow=False,
+                font=dict(size=15),
+                xref='paper',
+                yref='paper',
+            )
+            for x, text in zip([0.135, 0.49, 0.85], subplot_titles)
+        ],
+    )
+    return fig
 
-        # Sort by highest retirements per race
-        track_incidents_sorted = track_incidents.sort_values(
-            by='retirements_per_race', ascending=True
-        )
 
-        fig.add_trace(
-            go.Bar(
-                x=track_incidents_sorted['retirements_per_race'],
-                y=track_incidents_sorted['circuit_id'],
-                orientation='h',
-                marker=dict(
-                    color=track_incidents_sorted['retirements_per_race'],
-                    colorscale=[
-                        [0, 'limegreen'],
-                        [0.5, 'forestgreen'],
-                        [1, 'darkgreen'],
-                    ],
-                ),
-                name='Retirements',
-                hovertext=track_incidents_sorted.apply(
-                    lambda row: (
-                        f'Races: {row["race_count"]}<br>'
-                        f'Total Retirements per Race: '
-                        f'{row["retirements_per_race"]:.2f}'
-                    ),
-                    axis=1,
-                ),
-                hoverinfo='text',
-            ),
-            row=1,
-            col=3,
-        )
+# Modified by Claude
+def create_incidents_figure(
+    df, start_year, end_year, min_race_count, type, cumulative=None
+):
+    """
+    Creates a Plotly figure visualizing race incident statistics by circuit.
 
-    # per_race_driver
-    else:
-        # Sort by highest crash incidents per total drivers
-        track_incidents_sorted = track_incidents.sort_values(
-            by='crashes_per_race_driver', ascending=True
-        )
+    Input:
+        A DataFrame containing:
+            year
+            incidents
+            failures
+            retirements
+        start_year (int): The starting year for the analysis.
+        end_year (int): The ending year for the analysis.
+        min_race_count (int): Minimum number of races required for inclusion.
+        type (str): Determines the visualization type.
+        cumulative (dict): Optionally the sums of 'cumulative_incidents'
+            of the DataFrame, so the year range is not filtered again.
 
-        fig.add_trace(
-            go.Bar(
-                x=track_incidents_sorted['crashes_per_race_driver'],
-                y=track_incidents_sorted['circuit_id'],
-                orientation='h',
-                marker=dict(
-                    color=track_incidents_sorted['crashes_per_race_driver'],
-                    colorscale=[
-                        [0, 'orangered'],
-                        [0.5, 'firebrick'],
-                        [1, 'darkred'],
-                    ],
-                ),
-                name='Crashes',
-                hovertext=track_incidents_sorted.apply(
-                    lambda row: (
-                        f'Races: {row["race_count"]}<br>'
-                        f'Crash Rate: {row["crashes_per_race_driver"]:.2f}%'
-                    ),
-                    axis=1,
-                ),
-                hoverinfo='text',
-            ),
-            row=1,
-            col=1,
+    Returns:
+        Bar charts displaying incidents by circuit.
+    """
+    if cumulative is None:
+        # Filter for the selected year range
+        df_filtered = df[
+            (df['year'] >= start_year) & (df['year'] <= end_year)
+        ]
+        track_incidents = calculate_incidents(df_filtered, min_race_count)
+    else:
+        track_incidents = calculate_incidents_for_years(
+            cumulative, start_year, end_year, min_race_count
         )
 
-        # Sort by highest failures per total drivers
-        track_incidents_sorted = track_incidents.sort_values(
-            by='failures_per_race_driver', ascending=True
-        )
+    # Return an empty figure if no data matches criteria
+    if track_incidents.empty:
+        return empty_incidents_figure()
 
-        fig.add_trace(
-            go.Bar(
-                x=track_incidents_sorted['failures_per_race_driver'],
-                y=track_incidents_sorted['circuit_id'],
-                orientation='h',
-                marker=dict(
-                    color=track_incidents_sorted['failures_per_race_driver'],
-                    colorscale=[
-                        [0, 'deepskyblue'],
-                        [0.5, 'mediumblue'],
-                        [1, 'darkblue'],
-                    ],
-                ),
-                name='Failures',
-                hovertext=track_incidents_sorted.apply(
-                    lambda row: (
-                        f'Races: {row["race_count"]}<br>'
-                        f'Technical Failure Rate: '
-                        f'{row["failures_per_race_driver"]:.2f}%'
-                    ),
-                    axis=1,
-                ),
-                hoverinfo='text',
-            ),
-            row=1,
-            col=2,
-        )
+    fig = incidents_subplots(type)
 
-        # Sort by highest retirements per total drivers
+    for col, (column, name, colors, label) in enumerate(
+        INCIDENT_BARS[type], start=1
+    ):
+        # Sort by the highest value, equal values keep the circuit order
         track_incidents_sorted = track_incidents.sort_values(
-            by='retirements_per_race_driver', ascending=True
+            by=column, ascending=True, kind='stable'
         )
 
         fig.add_trace(
             go.Bar(
-                x=track_incidents_sorted['retirements_per_race_driver'],
+                x=track_incidents_sorted[column],
                 y=track_incidents_sorted['circuit_id'],
                 orientation='h',
                 marker=dict(
-                    color=track_incidents_sorted[
-                        'retirements_per_race_driver'
-                    ],
+                    color=track_incidents_sorted[column],
                     colorscale=[
-                        [0, 'limegreen'],
-                        [0.5, 'forestgreen'],
-                        [1, 'darkgreen'],
+                        [0, colors[0]],
+                        [0.5, colors[1]],
+                        [1, colors[2]],
                     ],
                 ),
-                name='Retirements',
-                hovertext=track_incidents_sorted.apply(
-                    lambda row: (
-                        f'Races: {row["race_count"]}<br>'
-                        f'Total Retirements Rate: '
-                        f'{row["retirements_per_race_driver"]:.2f}%'
-                    ),
-                    axis=1,
-                ),
+                name=name,
+                hovertext=[
+                    f'Races: {race_count}<br>' + label.format(value)
+                    for race_count, value in zip(
+                        track_incidents_sorted['race_count'],
+                        track_incidents_sorted[column],
+                    )
+                ],
                 hoverinfo='text',
             ),
             row=1,
-            col=3,
+            col=col,
         )
 
     fig.update_layout(
-        height=850,
-        autosize=True,
-        # Put the x-axis scale on top
-        xaxis=dict(side='top'),
-        xaxis2=dict(side='top'),
-        xaxis3=dict(side='top'),
-        margin=dict(t=100, b=20, l=50, r=30),
-        title_text=f'Incidents by Circuit ({start_year} - {end_year})\n'
-        f'(Minimum {min_race_count} races)',
-        template='plotly_dark',
-        showlegend=False,
-        annotations=[
-            dict(
-                x=0.135,
-                y=1.02,
-                text=subplot_titles[0],
-                showarrow=False,
-                font=dict(size=15),
-                xref='paper',
-                yref='paper',
-            ),
-            dict(
-                x=0.49,
-                y=1.02,
-                text=subplot_titles[1],
-                showarrow=False,
-                font=dict(size=15),
-                xref='paper',
-                yref='paper',
-            ),
-            dict(
-                x=0.85,
-                y=1.02,
-                text=subplot_titles[2],
-                showarrow=False,
-                font=dict(size=15),
-                xref='paper',
-                yref='paper',
-            ),
-        ],
+        title_text=INCIDENTS_TITLE.format(
+            start_year=start_year,
+            end_year=end_year,
+            min_race_count=min_race_count,
+        ),
     )
 
     return fig
 
 
+def incidents_store_data(cumulative):
+    """
+    Creates the data of the store the incidents figure is built from in
+    the browser (see 'assets/incidents.js').
+
+    Input:
+        cumulative (dict): The sums returned by 'cumulative_incidents'.
+
+    Returns:
+        A dict with the years, the circuits, the cumulative race count and
+        incident sums as one flat array per column (circuit major, with the
+        leading zero year), the bars of 'INCIDENT_BARS', the layout with the
+        subplot titles of every type and the empty figure.
+    """
+    counts = cumulative['counts']
+    return {
+        'years': cumulative['years'].tolist(),
+        'circuits': cumulative['circuit_dtype'].categories.tolist(),
+        'counts': {
+            column: counts[:, :, position].ravel().tolist()
+            for position, column in enumerate(
+                ['race_count'] + INCIDENT_COLUMNS
+            )
+        },
+        'title': INCIDENTS_TITLE,
+        'bars': {
+            type: [
+                {
+                    'column': column,
+                    'name': name,
+                    'colorscale': [
+                        [0, colors[0]],
+                        [0.5, colors[1]],
+                        [1, colors[2]],
+                    ],
+                    'label': label,
+                }
+                for column, name, colors, label in bars
+            ]
+            for type, bars in INCIDENT_BARS.items()
+        },
+        # The layouts of the types only differ in the subplot titles
+        'layout': incidents_subplots('per_race').to_dict()['layout'],
+        'subplot_titles': INCIDENT_SUBPLOT_TITLES,
+        'empty': empty_incidents_figure().to_dict(),
+    }
+
+
 # Modified by Claude
 def create_interactive_incidents_dashboard(df):
     """
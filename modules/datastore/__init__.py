@@ -0,0 +1,24 @@
+"""
+Shared data layer for all pages.
+
+Every CSV in the data directory is parsed at most once per process with
+the explicit dtypes from 'schema.DATASETS'. Pages access the data through
+'get', which hands out shallow copies of the shared dataframes. Their
+values are read-only, code that changes the values of a frame it got
+from 'get' copies it first.
+"""
+
+from modules.datastore.index import (  # noqa
+    index_counts,
+    index_keys_with_count,
+    index_rows,
+)
+from modules.datastore.loader import (  # noqa
+    data_version,
+    get,
+    load,
+    load_all,
+    load_report,
+    row_index,
+)
+from modules.datastore.schema import DATASETS  # noqa
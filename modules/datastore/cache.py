@@ -0,0 +1,255 @@
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from modules.datastore import schema
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depends on the deployment
+    pq = None
+
+
+logger = logging.getLogger(__name__)
+
+# Key of the parquet schema metadata entry describing the cached source
+METADATA_KEY = b'f1_datastore'
+
+# Set F1_DATA_CACHE=0 to always parse the CSVs
+ENABLED = os.environ.get('F1_DATA_CACHE', '1') != '0'
+
+# Content hashes of the CSVs by path, with the mtime and size they were
+# computed for
+_hashes = {}
+
+
+def available():
+    """
+    Returns True if the binary cache can be used in this process
+    """
+    return ENABLED and pq is not None
+
+
+def cache_path(name):
+    """
+    Returns the path of the parquet cache next to the CSV of dataset 'name'
+    """
+    csv_file = schema.DATASETS[name]['file']
+    return schema.DATA_PATH + os.path.splitext(csv_file)[0] + '.parquet'
+
+
+def file_hash(path):
+    """
+    Returns the sha256 hex digest of the file at 'path'
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def schema_token(name):
+    """
+    Returns a token that changes whenever the schema of dataset 'name'
+    changes, so that caches written with an older schema are rebuilt
+    """
+    spec = schema.DATASETS[name]
+    description = repr(
+        (
+            sorted(spec['dtype'].items()),
+            sorted(
+                (column, f'{func.__module__}.{func.__qualname__}')
+                for column, func in spec.get('parsers', {}).items()
+            ),
+            spec.get('parse_dates', []),
+        )
+    )
+    return hashlib.sha256(description.encode()).hexdigest()[:16]
+
+
+def _source_info(name):
+    """
+    Returns mtime and size of the CSV of dataset 'name'
+    """
+    stat = os.stat(schema.DATA_PATH + schema.DATASETS[name]['file'])
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def source_hash(name):
+    """
+    Returns the sha256 hex digest of the CSV of dataset 'name'
+
+    mtime and size only decide whether the CSV is hashed again: the hash
+    of this process or the one stored in the cache metadata is reused as
+    long as they match.
+    """
+    csv_path = schema.DATA_PATH + schema.DATASETS[name]['file']
+    source = _source_info(name)
+    stamp = (source['mtime_ns'], source['size'])
+    known = _hashes.get(csv_path)
+    if known is None or known[0] != stamp:
+        digest = None
+        if available() and os.path.exists(cache_path(name)):
+            cached = _read_metadata(cache_path(name)) or {}
+            if (cached.get('mtime_ns'), cached.get('size')) == stamp:
+                digest = cached.get('sha256')
+        known = (stamp, digest or file_hash(csv_path))
+        _hashes[csv_path] = known
+    return known[1]
+
+
+def source_token(name):
+    """
+    Returns a token of the content of the CSV and the schema of dataset
+    'name', which is the same on every host and checkout with equal files
+    """
+    return f'{source_hash(name)[:16]}-{schema_token(name)}'
+
+
+def _read_metadata(path):
+    """
+    Returns the source description stored in the parquet file at 'path'
+    or None if there is none
+    """
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+    except (OSError, ValueError):
+        return None
+    if METADATA_KEY not in metadata:
+        return None
+    return json.loads(metadata[METADATA_KEY])
+
+
+def is_fresh(name):
+    """
+    Checks if the cache of dataset 'name' matches its CSV
+
+    mtime and size are compared first. If they differ (e.g. after a fresh
+    checkout) the content hash decides.
+
+    Returns True if the cache can be used
+    """
+    path = cache_path(name)
+    if not os.path.exists(path):
+        return False
+
+    cached = _read_metadata(path)
+    if cached is None or cached.get('schema') != schema_token(name):
+        return False
+
+    source = _source_info(name)
+    if (
+        cached.get('mtime_ns') == source['mtime_ns']
+        and cached.get('size') == source['size']
+    ):
+        return True
+
+    return cached.get('sha256') == source_hash(name)
+
+
+def read(name, columns=None):
+    """
+    Reads dataset 'name' from its cache, optionally only the given
+    'columns'
+
+    Returns the dataframe or None if the cache is missing or stale
+    """
+    if not available() or not is_fresh(name):
+        return None
+
+    df = pd.read_parquet(cache_path(name), columns=columns)
+
+    # Parquet returns missing strings as None, the CSV parser as NaN
+    object_columns = df.select_dtypes(include='object').columns
+    if len(object_columns):
+        df[object_columns] = df[object_columns].replace({None: np.nan})
+    return df
+
+
+def _write_table(path, df, metadata):
+    """
+    Writes 'df' with the JSON 'metadata' to the parquet file at 'path'
+
+    The file is written to a temporary path first and moved into place,
+    so concurrently starting workers never read a partial file.
+    """
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {
+            **(table.schema.metadata or {}),
+            METADATA_KEY: json.dumps(metadata).encode(),
+        }
+    )
+
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+    except OSError as error:
+        logger.warning('Could not write %s: %s', path, error)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write(name, df):
+    """
+    Writes the cache of dataset 'name' next to its CSV
+    """
+    if not available():
+        return
+
+    source = _source_info(name)
+    source['sha256'] = source_hash(name)
+    source['schema'] = schema_token(name)
+    _write_table(cache_path(name), df, source)
+
+
+def derived_path(name, label):
+    """
+    Returns the path of the table 'label' derived from dataset 'name',
+    next to the cache of the dataset
+    """
+    return cache_path(name)[: -len('.parquet')] + f'.{label}.parquet'
+
+
+def read_derived(name, label, version):
+    """
+    Reads the table 'label' derived from dataset 'name' and the JSON
+    data stored with it
+
+    Returns the dataframe and the data or None if there is no such table
+    for the current CSV and schema of the dataset ('source_token') and
+    the 'version' of the code that derived it
+    """
+    path = derived_path(name, label)
+    if not available() or not os.path.exists(path):
+        return None
+    stored = _read_metadata(path)
+    if stored is None or (stored.get('source'), stored.get('version')) != (
+        source_token(name),
+        version,
+    ):
+        return None
+    return pd.read_parquet(path), stored['data']
+
+
+def write_derived(name, label, version, df, data):
+    """
+    Writes the table 'label' derived from dataset 'name' by the code of
+    'version' together with the JSON data 'data' next to the cache of
+    the dataset
+    """
+    if not available():
+        return
+    _write_table(
+        derived_path(name, label),
+        df,
+        {'source': source_token(name), 'version': version, 'data': data},
+    )
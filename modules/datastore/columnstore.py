@@ -0,0 +1,288 @@
+"""
+Memory-mapped column store shared by all worker processes.
+
+Numeric, boolean and date columns are saved as one '.npy' file per column.
+String columns are dictionary encoded: their integer codes are saved as
+'.npy' files and the sorted values as one lookup table per column name,
+which is shared by all datasets. Categorical columns keep their codes and
+the shared dictionary of the datastore. Both are opened as categoricals
+directly on top of the memory-mapped codes. Every worker opens the files
+with 'mmap', so the pages are shared through the OS page cache instead
+of being copied into the private memory of each worker.
+
+Enable it by setting F1_COLUMN_STORE=1. Workers only read the store, a
+missing or stale dataset is loaded from its cache or CSV instead. Build
+the store in a single process before starting the workers with:
+
+    python -m modules.datastore.columnstore
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from modules.datastore import cache, schema
+
+
+logger = logging.getLogger(__name__)
+
+STORE_PATH = schema.DATA_PATH + 'columns/'
+LABELS_PATH = STORE_PATH + 'labels/'
+
+ENABLED = os.environ.get('F1_COLUMN_STORE', '0') == '1'
+
+
+def enabled():
+    """
+    Returns True if datasets should be served from the column store
+    """
+    return ENABLED
+
+
+def _dataset_path(name):
+    return STORE_PATH + name + '/'
+
+
+def _file_name(column):
+    """
+    Returns a file name for 'column' (column names may contain '/')
+    """
+    return quote(column, safe='')
+
+
+def _write_atomic(path, write):
+    """
+    Calls 'write' with a temporary path and moves the result to 'path'
+    """
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _save_npy(path, array):
+    def write(tmp_path):
+        with open(tmp_path, 'wb') as file:
+            np.save(file, array)
+
+    _write_atomic(path, write)
+
+
+def _save_json(path, data):
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False)
+
+    _write_atomic(path, write)
+
+
+def _code_dtype(size):
+    """
+    Returns the signed integer dtype pandas uses for the codes of 'size'
+    categories (-1 is used for missing values), so categoricals are
+    opened on the codes without a copy
+    """
+    for dtype in ('int8', 'int16', 'int32'):
+        if size < np.iinfo(dtype).max:
+            return dtype
+    return 'int64'
+
+
+def _labels_token(labels):
+    """
+    Returns a token of the lookup table 'labels', recorded with the codes
+    written for it
+    """
+    data = json.dumps(labels, ensure_ascii=False).encode()
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def read_labels(column):
+    """
+    Returns the shared lookup table of string column 'column'
+    """
+    path = LABELS_PATH + _file_name(column) + '.json'
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def build_labels(frames):
+    """
+    Takes the dataframes of all datasets by name
+
+    Returns the lookup table of every string column: the sorted values of
+    the column over all datasets
+    """
+    values = {}
+    for df in frames.values():
+        for column in df.columns:
+            if df[column].dtype == object:
+                values.setdefault(column, set()).update(
+                    df[column].dropna().unique()
+                )
+    return {column: sorted(labels) for column, labels in values.items()}
+
+
+def encode(values, labels):
+    """
+    Dictionary encodes 'values' with the lookup table 'labels'
+
+    Returns the integer codes, -1 marks missing values
+    """
+    codes = pd.Index(labels).get_indexer(values)
+    return codes.astype(_code_dtype(len(labels)))
+
+
+def _manifest(name):
+    path = _dataset_path(name) + 'manifest.json'
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def is_fresh(name):
+    """
+    Returns True if the column store of dataset 'name' matches its CSV
+    and the lookup tables its codes were written for
+    """
+    manifest = _manifest(name)
+    if manifest is None or manifest['schema'] != cache.schema_token(name):
+        return False
+    for column in manifest['columns']:
+        if column['kind'] == 'codes' and column['labels'] != _labels_token(
+            read_labels(column['name'])
+        ):
+            return False
+    csv_path = schema.DATA_PATH + schema.DATASETS[name]['file']
+    stat = os.stat(csv_path)
+    if (
+        manifest['mtime_ns'] == stat.st_mtime_ns
+        and manifest['size'] == stat.st_size
+    ):
+        return True
+    return manifest['sha256'] == cache.source_hash(name)
+
+
+def write(name, df, labels):
+    """
+    Materialises all columns of dataset 'name' in the column store, the
+    string columns encoded with the lookup tables 'labels' (see
+    'build_labels')
+    """
+    path = _dataset_path(name)
+    os.makedirs(path, exist_ok=True)
+
+    columns = []
+    for column in df.columns:
+        values = df[column].to_numpy()
+        file_name = path + _file_name(column)
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            _save_npy(file_name + '.codes.npy', df[column].array.codes)
+            columns.append(
+                {
+                    'name': column,
+                    'kind': 'category',
+                    'categories': df[column].cat.categories.tolist(),
+                }
+            )
+        elif values.dtype == object:
+            _save_npy(
+                file_name + '.codes.npy', encode(values, labels[column])
+            )
+            columns.append(
+                {
+                    'name': column,
+                    'kind': 'codes',
+                    'labels': _labels_token(labels[column]),
+                }
+            )
+        else:
+            _save_npy(file_name + '.npy', values)
+            columns.append({'name': column, 'kind': 'values'})
+
+    csv_path = schema.DATA_PATH + schema.DATASETS[name]['file']
+    stat = os.stat(csv_path)
+    # The manifest is written last, it marks the store as complete
+    _save_json(
+        path + 'manifest.json',
+        {
+            'schema': cache.schema_token(name),
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': cache.source_hash(name),
+            'columns': columns,
+        },
+    )
+
+
+def read(name):
+    """
+    Opens dataset 'name' from the column store
+
+    Numeric columns and the codes of categorical and string columns are
+    read-only memory maps, string columns are opened as categoricals
+    with their shared lookup table.
+
+    Returns the dataframe or None if the store is missing or stale
+    """
+    if not is_fresh(name):
+        return None
+
+    path = _dataset_path(name)
+    data = {}
+    for column in _manifest(name)['columns']:
+        column_name = column['name']
+        file_name = path + _file_name(column_name)
+        if column['kind'] == 'values':
+            data[column_name] = np.load(file_name + '.npy', mmap_mode='r')
+        elif column['kind'] == 'category':
+            data[column_name] = pd.Categorical.from_codes(
+                np.load(file_name + '.codes.npy', mmap_mode='r'),
+                dtype=pd.CategoricalDtype(column['categories']),
+            )
+        else:
+            data[column_name] = pd.Categorical.from_codes(
+                np.load(file_name + '.codes.npy', mmap_mode='r'),
+                categories=pd.Index(read_labels(column_name), dtype=object),
+            )
+    return pd.DataFrame(data, copy=False)
+
+
+def build_all():
+    """
+    Builds or refreshes the column store of every dataset
+
+    Any stale dataset may change the shared lookup tables, so all of them
+    are written again. Run it in one process only, before the workers
+    start.
+    """
+    from modules.datastore import loader
+
+    if all(is_fresh(name) for name in schema.DATASETS):
+        logger.info('Column store is up to date')
+        return
+
+    frames = {
+        name: loader.apply_shared_categories(name, loader.read_csv(name))
+        for name in schema.DATASETS
+    }
+    labels = build_labels(frames)
+    os.makedirs(LABELS_PATH, exist_ok=True)
+    for column, column_labels in labels.items():
+        _save_json(LABELS_PATH + _file_name(column) + '.json', column_labels)
+    for name, df in frames.items():
+        write(name, df, labels)
+        logger.info('Built column store for %s', name)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    build_all()
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+
+def build_row_index(df, column):
+    """
+    Takes a dataframe and a column name
+
+    Orders the rows by 'column' (stable, so rows of one value keep their
+    order) and records where the rows of every value start and end in
+    that order. The dataframe itself is not copied.
+
+    Returns the index as a dict with the dataframe, the row order, the
+    values in order of their first appearance, their offsets in the row
+    order and their positions, and the values ordered by their amount of
+    rows together with these amounts
+    """
+    codes, keys = pd.factorize(df[column], sort=False)
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes[codes >= 0], minlength=len(keys))
+
+    # Rows with missing values are sorted to the front and skipped
+    offsets = np.empty(len(keys) + 1, dtype=np.int64)
+    offsets[0] = np.count_nonzero(codes < 0)
+    np.cumsum(counts, out=offsets[1:])
+    offsets[1:] += offsets[0]
+
+    keys = pd.Index(np.asarray(keys, dtype=object))
+
+    # Values with the most rows last, equal amounts in reverse order of
+    # their first appearance, so reading it backwards gives the order of
+    # 'race_counts' (see 'modules.driver_standings_mod')
+    by_count = np.argsort(-counts, kind='stable')[::-1]
+    return {
+        'column': column,
+        'frame': df,
+        'order': order,
+        'keys': keys,
+        'offsets': offsets,
+        'positions': {key: position for position, key in enumerate(keys)},
+        'keys_by_count': keys[by_count],
+        'sorted_counts': counts[by_count],
+    }
+
+
+def index_rows(index, key):
+    """
+    Returns the rows of 'key' in their original order without scanning
+    the dataframe (empty if 'key' does not occur)
+    """
+    position = index['positions'].get(key)
+    if position is None:
+        return index['frame'].iloc[0:0]
+    start, stop = index['offsets'][position : position + 2]
+    return index['frame'].take(index['order'][start:stop])
+
+
+def index_counts(index):
+    """
+    Returns the amount of rows for every value in order of first
+    appearance
+    """
+    return pd.Series(
+        np.diff(index['offsets']),
+        index=index['keys'],
+        name='count',
+    )
+
+
+def index_keys_with_count(index, number):
+    """
+    Returns the values with at least 'number' rows, most rows first, by
+    a binary search in the values ordered by their amount of rows
+    """
+    start = np.searchsorted(index['sorted_counts'], number, side='left')
+    return index['keys_by_count'][start:][::-1]
@@ -0,0 +1,256 @@
+import hashlib
+import logging
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.datastore import cache, columnstore, schema
+from modules.datastore.index import build_row_index
+from modules.startup_profile import span
+
+
+logger = logging.getLogger(__name__)
+
+# Parsed datasets, their load statistics and the shared dictionaries of
+# the categorical columns, filled once per process
+_frames = {}
+_stats = {}
+_categories = {}
+_indexes = {}
+_lock = threading.RLock()
+
+# Token of 'data_version', computed once and again after every load
+_version = None
+
+
+def read_csv(name, columns=None):
+    """
+    Parses the CSV of dataset 'name' with its explicit schema, optionally
+    only the given 'columns'
+
+    Returns the dataframe
+    """
+    spec = schema.DATASETS[name]
+    df = pd.read_csv(
+        schema.DATA_PATH + spec['file'],
+        **schema.read_csv_kwargs(name, columns),
+    )
+    return schema.apply_parsers(name, df)
+
+
+def shared_categories(column):
+    """
+    Returns the shared dictionary of categorical column 'column': the
+    sorted values of the column over all datasets
+    """
+    with _lock:
+        if column not in _categories:
+            values = set()
+            for name in schema.datasets_with_category(column):
+                df = cache.read(name, columns=[column])
+                if df is None:
+                    df = read_csv(name, columns=[column])
+                values.update(df[column].cat.categories)
+            _categories[column] = pd.Index(sorted(values), dtype=object)
+        return _categories[column]
+
+
+def apply_shared_categories(name, df):
+    """
+    Recodes the categorical columns of dataset 'name' with the shared
+    dictionaries
+
+    Returns the dataframe
+    """
+    for column in schema.category_columns(name):
+        categories = shared_categories(column)
+        if not df[column].cat.categories.equals(categories):
+            df[column] = df[column].cat.set_categories(categories)
+    return df
+
+
+def read_only(df):
+    """
+    Returns 'df' on read-only views of its arrays, without copying them
+
+    Changing values in place (e.g. with 'loc' or 'iloc') raises a
+    ValueError, adding, dropping or replacing whole columns still works
+    """
+    columns = {}
+    for column in df.columns:
+        values = df[column].array
+        if isinstance(values, pd.Categorical):
+            codes = values.codes.view()
+            codes.flags.writeable = False
+            columns[column] = pd.Categorical.from_codes(
+                codes, dtype=values.dtype, validate=False
+            )
+        else:
+            values = np.asarray(values).view()
+            values.flags.writeable = False
+            columns[column] = values
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def _read(name):
+    """
+    Reads dataset 'name' from the column store (if enabled), from its
+    binary cache or, if the cache is missing or stale, from the CSV and
+    rebuilds the cache
+
+    The column store is never written here, it is built by its own
+    command before the workers start (see 'columnstore').
+
+    Returns the dataframe and the source it was read from
+    """
+    if columnstore.enabled():
+        df = columnstore.read(name)
+        if df is not None:
+            return df, 'mmap'
+        logger.warning(
+            'Column store of %s is missing or stale, run '
+            "'python -m modules.datastore.columnstore'",
+            name,
+        )
+
+    return _read_file(name)
+
+
+def _read_file(name):
+    """
+    Reads dataset 'name' from its binary cache or, if the cache is missing
+    or stale, from the CSV and rebuilds the cache
+
+    Returns the dataframe and the source it was read from
+    """
+    df = cache.read(name)
+    if df is not None:
+        return df, 'cache'
+
+    df = read_csv(name)
+    cache.write(name, df)
+    return df, 'csv'
+
+
+def load(name):
+    """
+    Loads dataset 'name' if it has not been loaded in this process yet
+
+    Returns the shared dataframe, its values are read-only
+    """
+    global _version
+    if name not in schema.DATASETS:
+        raise KeyError(f'Unknown dataset: {name}')
+
+    with _lock:
+        if name not in _frames:
+            start = time.perf_counter()
+            with span(name, 'dataset') as record:
+                df, source = _read(name)
+                df = apply_shared_categories(name, df)
+                record['source'] = source
+            seconds = time.perf_counter() - start
+
+            _frames[name] = read_only(df)
+            _stats[name] = {
+                'dataset': name,
+                'file': schema.DATASETS[name]['file'],
+                'source': source,
+                'rows': len(df),
+                'columns': len(df.columns),
+                'load_seconds': seconds,
+                'memory_bytes': int(df.memory_usage(deep=True).sum()),
+                'version': cache.source_token(name),
+            }
+            _version = None
+            logger.info(
+                'Loaded %s from %s: %d rows in %.1f ms (%.2f MB)',
+                name,
+                source,
+                len(df),
+                seconds * 1000,
+                _stats[name]['memory_bytes'] / 2**20,
+            )
+    return _frames[name]
+
+
+def get(name):
+    """
+    Returns a shallow copy of dataset 'name'
+
+    The copy shares its read-only data with the loaded dataframe.
+    Adding, dropping or replacing whole columns only changes the copy,
+    changing values in place raises a ValueError and needs a '.copy()'
+    first.
+    """
+    return load(name).copy(deep=False)
+
+
+def row_index(name, column):
+    """
+    Returns the row index of dataset 'name' by 'column', built once per
+    process (see 'build_row_index')
+    """
+    with _lock:
+        if (name, column) not in _indexes:
+            df = load(name)
+            with span(f'{name}.{column}', 'index'):
+                _indexes[(name, column)] = build_row_index(df, column)
+        return _indexes[(name, column)]
+
+
+def data_version():
+    """
+    Returns a token of the datasets, which changes whenever one of them
+    is loaded from a changed CSV or schema. It depends on the content of
+    the CSVs only, so equal data gives the same token on every host.
+
+    Datasets not loaded yet count with the CSV and schema they would be
+    loaded from, so the token does not change when they are loaded. The
+    token is computed once and again after a dataset is loaded, a CSV
+    changed in between only changes it once it is loaded.
+    """
+    global _version
+    with _lock:
+        if _version is None:
+            versions = sorted(
+                (
+                    name,
+                    _stats[name]['version']
+                    if name in _stats
+                    else cache.source_token(name),
+                )
+                for name in schema.DATASETS
+            )
+            digest = hashlib.sha256(repr(versions).encode())
+            _version = digest.hexdigest()[:16]
+        return _version
+
+
+def load_all():
+    """
+    Loads every dataset of the schema
+    """
+    for name in schema.DATASETS:
+        load(name)
+
+
+def load_report():
+    """
+    Returns a dataframe with load time and memory usage of every
+    dataset loaded in this process
+    """
+    return pd.DataFrame(
+        [_stats[name] for name in schema.DATASETS if name in _stats],
+        columns=[
+            'dataset',
+            'file',
+            'source',
+            'rows',
+            'columns',
+            'load_seconds',
+            'memory_bytes',
+        ],
+    )
@@ -0,0 +1,68 @@
+import os
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+
+def _read_kb_fields(path, fields):
+    """
+    Reads the 'Name: value kB' lines of a /proc file
+
+    Returns a dict with the requested fields in bytes
+    """
+    values = {}
+    try:
+        with open(path) as file:
+            for line in file:
+                key, _, value = line.partition(':')
+                if key in fields:
+                    values[key] = int(value.split()[0]) * 1024
+    except OSError:
+        pass
+    return values
+
+
+def rss_report():
+    """
+    Returns the memory usage of this worker process in bytes
+
+    'rss' counts every resident page, 'pss' divides shared pages by the
+    number of processes mapping them. 'rss_file' holds file backed pages
+    (e.g. the memory-mapped column store) that are shared through the
+    page cache, 'rss_anon' the private heap of the worker.
+    On systems without /proc only the peak RSS is reported.
+    """
+    report = {'pid': os.getpid()}
+
+    status = _read_kb_fields(
+        '/proc/self/status', {'VmRSS', 'RssAnon', 'RssFile', 'RssShmem'}
+    )
+    rollup = _read_kb_fields(
+        '/proc/self/smaps_rollup',
+        {'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean',
+         'Private_Dirty'},
+    )
+    if status:
+        report.update(
+            rss=status.get('VmRSS'),
+            rss_anon=status.get('RssAnon'),
+            rss_file=status.get('RssFile'),
+            rss_shmem=status.get('RssShmem'),
+        )
+    if rollup:
+        report.update(
+            pss=rollup.get('Pss'),
+            shared=rollup.get('Shared_Clean', 0)
+            + rollup.get('Shared_Dirty', 0),
+            private=rollup.get('Private_Clean', 0)
+            + rollup.get('Private_Dirty', 0),
+        )
+
+    if resource is not None:
+        # ru_maxrss is reported in kilobytes on Linux
+        report['max_rss'] = (
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        )
+    return report
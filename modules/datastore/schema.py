@@ -0,0 +1,169 @@
+import modules.pitstop_mod as ptm
+
+
+DATA_PATH = 'data/'
+
+
+# Explicit column types for every CSV in the data directory.
+# Only the listed columns are loaded, everything else (e.g. the leftover
+# index columns in the weather CSV) is skipped while parsing.
+# 'category' columns share one dictionary per column name across all
+# datasets, so equal values have equal codes in every dataframe.
+DATASETS = {
+    'season_results': {
+        'file': 'f1_1994_2024_season_results.csv',
+        'dtype': {
+            'year': 'int16',
+            'round': 'int8',
+            'race_name': 'category',
+            'circuit_id': 'category',
+            'circuit_name': 'object',
+            'date': 'object',
+            'driver_id': 'object',
+            'driver_name': 'category',
+            'grid_position': 'int8',
+            'finish_position': 'int8',
+            'position_change': 'int8',
+            'status': 'category',
+        },
+    },
+    'season_results_weather': {
+        'file': 'f1_1994_2024_season_results_completed_weather.csv',
+        'dtype': {
+            'year': 'int16',
+            'round': 'int8',
+            'race_name': 'category',
+            'circuit_x': 'object',
+            'circuit_id': 'category',
+            'date': 'object',
+            'driver_id': 'object',
+            'driver_name': 'category',
+            'constructor': 'object',
+            'grid_position': 'int8',
+            'finish_position': 'int8',
+            'position_change': 'int8',
+            'status': 'category',
+            'points': 'float64',
+            'laps_completed': 'int16',
+            'circuit_y': 'object',
+            'condition': 'object',
+        },
+    },
+    'pitstops': {
+        'file': 'merged_pitstops.csv',
+        'dtype': {
+            'year': 'int16',
+            'round': 'int8',
+            'driver_id': 'object',
+            'stop': 'int8',
+            'lap': 'int16',
+            'duration': 'object',
+            'race_name': 'category',
+            'circuit_id': 'category',
+            'driver_name': 'category',
+            'grid_position': 'int8',
+            'finish_position': 'int8',
+            'position_change': 'int8',
+            'status': 'category',
+            'race_completed': 'bool',
+        },
+        # Durations come as seconds or as MM:SS.sss and are stored as
+        # float seconds (NaN for invalid values)
+        'parsers': {
+            'duration': ptm.parse_durations,
+        },
+    },
+    'race_status': {
+        'file': 'f1_1994_2024_categorized_by_race_status.csv',
+        'dtype': {
+            'year': 'int16',
+            'round': 'int8',
+            'race_name': 'category',
+            'circuit_id': 'category',
+            'circuit_name': 'object',
+            'Other': 'int32',
+            'Race Incident/Crash': 'int32',
+            'Race Status': 'int32',
+            'Technical Failure': 'int32',
+            'Total': 'int32',
+            'Total_Retirements': 'int32',
+        },
+        'parse_dates': ['date'],
+    },
+    'crashes_weather': {
+        'file': 'crashes_and_weather.csv',
+        'dtype': {
+            'Condition': 'object',
+            'incidents': 'int32',
+            'technical': 'int32',
+            'completed': 'int32',
+            'other': 'int32',
+            'total': 'int32',
+            'incidents_ratio': 'float64',
+            'technical_ratio': 'float64',
+            'completed_ratio': 'float64',
+        },
+    },
+}
+
+
+def column_names(name):
+    """
+    Returns the list of all columns that are loaded for dataset 'name'
+    """
+    spec = DATASETS[name]
+    return list(spec['dtype']) + list(spec.get('parse_dates', []))
+
+
+def category_columns(name):
+    """
+    Returns the columns of dataset 'name' that are stored as categoricals
+    """
+    return [
+        column
+        for column, dtype in DATASETS[name]['dtype'].items()
+        if dtype == 'category'
+    ]
+
+
+def datasets_with_category(column):
+    """
+    Returns the datasets that store 'column' as categorical
+    """
+    return [name for name in DATASETS if column in category_columns(name)]
+
+
+def read_csv_kwargs(name, columns=None):
+    """
+    Returns the keyword arguments for 'pd.read_csv' of dataset 'name',
+    optionally restricted to 'columns'
+    """
+    spec = DATASETS[name]
+    usecols = columns or column_names(name)
+    kwargs = {
+        'usecols': usecols,
+        'dtype': {
+            column: dtype
+            for column, dtype in spec['dtype'].items()
+            if column in usecols
+        },
+    }
+    parse_dates = [
+        column for column in spec.get('parse_dates', []) if column in usecols
+    ]
+    if parse_dates:
+        kwargs['parse_dates'] = parse_dates
+    return kwargs
+
+
+def apply_parsers(name, df):
+    """
+    Converts the raw columns of dataset 'name' with the vectorized
+    parsers of its schema
+
+    Returns the converted dataframe
+    """
+    for column, parser in DATASETS[name].get('parsers', {}).items():
+        if column in df.columns:
+            df[column] = parser(df[column])
+    return df
@@ -1,29 +1,83 @@
+import numpy as np
 import pandas as pd
 
+from modules.datastore.index import (
+    index_counts,
+    index_keys_with_count,
+    index_rows,
+)
 
-def driver_list(number, df):
+
+def race_counts(series):
+    """
+    Returns the amount of rows for each value of 'series' in descending
+    order. Only values that occur are counted (also for categoricals) and
+    values with equal counts keep the order of their first appearance.
+    """
+    counts = series.value_counts(sort=False)
+    counts = counts.reindex(series.dropna().unique())
+    return counts.sort_values(ascending=False, kind='stable')
+
+
+def driver_list(number, df, index=None):
     """
-    Returns list of drivers with 'number' amount of races
+    Returns list of drivers with 'number' amount of races,
+    'index' is an optional row index of 'df' by driver name
     """
-    counts = df['driver_name'].value_counts()
+    if index is not None:
+        return index_keys_with_count(index, number).tolist()
+    counts = race_counts(df['driver_name'])
     list = counts[counts >= number].index.tolist()
     return list
 
 
-def circuit_list(number, df):
+def circuit_counts(df, index=None):
+    """
+    Returns the amount of rows of every circuit in descending order,
+    'index' is an optional row index of 'df' by circuit id
+    """
+    if index is None:
+        return race_counts(df['circuit_id'])
+    return index_counts(index).sort_values(ascending=False, kind='stable')
+
+
+def circuit_list(number, df, index=None):
     """
     Returns list of circuits with 'number' amount of races"
+    'index' is an optional row index of 'df' by circuit id
     """
-    counts = df['circuit_id'].value_counts()
+    if index is not None:
+        return index_keys_with_count(index, number).tolist()
+    counts = circuit_counts(df, index)
     list = counts[counts >= number].index.tolist()
     return list
 
 
-def driver_grid_pos(name, df):
+def driver_rows(name, df, index=None):
+    """
+    Returns all rows of the choosen driver, taken from the row index
+    'index' of 'df' by driver name if given
+    """
+    if index is None:
+        return df[df['driver_name'] == name]
+    return index_rows(index, name)
+
+
+def circuit_rows(circuit, df, index=None):
+    """
+    Returns all rows of the choosen circuit, taken from the row index
+    'index' of 'df' by circuit id if given
+    """
+    if index is None:
+        return df[df['circuit_id'] == circuit]
+    return index_rows(index, circuit)
+
+
+def driver_grid_pos(name, df, index=None):
     """
     Returns dataframe of choosen driver with all their grid position"
     """
-    df_filtered = df[df['driver_name'] == name]
+    df_filtered = driver_rows(name, df, index)
     grid_position_count = (
         df_filtered['grid_position'].value_counts().reset_index()
     )
@@ -31,11 +85,11 @@ def driver_grid_pos(name, df):
     return grid_position_count
 
 
-def driver_finish_pos(name, df):
+def driver_finish_pos(name, df, index=None):
     """
     Return dataframe of driver with all their finish posistion"
     """
-    df_filtered = df[df['driver_name'] == name]
+    df_filtered = driver_rows(name, df, index)
     finish_position_count = (
         df_filtered['finish_position'].value_counts().reset_index()
     )
@@ -43,18 +97,324 @@ def driver_finish_pos(name, df):
     return finish_position_count
 
 
+# Columns that identify a race in the season results
+RACE_KEYS = ['year', 'round']
+
+
+def filter_races(df, years=None, circuit=None, conditions=None, weather=None):
+    """
+    Returns the rows of 'df' in the seasons 'years' (first and last
+    season as a tuple), on the circuit id 'circuit' and in the weather
+    'conditions', where filters that are None are not applied.
+    Without a condition column in 'df' the conditions of its races are
+    taken from the frame 'weather' by 'RACE_KEYS'
+    """
+    mask = np.ones(len(df), dtype=bool)
+    if years is not None:
+        first, last = years
+        mask &= df['year'].between(first, last).to_numpy()
+    if circuit is not None:
+        mask &= (df['circuit_id'] == circuit).to_numpy()
+    if conditions is not None:
+        if 'condition' in df:
+            mask &= df['condition'].isin(conditions).to_numpy()
+        elif weather is not None:
+            races = weather.loc[
+                weather['condition'].isin(conditions), RACE_KEYS
+            ]
+            mask &= pd.MultiIndex.from_frame(df[RACE_KEYS]).isin(
+                pd.MultiIndex.from_frame(races)
+            )
+        else:
+            raise ValueError('condition filters need a weather frame')
+    return df[mask]
+
+
+def grid_placements(df, max=23, **filters):
+    """
+    Returns the average finishing position and the amount of races for
+    every starting position below 'max' that occurs in 'df', the
+    keyword arguments are filters of 'filter_races'
+    """
+    if filters:
+        df = filter_races(df, **filters)
+    grid = df['grid_position']
+    df = df[grid.ge(1) & grid.lt(max) & df['finish_position'].notna()]
+
+    placements = df.groupby('grid_position')['finish_position'].agg(
+        races='size', finish_sum='sum'
+    )
+    return pd.DataFrame(
+        {
+            'grid_position': placements.index.to_numpy(dtype=np.float64),
+            'avg_placement': (
+                placements['finish_sum'] / placements['races']
+            ).to_numpy(),
+            'races': placements['races'].to_numpy(),
+        }
+    )
+
+
+def start_avg_placements(df, df_race_completed, max=23, **filters):
+    """
+    Returns the curves of 'grid_placements' for all races in 'df' and
+    for the completed races in 'df_race_completed' with the same filters,
+    the races of 'df' take their weather condition from
+    'df_race_completed'
+    """
+    if filters.get('conditions') is not None:
+        filters = dict(filters, weather=df_race_completed)
+    return (
+        grid_placements(df, max, **filters),
+        grid_placements(df_race_completed, max, **filters),
+    )
+
+
+def driver_careers(df, df_race_completed):
+    """
+    Takes the dataframe with all races and the dataframe where only the
+    completed races are in
+
+    Returns the amount of races and the average finishing position over
+    all races and over the completed races of every driver, indexed by
+    driver name with the most races first
+    """
+    careers = df.groupby('driver_name', observed=True, sort=False)[
+        'finish_position'
+    ].agg(races='size', finish_sum='sum')
+    completed = df_race_completed.groupby(
+        'driver_name', observed=True, sort=False
+    )['finish_position'].agg(races='size', finish_sum='sum')
+
+    careers.index = careers.index.astype(object)
+    completed.index = completed.index.astype(object)
+    completed = completed.reindex(careers.index)
+
+    careers = pd.DataFrame(
+        {
+            'races': careers['races'],
+            'avg_finish': careers['finish_sum'] / careers['races'],
+            'completed_races': completed['races'].fillna(0).astype(np.int64),
+            'avg_finish_completed': (
+                completed['finish_sum'] / completed['races']
+            ),
+        }
+    )
+    # Same order as 'race_counts', drivers with equal races included
+    order = careers['races'].sort_values(ascending=False, kind='stable').index
+    return careers.loc[order]
+
+
+# Weather conditions of the placements table and the conditions they cover
+CONDITIONS = {
+    'Dry': ['Dry'],
+    'Wet': ['Wet'],
+    'Mixed': ['Mixed'],
+    'Wet/Mixed': ['Mixed', 'Wet'],
+}
+
+
+def condition_placements(df):
+    """
+    Takes the dataframe with the weather condition of each race
+
+    Returns the amount of races and the average starting and finishing
+    position of every driver in each condition of 'CONDITIONS' in one
+    table, drivers of a condition in order of their first race in it
+    """
+    df_rows = df[
+        ['driver_name', 'condition', 'grid_position', 'finish_position']
+    ].assign(row=np.arange(len(df)))
+    per_condition = df_rows.groupby(
+        ['driver_name', 'condition'], observed=True, sort=False
+    ).agg(
+        races=('row', 'size'),
+        first_row=('row', 'min'),
+        grid_sum=('grid_position', 'sum'),
+        finish_sum=('finish_position', 'sum'),
+    )
+    per_condition = per_condition.reset_index()
+
+    tables = []
+    for condition, covered in CONDITIONS.items():
+        table = per_condition[per_condition['condition'].isin(covered)]
+        if len(covered) > 1:
+            table = table.groupby(
+                'driver_name', observed=True, sort=False
+            ).agg(
+                races=('races', 'sum'),
+                first_row=('first_row', 'min'),
+                grid_sum=('grid_sum', 'sum'),
+                finish_sum=('finish_sum', 'sum'),
+            )
+            table = table.reset_index()
+        table = table.sort_values('first_row', kind='stable')
+        tables.append(table.assign(condition=condition))
+
+    placements = pd.concat(tables, ignore_index=True)
+    placements['avg_start'] = placements['grid_sum'] / placements['races']
+    placements['avg_finish'] = placements['finish_sum'] / placements['races']
+    return placements[
+        ['driver_name', 'condition', 'races', 'avg_start', 'avg_finish']
+    ]
+
+
+def condition_driver_list(number, placements, condition):
+    """
+    Returns list of drivers with at least 'number' races in 'condition'
+    from the table of 'condition_placements', most races first
+    """
+    rows = placements[placements['condition'] == condition]
+    counts = rows.set_index('driver_name')['races'].sort_values(
+        ascending=False
+    )
+    list = counts[counts >= number].index.tolist()
+    return list
+
+
+def condition_averages(placements, condition, drivers):
+    """
+    Returns the average starting and finishing position in 'condition'
+    of the choosen drivers that raced in it, in the order of 'drivers'
+    """
+    rows = placements[placements['condition'] == condition]
+    rows = rows.set_index(rows['driver_name'].astype(object))
+    drivers = [driver for driver in drivers if driver in rows.index]
+    return rows.loc[drivers, ['avg_start', 'avg_finish']]
+
+
+def count_standings(df, max):
+    """
+    Counts grid and finish positions in one pass over 'df',
+    where 'max' is the choosen amount of race position
+
+    Returns the standings in the long format of 'get_all_standings'
+    and the dense count matrix, where row 'grid - 1' and column
+    'finish - 1' holds the races started on 'grid' and finished on 'finish'.
+    Rows without a grid or finish position of at least 1 are not counted.
+    """
+    if max <= 1:
+        return pd.DataFrame(), np.zeros((0, 0), dtype=np.int64)
+
+    # Positions start at 1, other rows (e.g. pit lane starts) are skipped
+    grid = df['grid_position'].to_numpy()
+    finish = df['finish_position'].to_numpy()
+    rows = np.flatnonzero(
+        (grid >= 1) & (grid < max) & pd.notna(finish) & (finish >= 1)
+    )
+    grid = grid[rows].astype(np.int64)
+    finish = finish[rows].astype(np.int64)
+
+    width = int(finish.max()) if len(finish) else 0
+    pairs = (grid - 1) * width + finish - 1
+    matrix = np.bincount(pairs, minlength=(max - 1) * width)
+    matrix = matrix.reshape(max - 1, width)
+
+    # Rows ordered by grid position, then by count descending, equal
+    # counts in order of the first appearance of the finish position
+    keys, first = np.unique(pairs, return_index=True)
+    counts = matrix.ravel()[keys]
+    order = np.lexsort((first, -counts, keys // (width or 1)))
+    keys = keys[order]
+    grid_position, finish_position = np.divmod(keys, width or 1)
+
+    df_all_standings_count = pd.DataFrame(
+        {
+            'grid_position': grid_position + 1,
+            'finish_position': (finish_position + 1).astype(
+                df['finish_position'].dtype
+            ),
+            'count': counts[order],
+        }
+    )
+    return df_all_standings_count, matrix
+
+
 def get_all_standings(df, max):
     """
     Returns all time grid and finish driver standings,
     where 'max' is the choosen amount of race position
     """
-    df_all_standings_count = pd.DataFrame()
-    for grid_pos in range(1, max):
-        df_filtered = df[df['grid_position'] == grid_pos]
-        df_temp = df_filtered['finish_position'].value_counts().reset_index()
-        df_temp['grid_position'] = grid_pos
-        df_temp = df_temp[['grid_position', 'finish_position', 'count']]
-        df_all_standings_count = pd.concat(
-            [df_all_standings_count, df_temp], ignore_index=True
+    return count_standings(df, max)[0]
+
+
+def circuit_standings_tensor(df, max=23, by_year=False):
+    """
+    Counts grid and finish positions of every circuit in one pass,
+    where 'max' is the choosen amount of race position
+
+    Returns the counts as a dict with the circuit ids, their positions
+    and the tensor, where [circuit, grid - 1, finish - 1] holds the races
+    on the circuit started on 'grid' and finished on 'finish'.
+    With 'by_year' the tensor has a second axis with the cumulative counts
+    up to each season, so a season range is the difference of two slices
+    """
+    size = max - 1 if max > 1 else 0
+    circuit_codes, circuits = pd.factorize(df['circuit_id'], sort=False)
+    grid = df['grid_position'].to_numpy()
+    finish = df['finish_position'].to_numpy()
+    rows = np.flatnonzero(
+        (circuit_codes >= 0)
+        & (grid >= 1)
+        & (grid < max)
+        & (finish >= 1)
+        & (finish < max)
+    )
+    keys = (
+        circuit_codes[rows].astype(np.int64) * size
+        + grid[rows].astype(np.int64)
+        - 1
+    ) * size + finish[rows].astype(np.int64) - 1
+
+    if by_year:
+        years, year_codes = np.unique(
+            df['year'].to_numpy()[rows], return_inverse=True
         )
-    return df_all_standings_count
+        keys = keys + year_codes * (len(circuits) * size * size)
+        shape = (len(years), len(circuits), size, size)
+        counts = np.bincount(keys, minlength=np.prod(shape)).reshape(shape)
+        # Season axis after the circuit axis with a leading zero slice
+        counts = np.cumsum(counts, axis=0).transpose(1, 0, 2, 3)
+        counts = np.concatenate(
+            [np.zeros((len(circuits), 1, size, size), counts.dtype), counts],
+            axis=1,
+        )
+    else:
+        years = None
+        shape = (len(circuits), size, size)
+        counts = np.bincount(keys, minlength=np.prod(shape)).reshape(shape)
+
+    circuits = pd.Index(np.asarray(circuits, dtype=object))
+    return {
+        'circuits': circuits,
+        'positions': {circuit: pos for pos, circuit in enumerate(circuits)},
+        'years': years,
+        'counts': counts,
+    }
+
+
+def circuit_standings(tensor, circuit, years=None):
+    """
+    Takes the tensor of 'circuit_standings_tensor', a circuit id and
+    optionally the first and last season as a tuple (needs 'by_year')
+
+    Returns the grid by finish count matrix of the circuit
+    """
+    counts = tensor['counts']
+    position = tensor['positions'].get(circuit)
+    if position is None:
+        return np.zeros(counts.shape[-2:], dtype=counts.dtype)
+    if tensor['years'] is None:
+        if years is not None:
+            raise ValueError('season ranges need a tensor built by_year')
+        return counts[position]
+
+    counts = counts[position]
+    if years is None:
+        return counts[-1]
+    first, last = years
+    start = np.searchsorted(tensor['years'], first, side='left')
+    stop = np.searchsorted(tensor['years'], last, side='right')
+    if stop < start:
+        stop = start
+    return counts[stop] - counts[start]
@@ -1,4 +1,7 @@
+import os
+
 import plotly.graph_objects as go
+import numpy as np
 import pandas as pd
 
 from dash import dcc, html
@@ -6,6 +9,31 @@ from dash import dcc, html
 import modules.driver_standings_mod as ds
 
 
+# Build the figures of every races slider step at startup
+PREBUILD_FIGURES = os.environ.get('F1_PREBUILD_FIGURES', '0') == '1'
+
+# Values of the races slider
+RACES_SLIDER_STEPS = range(0, 401, 10)
+
+# Values of the circuit heatmap slider, in steps of 20 races
+CIRCUIT_SLIDER_STEPS = range(1, 31)
+
+# Set F1_CLIENTSIDE_HEATMAP=0 to build the circuit heatmap on the server
+# instead of in the browser (see 'assets/circuit_heatmap.js')
+CLIENTSIDE_HEATMAP = os.environ.get('F1_CLIENTSIDE_HEATMAP', '1') != '0'
+
+# Circuit of the heatmap if the selected one is not in the dropdown
+DEFAULT_CIRCUIT = 'nurburgring'
+
+# Initial driver of the driver dropdown and value of the races slider
+DEFAULT_DRIVER = 'Michael Schumacher'
+DEFAULT_RACES = 130
+
+CIRCUIT_HEATMAP_TITLE = (
+    'Relation between Starting and Finishing Position for {circuit}'
+)
+
+
 # Modified by ChatGPT
 def create_figure_all_time_standings(df):
     """
@@ -73,32 +101,7 @@ def create_fig_start_avg_placements(df, df_race_completed):
 
     Returns the scatterplot as a plotly figure object
     """
-    # Calculation of mean for races that were completed
-    standings = ds.get_all_standings(df_race_completed, 23)
-    standings['Produkt'] = standings.prod(axis=1)
-
-    df_final = pd.DataFrame({'grid_position': [], 'avg_placement': []})
-
-    for pos in range(1, 28):
-        temp = standings[standings['grid_position'] == pos]
-        sum_pro = temp['Produkt'].sum() / pos
-        sum_count = temp['count'].sum()
-        if sum_count != 0:
-            mittelwert = sum_pro / sum_count
-            df_final.loc[len(df_final)] = [pos, mittelwert]
-
-    # Calculation of mean for all races
-    df_all_races = ds.get_all_standings(df, 23)
-    df_all_races['Produkt'] = df_all_races.prod(axis=1)
-    df_final_all = pd.DataFrame({'grid_position': [], 'avg_placement': []})
-
-    for pos in range(1, 28):
-        temp = df_all_races[df_all_races['grid_position'] == pos]
-        sum_pro = temp['Produkt'].sum() / pos
-        sum_count = temp['count'].sum()
-        if sum_count != 0:
-            mittelwert = sum_pro / sum_count
-            df_final_all.loc[len(df_final_all)] = [pos, mittelwert]
+    df_final_all, df_final = ds.start_avg_placements(df, df_race_completed)
 
     fig = go.Figure()
 
@@ -150,9 +153,22 @@ def create_fig_start_avg_placements(df, df_race_completed):
 
 
 # Modified by ChatGPT
-def get_circuit_options(number, df):
+def get_driver_options(number, df, index=None):
+    """
+    Takes a dataframe, the number choosen in the slider and optionally a
+    row index of the dataframe by driver name
+
+    Returns the dropdown options of the drivers with at least the
+    choosen amount of races in alphabetical order
     """
-    Takes a dataframe and number which was choosen in the slider
+    drivers = sorted(ds.driver_list(number, df, index))
+    return [{'label': driver, 'value': driver} for driver in drivers]
+
+
+def get_circuit_options(number, df, index=None):
+    """
+    Takes a dataframe, number which was choosen in the slider and
+    optionally a row index of the dataframe by circuit id
 
     Filters all circuits that have been driven with choosen amount
     of races
@@ -160,7 +176,7 @@ def get_circuit_options(number, df):
     Returns the list of circuits which was droven at least
     choosen amount of times
     """
-    circuit_list = ds.circuit_list(number=number, df=df)
+    circuit_list = ds.circuit_list(number=number, df=df, index=index)
     circuit_list = sorted(circuit_list)
     return [
         {'label': circuit.capitalize(), 'value': circuit}
@@ -169,10 +185,15 @@ def get_circuit_options(number, df):
 
 
 # Modified by ChatGPT
-def create_circuit_heatmap(slider_value, selected_circuit, df):
+def create_circuit_heatmap(
+    slider_value, selected_circuit, df, index=None, tensor=None, options=None
+):
     """
     Takes a dataframe, the list of circuits created in
-    'get_circuit_options' and the circuit name from the slider
+    'get_circuit_options', the circuit name from the slider and
+    optionally a row index of the dataframe by circuit id, the circuit
+    standings tensor of the dataframe and the circuit options of
+    'get_circuit_options' by slider value
 
     Creates a heatmap from the circuit with each starting and
     finish position
@@ -181,22 +202,51 @@ def create_circuit_heatmap(slider_value, selected_circuit, df):
     """
     number = slider_value * 20
 
-    circuit_options = get_circuit_options(number, df)
+    if options is not None and slider_value in options:
+        circuit_options = options[slider_value]
+    else:
+        circuit_options = get_circuit_options(number, df, index)
 
     if selected_circuit is None or selected_circuit not in [
         option['value'] for option in circuit_options
     ]:
-        selected_circuit = 'nurburgring'
+        selected_circuit = DEFAULT_CIRCUIT
+
+    if tensor is None:
+        circuit = ds.circuit_rows(selected_circuit, df, index)
+        tensor = ds.circuit_standings_tensor(circuit, 23)
+    counts = ds.circuit_standings(tensor, selected_circuit)
+
+    # Only starting and finishing positions that occured, others are empty
+    grid = np.flatnonzero(counts.any(axis=1))
+    finish = np.flatnonzero(counts.any(axis=0))
+    counts = counts[np.ix_(grid, finish)].T
+    if (counts == 0).any():
+        counts = np.where(counts == 0, np.nan, counts)
+    heatmap_data = pd.DataFrame(
+        counts,
+        index=pd.Index(
+            (finish + 1).astype(df['finish_position'].dtype),
+            name='finish_position',
+        ),
+        columns=pd.Index(grid + 1, name='grid_position'),
+    )
 
-    circuit = df[df['circuit_id'] == selected_circuit]
+    return (
+        circuit_options,
+        selected_circuit,
+        circuit_heatmap_figure(heatmap_data, selected_circuit),
+    )
 
-    a = ds.get_all_standings(circuit, 23)
-    a = a[a['finish_position'] <= 22]
 
-    heatmap_data = a.pivot(
-        index='finish_position', columns='grid_position', values='count'
-    )
+def circuit_heatmap_figure(heatmap_data, selected_circuit):
+    """
+    Takes the counts of a circuit as a dataframe with the finish
+    positions as index and the starting positions as columns, and the
+    circuit id
 
+    Returns the circuit heatmap as a plotly figure object
+    """
     # Convert zeros to a custom hover text
     hover_data = heatmap_data.values.copy().astype(object)
     hover_data[hover_data == 0] = 'N/A'
@@ -216,26 +266,64 @@ def create_circuit_heatmap(slider_value, selected_circuit, df):
 
     fig.update_layout(
         template='plotly_dark',
-        title=f'Relation between Starting and Finishing Position '
-        f'for {selected_circuit.capitalize()}',
+        title=CIRCUIT_HEATMAP_TITLE.format(
+            circuit=selected_circuit.capitalize()
+        ),
         height=600,
         xaxis=dict(
             tickmode='array',
-            tickvals=a['grid_position'].unique(),
+            tickvals=heatmap_data.columns.to_numpy(),
             showgrid=False,
             title='Starting Position',
             linecolor='white',
         ),
         yaxis=dict(
             tickmode='array',
-            tickvals=a['finish_position'].unique(),
+            tickvals=heatmap_data.index.to_numpy(),
             showgrid=False,
             title='Finishing Position',
             linecolor='white',
         ),
     )
 
-    return circuit_options, selected_circuit, fig
+    return fig
+
+
+def circuit_heatmap_store_data(tensor, df, index=None):
+    """
+    Takes the circuit standings tensor of a dataframe, the dataframe and
+    optionally its row index by circuit id
+
+    Returns the data the circuit heatmap is built from in the browser
+    (see 'assets/circuit_heatmap.js'): the circuits with their amount of
+    rows and their flat grid by finish count matrices, and the figure
+    without data
+    """
+    counts = ds.circuit_counts(df, index)
+    figure = circuit_heatmap_figure(
+        pd.DataFrame(
+            index=pd.Index([], name='finish_position'),
+            columns=pd.Index([], name='grid_position'),
+        ),
+        '',
+    ).to_dict()
+    for key in ['z', 'x', 'y', 'text', 'hovertext']:
+        del figure['data'][0][key]
+    del figure['layout']['title']
+    for axis in ['xaxis', 'yaxis']:
+        del figure['layout'][axis]['tickvals']
+    return {
+        'circuits': counts.index.tolist(),
+        'rows': counts.tolist(),
+        'matrices': [
+            ds.circuit_standings(tensor, circuit).ravel().tolist()
+            for circuit in counts.index
+        ],
+        'size': tensor['counts'].shape[-1],
+        'default': DEFAULT_CIRCUIT,
+        'title': CIRCUIT_HEATMAP_TITLE,
+        'figure': figure,
+    }
 
 
 # Modified by ChatGPT
@@ -260,7 +348,7 @@ def create_circuit_heatmap_layout():
                             max=30,
                             step=1,
                             value=15,
-                            marks={i: str(i) for i in range(1, 31)},
+                            marks={i: str(i) for i in CIRCUIT_SLIDER_STEPS},
                         ),
                     ],
                     style={'textAlign': 'center', 'margin': '20px'},
@@ -298,141 +386,71 @@ def create_circuit_heatmap_layout():
 
 
 # Modified by ChatGPT
-def driver_standings_mw(df):
+def driver_standings_mw(df, min_races=20, placements=None):
     """
-    Takes a dataframe
+    Takes a dataframe, the minimum amount of races in mixed/wet condition
+    and optionally the table of 'condition_placements' of the dataframe
 
     Creates a bar chart for the avg placement of drivers
     during wet and mixed condition.
 
     Returns the bar chart as a plotly figure object
     """
-    df_weather_filtered_mw = df[df['condition'].isin(['Mixed', 'Wet'])]
+    if placements is None:
+        placements = ds.condition_placements(df)
 
-    liste_mw = ds.driver_list(20, df_weather_filtered_mw)
+    liste_mw = ds.condition_driver_list(min_races, placements, 'Wet/Mixed')
+    averages = ds.condition_averages(placements, 'Wet/Mixed', liste_mw)
 
-    df_avg_placements_start_mw = pd.DataFrame(
-        {'driver_name': [], 'avg_placement': []}
+    return create_condition_figure(
+        averages,
+        f'Average placements of drivers with at least {min_races} races '
+        'driven in mixed/wet conditions since 2005',
     )
 
-    for name in liste_mw:
-        finish_mw = ds.driver_grid_pos(name, df_weather_filtered_mw)
-        finish_mw['Produkt'] = finish_mw.prod(axis=1)
-        if finish_mw['count_grid'].sum() != 0:
-            mittelwert = (
-                finish_mw['Produkt'].sum() / finish_mw['count_grid'].sum()
-            )
-            df_avg_placements_start_mw.loc[len(df_avg_placements_start_mw)] = [
-                name,
-                mittelwert,
-            ]
-
-    df_avg_placements_start_mw = df_avg_placements_start_mw.sort_values(
-        by='avg_placement', ascending=True
-    )
 
-    df_avg_placements_finish_mw = pd.DataFrame(
-        {'driver_name': [], 'avg_placement': []}
-    )
+# Modified by ChatGPT
+def driver_standings_dry(df, min_races=20, placements=None):
+    """
+    Takes a dataframe, the minimum amount of races in mixed/wet condition
+    and optionally the table of 'condition_placements' of the dataframe
 
-    for name in liste_mw:
-        finish_mw = ds.driver_finish_pos(name, df_weather_filtered_mw)
-        finish_mw['Produkt'] = finish_mw.prod(axis=1)
-        if finish_mw['count_finish'].sum() != 0:
-            mittelwert = (
-                finish_mw['Produkt'].sum() / finish_mw['count_finish'].sum()
-            )
-            df_avg_placements_finish_mw.loc[
-                len(df_avg_placements_finish_mw)
-            ] = [name, mittelwert]
-
-    df_avg_placements_finish_mw = df_avg_placements_finish_mw.sort_values(
-        by='avg_placement', ascending=True
-    )
+    Creates a bar chart for the avg placement of drivers
+    during dry condition.
 
-    fig = go.Figure()
-    fig.add_trace(
-        go.Bar(
-            x=df_avg_placements_start_mw['driver_name'],
-            y=df_avg_placements_start_mw['avg_placement'],
-            name='start',
-            hovertemplate='Average starting position: %{y:.2f}<extra></extra>',
-        )
-    )
+    Returns the bar chart as a plotly figure object
+    """
+    if placements is None:
+        placements = ds.condition_placements(df)
 
-    fig.add_trace(
-        go.Bar(
-            x=df_avg_placements_finish_mw['driver_name'],
-            y=df_avg_placements_finish_mw['avg_placement'],
-            name='finish',
-            hovertemplate='Average finishing position: %{y:.2f}<extra></extra>',
-        )
-    )
+    liste = ds.condition_driver_list(min_races, placements, 'Wet/Mixed')
+    averages = ds.condition_averages(placements, 'Dry', liste)
 
-    fig.update_layout(
-        template='plotly_dark',
-        height=450,
-        autosize=True,
-        xaxis_title='Driver',
-        yaxis_title='Position',
-        title='Average placements of drivers with at least 20 races driven in '
-        'mixed/wet conditions since 2005',
-        xaxis=dict(showgrid=False),
-        yaxis=dict(showgrid=False),
+    return create_condition_figure(
+        averages,
+        f'Average placements of drivers with at least {min_races} races '
+        'driven in dry conditions since 2005',
     )
-    return fig
 
 
-# Modified by ChatGPT
-def driver_standings_dry(df):
+def create_condition_figure(averages, title):
     """
-    Takes a dataframe
+    Takes the average starting and finishing positions of the drivers
+    from 'condition_averages' and the title
 
-    Creates a bar chart for the avg placement of drivers
-    during dry condition.
+    Creates a bar chart for the avg placement of the drivers
 
     Returns the bar chart as a plotly figure object
     """
-    df_weather_filtered = df[df['condition'].isin(['Dry'])]
-    df_same_list = df[df['condition'].isin(['Mixed', 'Wet'])]
-
-    liste = ds.driver_list(20, df_same_list)
+    drivers = averages.index.to_numpy(dtype=object)
 
     df_avg_placements_start = pd.DataFrame(
-        {'driver_name': [], 'avg_placement': []}
-    )
-
-    for name in liste:
-        finish = ds.driver_grid_pos(name, df_weather_filtered)
-        finish['Produkt'] = finish.prod(axis=1)
-        if finish['count_grid'].sum() != 0:
-            mittelwert = finish['Produkt'].sum() / finish['count_grid'].sum()
-            df_avg_placements_start.loc[len(df_avg_placements_start)] = [
-                name,
-                mittelwert,
-            ]
-
-    df_avg_placements_start = df_avg_placements_start.sort_values(
-        by='avg_placement', ascending=True
-    )
+        {'driver_name': drivers, 'avg_placement': averages['avg_start']}
+    ).sort_values(by='avg_placement', ascending=True)
 
     df_avg_placements_finish = pd.DataFrame(
-        {'driver_name': [], 'avg_placement': []}
-    )
-
-    for name in liste:
-        finish = ds.driver_finish_pos(name, df_weather_filtered)
-        finish['Produkt'] = finish.prod(axis=1)
-        if finish['count_finish'].sum() != 0:
-            mittelwert = finish['Produkt'].sum() / finish['count_finish'].sum()
-            df_avg_placements_finish.loc[len(df_avg_placements_finish)] = [
-                name,
-                mittelwert,
-            ]
-
-    df_avg_placements_finish = df_avg_placements_finish.sort_values(
-        by='avg_placement', ascending=True
-    )
+        {'driver_name': drivers, 'avg_placement': averages['avg_finish']}
+    ).sort_values(by='avg_placement', ascending=True)
 
     fig = go.Figure()
     fig.add_trace(
@@ -459,8 +477,7 @@ def driver_standings_dry(df):
         autosize=True,
         xaxis_title='Driver',
         yaxis_title='Position',
-        title='Average placements of drivers with at least 20 races driven in '
-        'dry conditions since 2005',
+        title=title,
         xaxis=dict(showgrid=False),
         yaxis=dict(showgrid=False),
     )
@@ -468,8 +485,10 @@ def driver_standings_dry(df):
 
 
 # Modified by ChatGPT
-def create_driver_conditions_layout():
+def create_driver_conditions_layout(figure):
     """
+    Takes the initially shown figure
+
     Creates the interactive layout for the dry and mixed/wet conditions graph
 
     Returns HTML layout for dry and Wet/Mixed button
@@ -490,6 +509,7 @@ def create_driver_conditions_layout():
             dcc.Store(id='last-clicked', data='dry-button'),
             dcc.Graph(
                 id='graph',
+                figure=figure,
                 style={'width': '100%'},
                 config={'responsive': True},
             ),
@@ -501,20 +521,21 @@ def create_driver_conditions_layout():
 
 
 # Modified by ChatGPT
-def create_grid_finish_figure(name, df):
+def create_grid_finish_figure(name, df, index=None):
     """
-    Takes a dataframe
+    Takes a dataframe and optionally a row index of the dataframe by
+    driver name
 
     Creates a bar chart of all the starting and finish position of
     the choosen driver.
 
     Returns the bar chart as a plotly figure object
     """
-    grid_counts = ds.driver_grid_pos(name, df)
+    grid_counts = ds.driver_grid_pos(name, df, index)
     grid_counts = grid_counts[grid_counts['grid_position'] != 0]
     grid_counts.columns = ['grid_position', 'count_grid']
 
-    finish_counts = ds.driver_finish_pos(name, df)
+    finish_counts = ds.driver_finish_pos(name, df, index)
     finish_counts.columns = ['grid_position', 'count_finish']
 
     fig = go.Figure()
@@ -556,8 +577,10 @@ def create_grid_finish_figure(name, df):
 
 
 # Modified by ChatGPT
-def create_grid_finish_figure_layout():
+def create_grid_finish_figure_layout(figure):
     """
+    Takes the figure of the initially selected driver
+
     Creates the interactive layout for a specific drivers start
     and finish position
 
@@ -578,7 +601,7 @@ def create_grid_finish_figure_layout():
                             max=400,
                             step=10,
                             value=130,
-                            marks={i: str(i) for i in range(0, 401, 10)},
+                            marks={i: str(i) for i in RACES_SLIDER_STEPS},
                             tooltip={
                                 'placement': 'bottom',
                                 'always_visible': True,
@@ -599,7 +622,7 @@ def create_grid_finish_figure_layout():
                         ),
                         dcc.Dropdown(
                             id='driver-dropdown',
-                            value='Michael Schumacher',
+                            value=DEFAULT_DRIVER,
                             style={
                                 'width': '50%',
                                 'margin': 'auto',
@@ -615,6 +638,7 @@ def create_grid_finish_figure_layout():
                 ),
                 dcc.Graph(
                     id='grid-finish-positions',
+                    figure=figure,
                     style={
                         'width': '100%',
                     },
@@ -628,46 +652,36 @@ def create_grid_finish_figure_layout():
 
 
 # Modified by ChatGPT
-def create_avg_all_drivers_figure(amount_of_races, df, df_race_completed):
+def create_avg_all_drivers_figure(
+    amount_of_races, df, df_race_completed, careers=None
+):
     """
     Takes the completed dataframe, the dataframe where only the
-    completed races are in and a number with at least this amount of races
-    driven
+    completed races are in, a number with at least this amount of races
+    driven and optionally the table of 'driver_careers' of both dataframes
 
     Creates a scatterplot for the avg placement for each driver that has
     participated in 'amount_of_races' races
 
     Returns the scatterplot as a plotly figure object
     """
-    liste = ds.driver_list(amount_of_races, df)
-    df_driver = pd.DataFrame({'driver_name': [], 'avg_placement': []})
+    if careers is None:
+        careers = ds.driver_careers(df, df_race_completed)
 
-    for name in liste:
-        finish = ds.driver_finish_pos(name, df)
-        finish['Produkt'] = finish.prod(axis=1)
-        if finish['count_finish'].sum() != 0:
-            mittelwert = finish['Produkt'].sum() / finish['count_finish'].sum()
-            df_driver.loc[len(df_driver)] = [name, mittelwert]
+    careers = careers[careers['races'] >= amount_of_races]
+    drivers = careers.index.to_numpy(dtype=object)
 
-    df_driver = df_driver.sort_values(by='avg_placement', ascending=True)
+    df_driver = pd.DataFrame(
+        {'driver_name': drivers, 'avg_placement': careers['avg_finish']}
+    ).sort_values(by='avg_placement', ascending=True)
 
+    completed = (careers['completed_races'] != 0).to_numpy()
     df_driver_completed = pd.DataFrame(
-        {'driver_name': [], 'avg_placement': []}
-    )
-
-    for name in liste:
-        finish = ds.driver_finish_pos(name, df_race_completed)
-        finish['Produkt'] = finish.prod(axis=1)
-        if finish['count_finish'].sum() != 0:
-            mittelwert = finish['Produkt'].sum() / finish['count_finish'].sum()
-            df_driver_completed.loc[len(df_driver_completed)] = [
-                name,
-                mittelwert,
-            ]
-
-    df_driver_completed = df_driver_completed.sort_values(
-        by='avg_placement', ascending=True
-    )
+        {
+            'driver_name': drivers[completed],
+            'avg_placement': careers['avg_finish_completed'][completed],
+        }
+    ).sort_values(by='avg_placement', ascending=True)
 
     fig = go.Figure()
     fig.add_trace(
@@ -714,9 +728,29 @@ def create_avg_all_drivers_figure(amount_of_races, df, df_race_completed):
     return fig
 
 
+def create_avg_all_drivers_figures(df, df_race_completed, careers=None):
+    """
+    Takes the completed dataframe, the dataframe where only the
+    completed races are in and optionally the table of 'driver_careers'
+
+    Returns the figures of 'create_avg_all_drivers_figure' for every
+    races slider step by their amount of races
+    """
+    if careers is None:
+        careers = ds.driver_careers(df, df_race_completed)
+    return {
+        amount_of_races: create_avg_all_drivers_figure(
+            amount_of_races, df, df_race_completed, careers
+        )
+        for amount_of_races in RACES_SLIDER_STEPS
+    }
+
+
 # Modified by ChatGPT
-def create_avg_all_drivers_figure_layout():
+def create_avg_all_drivers_figure_layout(figure):
     """
+    Takes the figure of the initial amount of races
+
     Creates the interactive layout for the avg placement
     of all drivers that has driven with a choosen amount of races
 
@@ -730,11 +764,12 @@ def create_avg_all_drivers_figure_layout():
                     min=0,
                     max=400,
                     step=10,
-                    value=130,
-                    marks={i: str(i) for i in range(0, 401, 10)},
+                    value=DEFAULT_RACES,
+                    marks={i: str(i) for i in RACES_SLIDER_STEPS},
                 ),
                 dcc.Graph(
                     id='driver-placements',
+                    figure=figure,
                     style={
                         'width': '100%',
                     },
@@ -0,0 +1,42 @@
+"""
+Partial updates of the figures of page callbacks.
+
+A callback that returns 'figure_patch(figure)' instead of the figure
+only sends the trace arrays and the title of the figure as a 'dash.Patch',
+the layout (most of all the template) and the styling of the traces stay
+as they are in the browser. This needs the graph to already show a
+figure with the same traces and layout: set its initial figure in the
+page layout and prevent the initial call of the callback.
+"""
+
+import os
+
+import dash
+
+
+# Set F1_FIGURE_PATCH=0 to send the whole figure on every update
+ENABLED = os.environ.get('F1_FIGURE_PATCH', '1') != '0'
+
+# Trace properties that change between the figures of a callback
+TRACE_ARRAYS = ('x', 'y')
+
+
+def figure_patch(figure, trace_arrays=TRACE_ARRAYS):
+    """
+    Takes a plotly figure object (or the figure as plotly JSON) and the
+    names of the trace properties that change
+
+    Returns a patch that turns a figure with the same traces and layout
+    into 'figure', or the figure itself if patches are disabled
+    """
+    if not ENABLED:
+        return figure
+
+    # Values as the figure would send them (e.g. base64 encoded arrays)
+    data = figure if isinstance(figure, dict) else figure.to_plotly_json()
+    patch = dash.Patch()
+    for position, trace in enumerate(data['data']):
+        for name in trace_arrays:
+            patch['data'][position][name] = trace.get(name)
+    patch['layout']['title']['text'] = data['layout']['title']['text']
+    return patch
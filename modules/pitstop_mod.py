@@ -4,6 +4,16 @@ import plotly.express as px
 
 from dash import dcc, html
 
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - falls back to numpy
+    pa = None
+
+# Pit stop speed categories and the quantiles their bins end at
+DURATION_CATEGORIES = ['Fast', 'Average', 'Slow']
+DURATION_QUANTILES = [0.33, 0.66, 1.0]
+
 
 def convert_duration_to_seconds(duration):
     """
@@ -33,6 +43,334 @@ def convert_duration_to_seconds(duration):
         return np.nan
 
 
+def _parse_plain_numbers(text):
+    """
+    Parses an array of strings that only contain digits and at most one
+    decimal point.
+
+    Returns the float array (NaN for all other strings) and the mask of
+    the strings that could not be parsed this way
+    """
+    if not len(text):
+        return np.empty(0), np.zeros(0, dtype=bool)
+
+    if pa is not None and isinstance(text, pa.Array):
+        plain = pc.ascii_is_decimal(
+            pc.replace_substring(text, '.', '', max_replacements=1)
+        )
+        plain = plain.fill_null(False)
+        numbers = pc.cast(
+            pc.if_else(plain, text, pa.scalar(None, pa.string())),
+            pa.float64(),
+        ).to_numpy(zero_copy_only=False, writable=True)
+        return numbers, ~plain.to_numpy(zero_copy_only=False)
+
+    plain = np.strings.isdigit(np.strings.replace(text, '.', '', 1))
+    numbers = np.full(len(text), np.nan)
+    try:
+        numbers[plain] = text[plain].astype('float64')
+    except ValueError:
+        # e.g. non-ASCII digits, left to the scalar version
+        plain[:] = False
+    return numbers, ~plain
+
+
+def _split_durations(values):
+    """
+    Splits the durations with a ':' into minutes and seconds (everything
+    after a second ':' is ignored, like in 'convert_duration_to_seconds').
+
+    Returns all values as strings, the minutes and seconds of the values
+    with a ':', the mask of those values and the mask of missing values
+    """
+    if pa is not None and pd.api.types.infer_dtype(values) == 'string':
+        text = pa.array(values, type=pa.string(), from_pandas=True)
+        missing = text.is_null().to_numpy(zero_copy_only=False)
+        has_colon = pc.greater_equal(pc.find_substring(text, ':'), 0)
+        has_colon = has_colon.fill_null(False)
+        parts = pc.split_pattern(
+            pc.filter(text, has_colon), ':', max_splits=2
+        )
+        return (
+            text,
+            pc.list_element(parts, 0),
+            pc.list_element(parts, 1),
+            has_colon.to_numpy(zero_copy_only=False),
+            missing,
+        )
+
+    missing = pd.isna(values)
+    text = np.where(missing, '', values).astype(str)
+    minutes, colon, rest = np.strings.partition(text, ':')
+    has_colon = colon == ':'
+    seconds = np.strings.partition(rest, ':')[0]
+    return text, minutes[has_colon], seconds[has_colon], has_colon, missing
+
+
+def parse_durations(series):
+    """
+    Converts a whole series of durations into seconds in one pass.
+    Vectorized version of 'convert_duration_to_seconds' with the same
+    results: supports MM:SS.sss format or numeric values and returns NaN
+    for invalid inputs.
+    """
+    if pd.api.types.is_numeric_dtype(series) and not (
+        pd.api.types.is_bool_dtype(series)
+    ):
+        return series.astype('float64')
+
+    values = series.to_numpy(dtype=object)
+    if not len(values):
+        return pd.Series(np.nan, index=series.index, name=series.name)
+
+    text, minutes, seconds, has_colon, missing = _split_durations(values)
+    result, irregular = _parse_plain_numbers(text)
+    minutes, irregular_minutes = _parse_plain_numbers(minutes)
+    seconds, irregular_seconds = _parse_plain_numbers(seconds)
+    result[has_colon] = minutes * 60 + seconds
+    irregular[has_colon] = irregular_minutes | irregular_seconds
+
+    # Signs, exponents, whitespace and invalid values are rare and are
+    # handled by the scalar version to keep the exact same results
+    retry = irregular & ~missing
+    if retry.any():
+        result[retry] = [
+            convert_duration_to_seconds(value) for value in values[retry]
+        ]
+    result[missing] = np.nan
+    return pd.Series(result, index=series.index, name=series.name)
+
+
+def categorize_durations(durations, groups):
+    """
+    Assigns the durations (without missing values) of all groups, e.g.
+    races or drivers, to the Fast, Average and Slow category of their
+    group in one pass. 'groups' holds the group of every duration, or a
+    list of columns that make up the group. The bins of a group are its
+    minimum and its 0.33, 0.66 and 1.0 quantiles, the same as 'pd.cut'
+    with 'Series.quantile' gives for the group alone. Groups whose bins
+    are not unique get no categories, as 'pd.cut' refuses them, neither
+    do durations without a group.
+
+    Returns the categories as a categorical series with the index of
+    'durations' and the summary of 'duration_category_summary' by group
+    """
+    values = durations.to_numpy(dtype='float64')
+    codes, keys = pd.factorize(
+        pd.MultiIndex.from_arrays(groups)
+        if isinstance(groups, list)
+        else groups,
+        sort=False,
+    )
+    # Durations without a group are put into an extra group
+    codes = np.where(codes < 0, len(keys), codes)
+
+    # Minimum and quantiles of every group, a row per group code
+    grouped = pd.Series(values).groupby(codes)
+    minimum = grouped.min()
+    bins = np.full((len(keys) + 1, len(DURATION_QUANTILES) + 1), np.nan)
+    bins[minimum.index, 0] = minimum.to_numpy()
+    bins[minimum.index, 1:] = (
+        grouped.quantile(DURATION_QUANTILES)
+        .to_numpy()
+        .reshape(-1, len(DURATION_QUANTILES))
+    )
+    valid = (np.diff(bins, axis=1) > 0).all(axis=1)
+    valid[len(keys)] = False
+
+    # Like 'pd.cut' with 'include_lowest', every bin includes its maximum
+    category_codes = (
+        (values[:, None] > bins[codes, 1:3]).sum(axis=1).astype(np.int8)
+    )
+    category_codes[~valid[codes]] = -1
+    categories = pd.Series(
+        pd.Categorical.from_codes(
+            category_codes, categories=DURATION_CATEGORIES, ordered=True
+        ),
+        index=durations.index,
+        name=durations.name,
+    )
+
+    rows = valid[codes]
+    summary = duration_category_summary(
+        categories[rows], durations[rows], codes[rows]
+    )
+    return categories, {
+        keys[code]: group_summary for code, group_summary in summary.items()
+    }
+
+
+def duration_category_summary(categories, durations, groups=None):
+    """
+    Counts the durations of every category and takes their minimum and
+    maximum in one grouped aggregation, per group if 'groups' holds the
+    group of every duration
+
+    Returns (count, min, max) by category (NaN for empty categories), by
+    group if 'groups' is given
+    """
+    summary = (
+        pd.DataFrame(
+            {
+                'group': 0 if groups is None else groups,
+                'category': categories.array,
+                'duration': durations.to_numpy(),
+            }
+        )
+        .groupby(['group', 'category'], observed=False)['duration']
+        .agg(['count', 'min', 'max'])
+    )
+    by_group = {}
+    for (group, category), count, minimum, maximum in zip(
+        summary.index, summary['count'], summary['min'], summary['max']
+    ):
+        by_group.setdefault(group, {})[category] = (count, minimum, maximum)
+    return by_group.get(0, {}) if groups is None else by_group
+
+
+def pitstop_summary(df):
+    """
+    Sums up the pit stops with a duration of every driver in every race
+    in one pass: total pit stop time, amount of stops, finish position
+    and whether the race was completed. The rows of a race are next to
+    each other in the order of the drivers. The completed drivers of every
+    race are assigned to the pit stop speed categories of the race (see
+    'categorize_durations').
+
+    Returns the summary as a dict with the table, the years of every
+    race name (sorted and in order of their first appearance in 'df'),
+    the row range of every race in the table and the category summary
+    of every race, both by (race_name, year)
+    """
+    table = (
+        df.dropna(subset=['duration'])
+        .groupby(
+            [
+                'race_name',
+                'year',
+                'driver_name',
+                'finish_position',
+                'race_completed',
+            ],
+            observed=True,
+        )['duration']
+        .agg(['sum', 'count'])
+        .rename(columns={'sum': 'duration', 'count': 'stops'})
+        .reset_index()
+    )
+
+    completed = table[table['race_completed']]
+    categories, race_categories = categorize_durations(
+        completed['duration'], [completed['race_name'], completed['year']]
+    )
+    table['duration_category'] = categories
+
+    sizes = table.groupby(['race_name', 'year'], observed=True).size()
+    stops = np.cumsum(sizes.to_numpy())
+    ranges = {
+        (race_name, int(year)): (int(stop - size), int(stop))
+        for (race_name, year), size, stop in zip(sizes.index, sizes, stops)
+    }
+
+    years = {
+        race_name: race_years.tolist()
+        for race_name, race_years in df.groupby(
+            'race_name', observed=True, sort=False
+        )['year'].unique().items()
+    }
+    return {
+        'table': table,
+        'years': {
+            race_name: sorted(race_years)
+            for race_name, race_years in years.items()
+        },
+        'first_years': {
+            race_name: race_years[0]
+            for race_name, race_years in years.items()
+        },
+        'ranges': ranges,
+        'categories': {
+            (race_name, int(year)): race_summary
+            for (race_name, year), race_summary in race_categories.items()
+        },
+    }
+
+
+# Version of the output of 'pitstop_summary', the stored summaries of
+# other versions are rebuilt
+SUMMARY_VERSION = 1
+
+
+def stored_pitstop_summary(df, name='pitstops'):
+    """
+    Returns 'pitstop_summary' of 'df', the pit stops of dataset 'name'
+
+    The summary is stored next to the parquet cache of the dataset for
+    the content of its CSV (see 'cache.read_derived'), it is only
+    computed again when the CSV, the schema or SUMMARY_VERSION change
+    """
+    # Imported here, the datastore schema imports this module
+    from modules.datastore import cache
+
+    stored = cache.read_derived(name, 'summary', SUMMARY_VERSION)
+    if stored is not None:
+        table, data = stored
+        return {
+            'table': table,
+            'years': data['years'],
+            'first_years': data['first_years'],
+            'ranges': {
+                (race_name, year): (start, stop)
+                for race_name, year, start, stop in data['ranges']
+            },
+            'categories': {
+                (race_name, year): {
+                    category: tuple(values)
+                    for category, values in race_summary.items()
+                }
+                for race_name, year, race_summary in data['categories']
+            },
+        }
+
+    summary = pitstop_summary(df)
+    data = {
+        'years': summary['years'],
+        'first_years': summary['first_years'],
+        'ranges': [
+            [race_name, year, start, stop]
+            for (race_name, year), (start, stop) in summary['ranges'].items()
+        ],
+        'categories': [
+            [
+                race_name,
+                year,
+                {
+                    category: [int(count), float(minimum), float(maximum)]
+                    for category, (count, minimum, maximum) in (
+                        race_summary.items()
+                    )
+                },
+            ]
+            for (race_name, year), race_summary in (
+                summary['categories'].items()
+            )
+        ],
+    }
+    cache.write_derived(
+        name, 'summary', SUMMARY_VERSION, summary['table'], data
+    )
+    return summary
+
+
+def race_pitstops(summary, race_name, year):
+    """
+    Returns the rows of the race 'race_name' in 'year' of the pit stop
+    summary of 'pitstop_summary' (empty if there is no such race)
+    """
+    start, stop = summary['ranges'].get((race_name, year), (0, 0))
+    return summary['table'].iloc[start:stop]
+
+
 def create_pitstop_layout(unique_circuits):
     """
     Generates the layout for the pitstop data visualization based on the
@@ -133,7 +471,7 @@ def create_pitstop_layout_boxplot(eligible_drivers):
 
 
 def create_circuit_plot(
-    selected_circuit, selected_year, driver_pitstops_sorted
+    selected_circuit, selected_year, driver_pitstops_sorted, categories=None
 ):
     """
     Generates pitstop analysis plots (boxplot and bar plot) for a selected
@@ -150,6 +488,9 @@ def create_circuit_plot(
         selected_year (int): The year of the race.
         driver_pitstops_sorted (DataFrame): A sorted DataFrame containing the
         pitstop data of drivers.
+        categories (dict, optional): The summary of the race from
+        'categorize_durations', if 'driver_pitstops_sorted' already has
+        the 'duration_category' column.
 
     Returns:
         fig_box (plotly.graph_objs.Figure): A boxplot showing pit stop speed
@@ -159,16 +500,21 @@ def create_circuit_plot(
         info_text (html.Div): A div containing information about the number of
         drivers and time ranges for each pit stop speed category.
     """
-    # Categorize pit stop durations into Fast, Average, and Slow
-    driver_pitstops_sorted['duration_category'] = pd.cut(
-        driver_pitstops_sorted['duration'],
-        bins=[driver_pitstops_sorted['duration'].min()]
-        + driver_pitstops_sorted['duration']
-        .quantile([0.33, 0.66, 1.0])
-        .tolist(),
-        labels=['Fast', 'Average', 'Slow'],
-        include_lowest=True,
-    )
+    if categories is None:
+        # Categorize pit stop durations into Fast, Average, and Slow
+        driver_pitstops_sorted['duration_category'] = pd.cut(
+            driver_pitstops_sorted['duration'],
+            bins=[driver_pitstops_sorted['duration'].min()]
+            + driver_pitstops_sorted['duration']
+            .quantile(DURATION_QUANTILES)
+            .tolist(),
+            labels=DURATION_CATEGORIES,
+            include_lowest=True,
+        )
+        categories = duration_category_summary(
+            driver_pitstops_sorted['duration_category'],
+            driver_pitstops_sorted['duration'],
+        )
 
     # Create a boxplot showing pit stop speed categories vs. finish positions
     fig_box = px.box(
@@ -209,69 +555,21 @@ def create_circuit_plot(
         ],
     )
 
-    # Calculate the number of drivers in each category (Fast, Average, Slow)
-    category_counts = (
-        driver_pitstops_sorted['duration_category'].value_counts().to_dict()
-    )
-
-    # Calculate min and max pit stop times for each category 
-    # (Fast, Average, Slow)
-    try:
-        fast_range = (
-            driver_pitstops_sorted[
-                driver_pitstops_sorted['duration_category'] == 'Fast'
-            ]['duration'].min(),
-            driver_pitstops_sorted[
-                driver_pitstops_sorted['duration_category'] == 'Fast'
-            ]['duration'].max(),
-        )
-        medium_range = (
-            driver_pitstops_sorted[
-                driver_pitstops_sorted['duration_category'] == 'Average'
-            ]['duration'].min(),
-            driver_pitstops_sorted[
-                driver_pitstops_sorted['duration_category'] == 'Average'
-            ]['duration'].max(),
-        )
-        slow_range = (
-            driver_pitstops_sorted[
-                driver_pitstops_sorted['duration_category'] == 'Slow'
-            ]['duration'].min(),
-            driver_pitstops_sorted[
-                driver_pitstops_sorted['duration_category'] == 'Slow'
-            ]['duration'].max(),
-        )
-    except ValueError:
-        # If there's an issue with the data (e.g., no data in any category),
-        # return empty plots and an info message
-        return fig_box, fig_bar, html.P('No Data Available')
-
     # Create an info text summarizing the number of drivers and the time
     # ranges for each category
-    info_text = html.Div(
-        [
-            html.P(f'Number of Drivers: {len(driver_pitstops_sorted)}'),
-            html.P(
-                f'Fast ({category_counts.get("Fast", 0)} Drivers): '
-                f'{fast_range[0]:.2f}s - {fast_range[1]:.2f}s'
-            ),
-            html.P(
-                f'Average ({category_counts.get("Average", 0)} Drivers): '
-                f'{medium_range[0]:.2f}s - {medium_range[1]:.2f}s'
-            ),
-            html.P(
-                f'Slow ({category_counts.get("Slow", 0)} Drivers): '
-                f'{slow_range[0]:.2f}s - {slow_range[1]:.2f}s'
-            ),
-        ],
-        className='info-text',
+    info_text = create_category_info(
+        f'Number of Drivers: {len(driver_pitstops_sorted)}',
+        categories,
+        'Drivers',
     )
 
     # Return the generated boxplot, bar plot, and the info text
     return fig_box, fig_bar, info_text
 
 
-def create_driver_plot(driver_name, df_driver_sorted, total_races):
+def create_driver_plot(
+    driver_name, df_driver_sorted, total_races, categories=None
+):
     """
     Generates a pit stop analysis boxplot for a specific driver, based on their
     pit stop duration and finish positions. This function creates a boxplot
@@ -285,7 +583,9 @@ def create_driver_plot(driver_name, df_driver_sorted, total_races):
         nalysis is being created. df_driver_sorted (DataFrame):
         A DataFrame containing the pit stop data for the selected driver,
         sorted by pit stop duration. total_races (int): The total number 
-        of races for the selected driver.
+        of races for the selected driver. categories (dict, optional): The
+        summary of the driver from 'categorize_durations', if
+        'df_driver_sorted' already has the 'duration_category' column.
 
     Returns:
         fig (plotly.graph_objs.Figure): A boxplot showing pit stop duration
@@ -294,14 +594,21 @@ def create_driver_plot(driver_name, df_driver_sorted, total_races):
         in each category and the time ranges.
     """
 
-    # Categorize pit stop durations into Fast, Average, and Slow categories
-    df_driver_sorted['duration_category'] = pd.cut(
-        df_driver_sorted['duration'],
-        bins=[df_driver_sorted['duration'].min()]
-        + df_driver_sorted['duration'].quantile([0.33, 0.66, 1.0]).tolist(),
-        labels=['Fast', 'Average', 'Slow'],
-        include_lowest=True,
-    )
+    if categories is None:
+        # Categorize pit stop durations into Fast, Average, and Slow
+        # categories
+        df_driver_sorted['duration_category'] = pd.cut(
+            df_driver_sorted['duration'],
+            bins=[df_driver_sorted['duration'].min()]
+            + df_driver_sorted['duration']
+            .quantile(DURATION_QUANTILES)
+            .tolist(),
+            labels=DURATION_CATEGORIES,
+            include_lowest=True,
+        )
+        categories = duration_category_summary(
+            df_driver_sorted['duration_category'], df_driver_sorted['duration']
+        )
 
     # Create a boxplot comparing pit stop speed categories with
     # finish positions
@@ -318,58 +625,38 @@ def create_driver_plot(driver_name, df_driver_sorted, total_races):
         template='plotly_dark',
     )
 
-    # Calculate the number of races in each pit stop category
-    category_counts = (
-        df_driver_sorted['duration_category'].value_counts().to_dict()
+    # Create a summary text with information about the number of races per
+    #  category and the time ranges
+    info_text = create_category_info(
+        f'Number of Races: {total_races}', categories, 'Races'
     )
 
-    # Calculate the min and max pit stop durations for each category
-    # (Slow, Average, Fast)
-    slow_range = (
-        df_driver_sorted[df_driver_sorted['duration_category'] == 'Slow'][
-            'duration'
-        ].min(),
-        df_driver_sorted[df_driver_sorted['duration_category'] == 'Slow'][
-            'duration'
-        ].max(),
-    )
-    medium_range = (
-        df_driver_sorted[df_driver_sorted['duration_category'] == 'Average'][
-            'duration'
-        ].min(),
-        df_driver_sorted[df_driver_sorted['duration_category'] == 'Average'][
-            'duration'
-        ].max(),
-    )
-    fast_range = (
-        df_driver_sorted[df_driver_sorted['duration_category'] == 'Fast'][
-            'duration'
-        ].min(),
-        df_driver_sorted[df_driver_sorted['duration_category'] == 'Fast'][
-            'duration'
-        ].max(),
-    )
+    # Return the generated boxplot and the information text
+    return fig, info_text
 
-    # Create a summary text with information about the number of races per
-    #  category and the time ranges
-    info_text = html.Div(
-        [
-            html.P(f'Number of Races: {total_races}'),
-            html.P(
-                f'Fast ({category_counts.get("Fast", 0)} Races): '
-                f'{fast_range[0]:.2f}s - {fast_range[1]:.2f}s'
-            ),
-            html.P(
-                f'Average ({category_counts.get("Average", 0)} Races): '
-                f'{medium_range[0]:.2f}s - {medium_range[1]:.2f}s'
-            ),
+
+def create_category_info(title, categories, unit):
+    """
+    Generates the info text under a pit stop plot from the summary of
+    'duration_category_summary'.
+
+    Args:
+        title (str): The first line of the info text.
+        categories (dict): Count, min and max duration by category.
+        unit (str): What is counted in every category (e.g. 'Drivers').
+
+    Returns:
+        info_text (html.Div): A div containing the number of durations
+        and the time range of every category.
+    """
+    return html.Div(
+        [html.P(title)]
+        + [
             html.P(
-                f'Slow ({category_counts.get("Slow", 0)} Races): '
-                f'{slow_range[0]:.2f}s - {slow_range[1]:.2f}s'
-            ),
+                f'{category} ({count} {unit}): '
+                f'{minimum:.2f}s - {maximum:.2f}s'
+            )
+            for category, (count, minimum, maximum) in categories.items()
         ],
         className='info-text',
     )
-
-    # Return the generated boxplot and the information text
-    return fig, info_text
@@ -0,0 +1,251 @@
+"""
+Static snapshot of every reachable callback output.
+
+Every page can define 'prerender_inputs', which returns the reachable
+inputs of its cached callbacks. The prerender command runs the callbacks
+for all of them in a process pool and stores the outputs as content
+addressed JSON files, so equal outputs are stored once:
+
+    python -m modules.prerender [--jobs N] [--only CALLBACK ...]
+
+With F1_PRERENDERED=1 the callbacks answer from these files (see
+'callback_cache.cached_callback') as long as the data version of the
+snapshot matches the loaded data. The data version only depends on the
+content of the CSVs, so a snapshot built on another host or checkout of
+the same data is served. Inputs outside the snapshot are computed as
+usual.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+from modules.datastore.schema import DATA_PATH
+
+
+logger = logging.getLogger(__name__)
+
+PRERENDER_PATH = os.environ.get(
+    'F1_PRERENDER_PATH', DATA_PATH + 'prerendered/'
+)
+
+# Set F1_PRERENDERED=1 to answer callbacks from the snapshot
+SERVING = os.environ.get('F1_PRERENDERED', '0') == '1'
+
+# Manifest of the snapshot, read on first use
+_manifest = None
+_lock = threading.Lock()
+
+# Data version a mismatch with the snapshot was logged for
+_logged_version = None
+
+# Output directory of the running prerender, inherited by the pool
+_output = PRERENDER_PATH
+
+
+def object_path(path, digest):
+    """
+    Returns the path of the output with sha256 'digest' in the snapshot
+    at 'path'
+    """
+    return os.path.join(path, 'objects', digest[:2], f'{digest}.json')
+
+
+def write_atomic(file_path, data):
+    """
+    Writes the text or bytes 'data' to 'file_path', readers never see a
+    partially written file
+    """
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    tmp_path = f'{file_path}.{os.getpid()}.tmp'
+    if isinstance(data, bytes):
+        with open(tmp_path, 'wb') as file:
+            file.write(data)
+    else:
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            file.write(data)
+    os.replace(tmp_path, file_path)
+
+
+def manifest(path=None):
+    """
+    Returns the manifest of the snapshot at 'path' (default
+    PRERENDER_PATH), which is empty if there is no snapshot
+    """
+    global _manifest
+    with _lock:
+        if path is None and _manifest is not None:
+            return _manifest
+        try:
+            with open(
+                os.path.join(path or PRERENDER_PATH, 'manifest.json'),
+                encoding='utf-8',
+            ) as file:
+                loaded = json.load(file)
+        except (OSError, ValueError) as error:
+            logger.warning('No prerendered snapshot: %s', error)
+            loaded = {'data_version': None, 'callbacks': {}}
+        if path is None:
+            _manifest = loaded
+        return loaded
+
+
+def lookup(callback, version, inputs):
+    """
+    Returns the prerendered output of 'callback' for the normalized
+    'inputs' (see 'callback_cache.cache_key') or None if the snapshot
+    does not contain it or was built from other data
+    """
+    global _logged_version
+    snapshot = manifest()
+    if snapshot['data_version'] != version:
+        if snapshot['data_version'] and _logged_version != version:
+            _logged_version = version
+            logger.warning(
+                'Prerendered snapshot of data version %s is not served, '
+                'the loaded data has version %s',
+                snapshot['data_version'],
+                version,
+            )
+        return None
+    digest = snapshot['callbacks'].get(callback, {}).get(inputs)
+    if digest is None:
+        return None
+    file_path = object_path(PRERENDER_PATH, digest)
+    try:
+        with open(file_path, encoding='utf-8') as file:
+            return file.read()
+    except OSError:
+        return None
+
+
+def collect_tasks(only=None):
+    """
+    Returns the callback name and the inputs of every reachable output
+    of the registered pages, optionally only of the callbacks 'only'
+    """
+    import dash
+
+    tasks = []
+    for page in dash.page_registry.values():
+        module = sys.modules[page['module']]
+        if not hasattr(module, 'prerender_inputs'):
+            continue
+        for callback, inputs in module.prerender_inputs().items():
+            name = f'{callback.__module__}.{callback.__name__}'
+            if only and name not in only and callback.__name__ not in only:
+                continue
+            tasks.extend((name, tuple(args)) for args in inputs)
+    return tasks
+
+
+def render(task):
+    """
+    Runs the callback of 'task' without any cache and stores its output
+
+    Returns the callback name, the normalized inputs and the digest of
+    the output (None if the callback failed)
+    """
+    from plotly.io.json import to_json_plotly
+
+    from modules.callback_cache import cache_key, callbacks
+
+    name, args = task
+    inputs = cache_key(args, {})[1]
+    try:
+        payload = to_json_plotly(callbacks()[name].__wrapped__(*args))
+    except Exception as error:  # noqa: BLE001 - reported, not served
+        logger.warning('%s%r failed: %r', name, args, error)
+        return name, inputs, None
+
+    digest = hashlib.sha256(payload.encode()).hexdigest()
+    file_path = object_path(_output, digest)
+    if not os.path.exists(file_path):
+        write_atomic(file_path, payload)
+    return name, inputs, digest
+
+
+def prerender(output=PRERENDER_PATH, jobs=None, only=None):
+    """
+    Renders every reachable callback output into the snapshot at
+    'output' using 'jobs' processes (default: all cores)
+
+    Returns the manifest of the snapshot
+    """
+    global _output
+    import app  # noqa: F401 - registers the pages and their callbacks
+    import modules.datastore as datastore
+    import modules.providers as providers
+
+    # Forked workers share the page data instead of computing it again
+    providers.warm_all()
+    _output = output
+    tasks = collect_tasks(only)
+    jobs = jobs or os.cpu_count() or 1
+    logger.info('Prerendering %d outputs with %d jobs', len(tasks), jobs)
+
+    start = time.perf_counter()
+    if jobs == 1:
+        results = map(render, tasks)
+    else:
+        # Forked workers share the loaded datasets and registered callbacks
+        pool = ProcessPoolExecutor(
+            jobs, mp_context=multiprocessing.get_context('fork')
+        )
+        results = pool.map(render, tasks, chunksize=16)
+
+    # A partial run (only) adds its outputs to a snapshot of the same data
+    version = datastore.data_version()
+    snapshot = manifest(output) if only else None
+    if snapshot is None or snapshot['data_version'] != version:
+        snapshot = {'data_version': version, 'callbacks': {}}
+    failed = 0
+    for done, (name, inputs, digest) in enumerate(results, start=1):
+        if digest is None:
+            failed += 1
+            continue
+        snapshot['callbacks'].setdefault(name, {})[inputs] = digest
+        if done % 1000 == 0:
+            logger.info('%d / %d outputs', done, len(tasks))
+    if jobs != 1:
+        pool.shutdown()
+
+    write_atomic(
+        os.path.join(output, 'manifest.json'),
+        json.dumps(snapshot, sort_keys=True),
+    )
+    objects = {
+        digest
+        for outputs in snapshot['callbacks'].values()
+        for digest in outputs.values()
+    }
+    logger.info(
+        'Prerendered %d outputs (%d files, %d failed) in %.1f s',
+        len(tasks) - failed,
+        len(objects),
+        failed,
+        time.perf_counter() - start,
+    )
+    return snapshot
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', default=PRERENDER_PATH)
+    parser.add_argument('--jobs', type=int, default=None)
+    parser.add_argument('--only', nargs='*', default=None)
+    arguments = parser.parse_args()
+
+    # Run the imported module, its functions are the ones the pool pickles
+    from modules import prerender as module
+
+    logging.basicConfig(level=logging.INFO)
+    module.prerender(arguments.output, arguments.jobs, arguments.only)
@@ -0,0 +1,116 @@
+"""
+Page data computed on first use instead of at import.
+
+Pages declare the datasets, indexes, figures and layouts they need as
+providers: functions without arguments decorated with 'provider', which
+compute their value on the first call and return it from then on:
+
+    @providers.provider
+    def driver_index():
+        return datastore.row_index('season_results', 'driver_name')
+
+Importing a page computes nothing, so a worker starts right away. Its
+first request builds the page layouts, which Dash checks the callbacks
+against. 'start_prewarm' then computes every other provider in a
+background thread, a request that needs a provider before that computes
+it (or waits for the prewarm to finish it). Set F1_PREWARM=0 to only
+compute providers on first use.
+"""
+
+import functools
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+import modules.startup_profile as startup_profile
+
+
+logger = logging.getLogger(__name__)
+
+# Set F1_PREWARM=0 to not compute the providers in the background
+PREWARM = os.environ.get('F1_PREWARM', '1') != '0'
+
+# All providers by name, in the order the pages declare them
+_providers = {}
+_lock = threading.Lock()
+_prewarm = None
+
+
+def provider(func):
+    """
+    Decorator for page data without arguments, the value is computed on
+    the first call (by one thread, others wait for it) and shared with
+    every later call
+    """
+    name = f'{func.__module__}.{func.__name__}'
+    state = {}
+    stats = {'provider': name, 'ready': False, 'seconds': None}
+    lock = threading.Lock()
+
+    @functools.wraps(func)
+    def wrapper():
+        if 'value' not in state:
+            with lock:
+                if 'value' not in state:
+                    start = time.perf_counter()
+                    with startup_profile.span(name, 'provider'):
+                        state['value'] = func()
+                    stats['seconds'] = time.perf_counter() - start
+                    stats['ready'] = True
+                    logger.info(
+                        'Provided %s in %.3f s', name, stats['seconds']
+                    )
+        return state['value']
+
+    wrapper.provider_stats = stats
+    with _lock:
+        _providers[name] = wrapper
+    return wrapper
+
+
+def warm_all():
+    """
+    Computes every provider that is not computed yet, in the order they
+    were declared
+    """
+    with _lock:
+        providers = list(_providers.values())
+    for func in providers:
+        try:
+            func()
+        except Exception:  # noqa: BLE001 - computed again on first use
+            logger.exception('Prewarm of %s failed', func.__name__)
+    startup_profile.write()
+
+
+def start_prewarm():
+    """
+    Starts computing every provider in a background thread, once per
+    process and only if F1_PREWARM is not disabled
+    """
+    global _prewarm
+    if not PREWARM:
+        return
+    with _lock:
+        if _prewarm is not None:
+            return
+        _prewarm = threading.Thread(
+            target=warm_all, name='prewarm', daemon=True
+        )
+    _prewarm.start()
+
+
+def provider_report():
+    """
+    Returns a dataframe with the name, readiness and compute time of
+    every provider in this process
+    """
+    with _lock:
+        providers = list(_providers.values())
+    return pd.DataFrame(
+        [dict(func.provider_stats) for func in providers],
+        columns=['provider', 'ready', 'seconds'],
+    )
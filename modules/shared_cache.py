@@ -0,0 +1,245 @@
+"""
+Shared backends of the callback cache.
+
+The per process cache of 'callback_cache' only helps the worker that
+computed a result. With a shared backend the serialized results are also
+stored where every worker finds them:
+
+    F1_CALLBACK_CACHE_BACKEND=sqlite   SQLite file in the data directory
+                                       (F1_CALLBACK_CACHE_PATH)
+    F1_CALLBACK_CACHE_BACKEND=redis    Redis compatible server
+                                       (F1_CALLBACK_CACHE_URL)
+
+Every key starts with the data version, so results of older data are
+never returned once a worker loads changed data. They are not deleted
+either: SQLite evicts them by its size bounds like any entry that is no
+longer used, Redis expires them.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from modules.datastore.schema import DATA_PATH
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - depends on the deployment
+    redis = None
+
+
+logger = logging.getLogger(__name__)
+
+BACKEND = os.environ.get('F1_CALLBACK_CACHE_BACKEND', '')
+SQLITE_PATH = os.environ.get(
+    'F1_CALLBACK_CACHE_PATH', DATA_PATH + 'callback_cache.sqlite'
+)
+REDIS_URL = os.environ.get(
+    'F1_CALLBACK_CACHE_URL', 'redis://localhost:6379/0'
+)
+
+# Bounds of the SQLite backend, Redis evicts by its own policy
+MAX_ENTRIES = 4096
+MAX_BYTES = 256 * 2**20
+
+# Entries expire in Redis after this many seconds
+REDIS_TTL = 24 * 60 * 60
+
+# Hits of a SQLite connection are written as one batch once there are
+# this many (or with the next write)
+SQLITE_USED_BATCH = 64
+
+# Prefix of all keys of the callback cache
+KEY_PREFIX = 'f1-callbacks'
+
+# Errors of the backends, a failing backend is treated as a miss
+ERRORS = (OSError, ValueError, sqlite3.Error) + (
+    (redis.RedisError,) if redis is not None else ()
+)
+
+# Backend of this process, opened on first use
+_backend = None
+_lock = threading.Lock()
+
+
+def entry_key(version, callback, inputs_hash):
+    """
+    Returns the key of a cache entry, prefixed by the data version
+    """
+    return f'{KEY_PREFIX}:{version}:{callback}:{inputs_hash}'
+
+
+class SqliteBackend:
+    """
+    Cache entries in a SQLite file shared by all workers on one host
+
+    Every process and thread uses its own connection. Writes are atomic
+    transactions, the least recently used entries are evicted once the
+    file holds more than 'max_entries' entries or 'max_bytes' bytes.
+    Hits are only written in batches (see SQLITE_USED_BATCH), so a hit is
+    a plain read.
+    """
+
+    def __init__(self, path, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            # The data version is part of the key. Files of older releases
+            # have an unused version column, so inserts name their columns.
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, payload TEXT, bytes INTEGER, '
+                'used REAL)'
+            )
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS entries_used ON entries (used)'
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+            self._local.used = {}
+        return connection
+
+    def _write_used(self, connection):
+        # Last hit of every key read since the previous batch
+        used = self._local.used
+        if used:
+            connection.executemany(
+                'UPDATE entries SET used = ? WHERE key = ?',
+                [(when, key) for key, when in used.items()],
+            )
+            used.clear()
+
+    def get(self, key):
+        """
+        Returns the payload of 'key' or None
+        """
+        connection = self._connection()
+        row = connection.execute(
+            'SELECT payload FROM entries WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self._local.used[key] = time.time()
+        if len(self._local.used) >= SQLITE_USED_BATCH:
+            with connection:
+                connection.execute('BEGIN IMMEDIATE')
+                self._write_used(connection)
+        return row[0]
+
+    def set(self, key, payload):
+        """
+        Stores 'payload' under 'key' and evicts the least recently used
+        entries
+        """
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            self._write_used(connection)
+            connection.execute(
+                'INSERT OR REPLACE INTO entries (key, payload, bytes, used) '
+                'VALUES (?, ?, ?, ?)',
+                (key, payload, len(payload), time.time()),
+            )
+            entries, size = connection.execute(
+                'SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM entries'
+            ).fetchone()
+            while entries > self.max_entries or size > self.max_bytes:
+                row = connection.execute(
+                    'SELECT key, bytes FROM entries ORDER BY used LIMIT 1'
+                ).fetchone()
+                connection.execute(
+                    'DELETE FROM entries WHERE key = ?', row[:1]
+                )
+                entries -= 1
+                size -= row[1]
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Removes all entries
+        """
+        connection = self._connection()
+        connection.execute('DELETE FROM entries')
+        self._local.used.clear()
+
+
+class RedisBackend:
+    """
+    Cache entries in a Redis compatible server shared by all workers
+
+    Uses the 'redis' client, whose connection pool is safe to share
+    between threads and is reopened in forked workers. Entries expire
+    after 'ttl' seconds.
+    """
+
+    def __init__(self, url, ttl=REDIS_TTL, timeout=1.0):
+        if redis is None:
+            raise ImportError('The redis backend needs the redis package')
+        # RESP2 is spoken by every Redis compatible server
+        self.client = redis.Redis.from_url(
+            url,
+            protocol=2,
+            socket_timeout=timeout,
+            socket_connect_timeout=timeout,
+        )
+        self.ttl = ttl
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Returns the payload of 'key' or None
+        """
+        payload = self.client.get(key)
+        return None if payload is None else payload.decode()
+
+    def set(self, key, payload):
+        """
+        Stores 'payload' under 'key' for 'ttl' seconds
+        """
+        self.client.set(key, payload, ex=self.ttl)
+
+    def clear(self):
+        """
+        Removes all entries of this cache
+        """
+        keys = list(self.client.scan_iter(match=f'{KEY_PREFIX}:*'))
+        for start in range(0, len(keys), 1000):
+            self.client.delete(*keys[start : start + 1000])
+
+
+def create_backend(name):
+    """
+    Returns the shared backend 'name' configured by the environment or
+    None for the per process cache only
+    """
+    if name == 'sqlite':
+        return SqliteBackend(SQLITE_PATH)
+    if name == 'redis':
+        return RedisBackend(REDIS_URL)
+    if name:
+        raise ValueError(f'Unknown callback cache backend: {name}')
+    return None
+
+
+def backend():
+    """
+    Returns the shared backend of this process, created on first use
+    """
+    global _backend
+    with _lock:
+        if _backend is None and BACKEND:
+            _backend = create_backend(BACKEND)
+        return _backend
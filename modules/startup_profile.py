@@ -0,0 +1,250 @@
+"""
+Profile of the startup of the app.
+
+With F1_STARTUP_PROFILE=1 every process that imports the app records a
+tree of timed spans: the import of every module, the dataset loads and
+row index builds, the figure builds of the warm-up, the page data and
+layouts of the providers and the construction of the app. 'write' stores
+the spans recorded so far as JSON together with a readable summary in
+F1_STARTUP_PROFILE_PATH (default data/startup_profile/), one pair of
+files per process id:
+
+    F1_STARTUP_PROFILE=1 python app.py
+    less data/startup_profile/<pid>.txt
+
+The app writes the profile once it is imported and again when the
+prewarm of the providers is done. This module only uses the standard
+library, so importing it first lets it time all other imports.
+"""
+
+import contextlib
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+
+
+# Set F1_STARTUP_PROFILE=1 to record the startup spans
+ENABLED = os.environ.get('F1_STARTUP_PROFILE', '0') == '1'
+
+# Directory of the profiles, the data directory of the datastore
+PROFILE_PATH = os.environ.get(
+    'F1_STARTUP_PROFILE_PATH', 'data/startup_profile/'
+)
+
+# Spans shorter than this are left out of the tree of the summary
+SUMMARY_MIN_SECONDS = 0.01
+
+# Start of the profile, spans without parent and the open spans of every
+# thread
+_started = time.perf_counter()
+_started_at = time.time()
+_roots = []
+_local = threading.local()
+_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def span(name, kind):
+    """
+    Records the time spent in the block as a span 'name' of 'kind' (e.g.
+    'import', 'dataset', 'figure'), nested in the open span of the thread
+
+    Yields the record of the span, further details can be added to it
+    """
+    if not ENABLED:
+        yield {}
+        return
+
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    start = time.perf_counter()
+    record = {
+        'name': name,
+        'kind': kind,
+        'thread': threading.current_thread().name,
+        'timestamp': _started_at + start - _started,
+        'start': start - _started,
+        'seconds': None,
+        'children': [],
+    }
+    if stack:
+        stack[-1]['children'].append(record)
+    else:
+        with _lock:
+            _roots.append(record)
+    stack.append(record)
+    try:
+        yield record
+    finally:
+        stack.pop()
+        record['seconds'] = time.perf_counter() - start
+
+
+class _TimedLoader:
+    """
+    Loader executing modules of another loader inside an import span
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        with span(module.__name__, 'import'):
+            self._loader.exec_module(module)
+
+
+class _ImportTimer:
+    """
+    Meta path finder handing out the specs of the other finders with a
+    timed loader for every module loaded from a file
+    """
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.has_location and hasattr(spec.loader, 'exec_module'):
+            spec.loader = _TimedLoader(spec.loader)
+        return spec
+
+
+def _walk(spans, depth=0):
+    # Spans in depth first order with their depth
+    for record in spans:
+        yield record, depth
+        yield from _walk(record['children'], depth + 1)
+
+
+def _totals(spans, outer=()):
+    # Count and seconds per kind, nested spans of the same kind are
+    # counted with the outermost one
+    totals = {}
+    for record in spans:
+        count, seconds = totals.get(record['kind'], (0, 0.0))
+        if record['kind'] not in outer:
+            seconds += record['seconds'] or 0.0
+        totals[record['kind']] = (count + 1, seconds)
+        for kind, (child_count, child_seconds) in _totals(
+            record['children'], outer + (record['kind'],)
+        ).items():
+            count, seconds = totals.get(kind, (0, 0.0))
+            totals[kind] = (count + child_count, seconds + child_seconds)
+    return totals
+
+
+def report():
+    """
+    Returns the profile of this process: the span tree, the totals per
+    kind and the time since the start of the profile
+    """
+    with _lock:
+        spans = list(_roots)
+    return {
+        'pid': os.getpid(),
+        'argv': sys.argv,
+        'started_at': _started_at,
+        'seconds': time.perf_counter() - _started,
+        'totals': {
+            kind: {'spans': count, 'seconds': seconds}
+            for kind, (count, seconds) in _totals(spans).items()
+        },
+        'spans': spans,
+    }
+
+
+def summary(profile):
+    """
+    Returns the readable summary of 'profile' (see 'report')
+    """
+    started_at = datetime.datetime.fromtimestamp(profile['started_at'])
+    lines = [
+        f'Startup profile of process {profile["pid"]} '
+        f'({" ".join(profile["argv"])}), '
+        f'started {started_at:%Y-%m-%d %H:%M:%S}',
+        f'{profile["seconds"]:.3f} s since the start of the profile',
+        '',
+        f'{"kind":<12}{"spans":>8}{"seconds":>10}',
+    ]
+    for kind, total in sorted(
+        profile['totals'].items(), key=lambda item: -item[1]['seconds']
+    ):
+        lines.append(
+            f'{kind:<12}{total["spans"]:>8}{total["seconds"]:>10.3f}'
+        )
+
+    spans = list(_walk(profile['spans']))
+    lines += ['', 'Slowest spans (seconds, start)']
+    for record, _ in sorted(
+        spans, key=lambda item: -(item[0]['seconds'] or 0.0)
+    )[:15]:
+        lines.append(
+            f'{record["seconds"] or 0.0:>8.3f}{record["start"]:>9.3f}  '
+            f'{record["kind"]} {record["name"]}'
+        )
+
+    lines += [
+        '',
+        f'Span tree (start, seconds, spans of at least '
+        f'{SUMMARY_MIN_SECONDS * 1000:.0f} ms)',
+    ]
+    shown = set()
+    for record, depth in spans:
+        if (record['seconds'] or 0.0) < SUMMARY_MIN_SECONDS:
+            continue
+        # Only spans whose parent is shown, so the tree stays connected
+        if depth and id(record) not in shown:
+            continue
+        shown.update(id(child) for child in record['children'])
+        thread = (
+            f' [{record["thread"]}]'
+            if record['thread'] != 'MainThread'
+            else ''
+        )
+        lines.append(
+            f'{record["start"]:>8.3f}{record["seconds"] or 0.0:>8.3f}  '
+            f'{"  " * depth}{record["kind"]} {record["name"]}{thread}'
+        )
+    return '\n'.join(lines) + '\n'
+
+
+def write(path=None):
+    """
+    Writes the profile of this process as '<pid>.json' and its summary
+    as '<pid>.txt' to 'path' (default PROFILE_PATH), if profiling is
+    enabled
+
+    Returns the path of the JSON file or None
+    """
+    if not ENABLED:
+        return None
+    from modules.prerender import write_atomic
+
+    path = path or PROFILE_PATH
+    profile = report()
+    file_path = os.path.join(path, f'{profile["pid"]}.json')
+    write_atomic(file_path, json.dumps(profile))
+    write_atomic(
+        os.path.join(path, f'{profile["pid"]}.txt'), summary(profile)
+    )
+    return file_path
+
+
+if ENABLED and not any(
+    isinstance(finder, _ImportTimer) for finder in sys.meta_path
+):
+    sys.meta_path.insert(0, _ImportTimer())
@@ -0,0 +1,85 @@
+/*
+ * Answers the requests of the Dash renderer from a static export (see
+ * 'modules/static_export.py'). Layout and dependencies are read from
+ * their exported JSON files, callback requests are looked up in the
+ * exported callback outputs. Requests outside the export are answered
+ * with 204 (no update), which keeps the current outputs.
+ */
+(function () {
+    'use strict';
+
+    var base = document.currentScript.src.replace(/_static\/[^/]*$/, '');
+    var serverFetch = window.fetch.bind(window);
+    var loaded = {};
+
+    function load(path) {
+        if (!loaded[path]) {
+            loaded[path] = serverFetch(base + path).then(function (res) {
+                if (!res.ok) {
+                    throw new Error(path + ': ' + res.status);
+                }
+                return res.json();
+            });
+        }
+        return loaded[path];
+    }
+
+    function value(input) {
+        if (Array.isArray(input)) {
+            return input.map(value);
+        }
+        return input.value === undefined ? null : input.value;
+    }
+
+    // Must give the same string as 'request_key' of static_export.py
+    function requestKey(mode, body) {
+        if (mode === 'trigger') {
+            return JSON.stringify(body.changedPropIds || []);
+        }
+        return JSON.stringify(
+            (body.inputs || []).concat(body.state || []).map(value)
+        );
+    }
+
+    function noUpdate(reason) {
+        console.warn('Not in the static export:', reason);
+        return new Response(null, {status: 204});
+    }
+
+    function update(body) {
+        return load('_static/callbacks.json').then(function (callbacks) {
+            if (!callbacks[body.output]) {
+                return noUpdate(body.output);
+            }
+            return load(callbacks[body.output]).then(function (index) {
+                var key = requestKey(index.mode, body);
+                var position = index.keys[key];
+                if (position === undefined || position < 0) {
+                    return position < 0
+                        ? new Response(null, {status: 204})
+                        : noUpdate(body.output + ' ' + key);
+                }
+                var digest = index.objects[position];
+                return serverFetch(
+                    base + '_static/objects/' + digest.slice(0, 2) + '/' +
+                    digest + '.json'
+                );
+            });
+        }).catch(noUpdate);
+    }
+
+    window.fetch = function (resource, options) {
+        var url = new URL(
+            typeof resource === 'string' ? resource : resource.url,
+            window.location.href
+        );
+        var name = url.pathname.split('/').pop();
+        if (name === '_dash-layout' || name === '_dash-dependencies') {
+            return serverFetch(base + name + '.json');
+        }
+        if (name === '_dash-update-component') {
+            return update(JSON.parse(options.body));
+        }
+        return serverFetch(resource, options);
+    };
+}());
@@ -0,0 +1,522 @@
+"""
+Static export of the whole app for hosting without a Python server.
+
+Writes every page as HTML together with the scripts and assets it loads,
+the layout, the callback dependencies and the response of every
+reachable callback request:
+
+    python -m modules.static_export [--output DIR] [--jobs N]
+    python -m modules.static_export --check [--output DIR]
+
+A script added to every page ('static_export.js') answers the requests
+of the Dash renderer from the exported files, so the directory can be
+served by any static file server or CDN:
+
+    python -m http.server --directory build/static
+
+The requests are built from 'prerender_inputs' of the pages (see
+'prerender') and from 'prerender_triggers' for callbacks that only
+depend on which of their inputs triggered them. Responses are stored
+content addressed, so equal responses are stored once.
+"""
+
+import argparse
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import multiprocessing
+import os
+import random
+import re
+import shutil
+import sys
+import threading
+import time
+import urllib.request
+
+from concurrent.futures import ProcessPoolExecutor
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from modules.prerender import object_path, write_atomic
+
+
+logger = logging.getLogger(__name__)
+
+EXPORT_PATH = os.environ.get('F1_STATIC_EXPORT_PATH', 'build/static/')
+
+# Script answering the renderer requests, and its url in the export
+SCRIPT_PATH = os.path.join(os.path.dirname(__file__), 'static_export.js')
+SCRIPT_URL = '_static/dash-static.js'
+
+# Id of the location component of 'dash.page_container'
+PAGES_LOCATION = '_pages_location'
+
+# Async chunks of the component suite bundles and the fingerprint
+# webpack adds to their file names
+_chunk_names = re.compile(r'\{((?:\d+:"[^"]+",?)+)\}\[\w\]\+"\.js"')
+_chunk_fingerprint = re.compile(r'splice\(1,0,"(v[0-9a-z_]+m\d+)"\)')
+_local_url = re.compile(r'(?:src|href)="(/[^/"][^"]*)"')
+
+# Export directory and url prefix of the running export, inherited by
+# the pool
+_output = EXPORT_PATH
+_prefix = '/'
+_client = None
+
+
+def _test_client():
+    global _client
+    if _client is None:
+        import app
+
+        _client = app.server.test_client()
+    return _client
+
+
+def _file_path(output, url):
+    # Url of the app to the exported file, pages become directories
+    path = url.split('?')[0][len(_prefix):]
+    if path == '' or path.endswith('/'):
+        path += 'index.html'
+    elif '.' not in path.rsplit('/', 1)[-1]:
+        path += '/index.html'
+    return os.path.join(output, path)
+
+
+def _value(item):
+    if isinstance(item, list):
+        return [_value(entry) for entry in item]
+    return item.get('value')
+
+
+def request_key(mode, body):
+    """
+    Returns the key of the callback request 'body', the same string as
+    'requestKey' of the exported script
+
+    The key is built from the input and state values or, with mode
+    'trigger', from the ids of the inputs that triggered the callback
+    """
+    if mode == 'trigger':
+        parts = body.get('changedPropIds', [])
+    else:
+        parts = [
+            _value(item)
+            for item in body.get('inputs', []) + body.get('state', [])
+        ]
+    # Like JSON.stringify: no spaces and no escaped unicode
+    return json.dumps(parts, ensure_ascii=False, separators=(',', ':'))
+
+
+def _request(dependency, values, changed):
+    """
+    Returns the body the renderer sends for the callback 'dependency'
+    with the input 'values' after the inputs 'changed' changed
+    """
+    outputs = []
+    for output in dependency['output'].strip('.').split('...'):
+        component_id, prop = output.rsplit('.', 1)
+        outputs.append({'id': component_id, 'property': prop})
+    multi = dependency['output'].startswith('..')
+    return {
+        'output': dependency['output'],
+        'outputs': outputs if multi else outputs[0],
+        'inputs': [
+            dict(item, value=value)
+            for item, value in zip(dependency['inputs'], values)
+        ],
+        'changedPropIds': changed,
+        'state': [],
+    }
+
+
+def collect_requests(only=None):
+    """
+    Returns the output, key mode and body of every reachable callback
+    request of the registered pages, optionally only of the callbacks
+    'only' and page navigation
+    """
+    import dash
+
+    import app
+
+    # Reachable inputs by undecorated callback
+    reachable = {}
+    for page in dash.page_registry.values():
+        module = sys.modules[page['module']]
+        for name, mode in (
+            ('prerender_inputs', 'inputs'),
+            ('prerender_triggers', 'trigger'),
+        ):
+            if hasattr(module, name):
+                for callback, inputs in getattr(module, name)().items():
+                    reachable[inspect.unwrap(callback)] = mode, inputs
+
+    # Pages are reached by link (no trailing slash) or by their directory
+    paths = dict.fromkeys(
+        variant
+        for page in dash.page_registry.values()
+        for variant in (page['path'], page['path'].rstrip('/') + '/')
+    )
+
+    dependencies = _test_client().get(
+        _prefix + '_dash-dependencies'
+    ).get_json()
+    requests = []
+    for dependency in dependencies:
+        if dependency['clientside_function']:
+            continue
+        output = dependency['output']
+        if dependency['inputs'][0]['id'] == PAGES_LOCATION:
+            requests.extend(
+                (output, 'inputs', _request(
+                    dependency, [path, ''], [f'{PAGES_LOCATION}.pathname']
+                ))
+                for path in paths
+            )
+            continue
+
+        callback = inspect.unwrap(app.app.callback_map[output]['callback'])
+        if only and callback.__name__ not in only:
+            continue
+        if callback not in reachable:
+            logger.warning('No reachable inputs of %s', output)
+            continue
+        mode, inputs = reachable[callback]
+        if mode == 'trigger':
+            # Initial call, then one click (value 1) on every trigger
+            ids = [
+                f'{item["id"]}.{item["property"]}'
+                for item in dependency['inputs']
+            ]
+            requests.append(
+                (output, mode, _request(dependency, [None] * len(ids), []))
+            )
+            requests.extend(
+                (output, mode, _request(
+                    dependency,
+                    [1 if prop_id == trigger else None for prop_id in ids],
+                    [trigger],
+                ))
+                for trigger in inputs
+            )
+        else:
+            requests.extend(
+                (output, mode, _request(dependency, list(values), []))
+                for values in inputs
+            )
+    return requests
+
+
+def respond(task):
+    """
+    Sends the callback request of 'task' to the app and stores the
+    response
+
+    Returns the output, key mode and key of the request together with
+    the digest of the response ('' for no update, None if it failed)
+    """
+    output, mode, body = task
+    key = request_key(mode, body)
+    response = _test_client().post(
+        _prefix + '_dash-update-component', json=body
+    )
+    if response.status_code == 204:
+        return output, mode, key, ''
+    if response.status_code != 200:
+        logger.warning('%s %s failed: %d', output, key, response.status_code)
+        return output, mode, key, None
+
+    payload = response.get_data()
+    digest = hashlib.sha256(payload).hexdigest()
+    file_path = object_path(os.path.join(_output, '_static'), digest)
+    if not os.path.exists(file_path):
+        write_atomic(file_path, payload)
+    return output, mode, key, digest
+
+
+def _resource_urls(pages):
+    """
+    Returns the urls of the scripts, styles and assets the exported
+    'pages' (html by url) load
+    """
+    import app
+
+    urls = {
+        url
+        for html in pages.values()
+        for url in _local_url.findall(html)
+        if url != _prefix + SCRIPT_URL
+    }
+
+    # Scripts loaded by the renderer on demand (e.g. plotly.js)
+    for package, paths in app.app.registered_paths.items():
+        urls.update(
+            f'{_prefix}_dash-component-suites/{package}/{path}'
+            for path in paths
+            if not path.endswith('.map')
+        )
+
+    assets = app.app.config.assets_folder
+    for directory, _, names in os.walk(assets):
+        urls.update(
+            app.app.get_asset_url(
+                os.path.relpath(os.path.join(directory, name), assets)
+            )
+            for name in names
+        )
+    return sorted(urls)
+
+
+def export(output=EXPORT_PATH, jobs=None, only=None):
+    """
+    Exports the app into the directory 'output', rendering the callback
+    responses with 'jobs' processes (default: all cores)
+
+    Returns the exported callbacks with the file of their index
+    """
+    global _output, _prefix
+    import dash
+
+    import app
+    import modules.providers as providers
+
+    # Forked workers share the page data instead of computing it again
+    providers.warm_all()
+    _output = output
+    _prefix = app.app.config.requests_pathname_prefix
+    client = _test_client()
+    start = time.perf_counter()
+    shutil.rmtree(os.path.join(output, '_static'), ignore_errors=True)
+
+    # Pages, with the script answering the renderer requests
+    pages = {}
+    for page in dash.page_registry.values():
+        url = _prefix + page['path'].lstrip('/')
+        pages[url] = client.get(url).get_data(as_text=True).replace(
+            '<script id="_dash-config"',
+            f'<script src="{_prefix}{SCRIPT_URL}"></script>\n'
+            '<script id="_dash-config"',
+            1,
+        )
+        write_atomic(_file_path(output, url), pages[url])
+    with open(SCRIPT_PATH, encoding='utf-8') as file:
+        write_atomic(os.path.join(output, SCRIPT_URL), file.read())
+
+    # Scripts, styles and assets
+    resources = _resource_urls(pages)
+    for url in resources:
+        response = client.get(url)
+        if response.status_code != 200:
+            logger.warning('%s: %d', url, response.status_code)
+            continue
+        write_atomic(_file_path(output, url), response.get_data())
+
+        # Async chunks are requested with the fingerprint of their bundle
+        script = response.get_data(as_text=True) if url.endswith('.js') else ''
+        directory = url.rsplit('/', 1)[0]
+        for names, fingerprint in zip(
+            _chunk_names.findall(script), _chunk_fingerprint.findall(script)
+        ):
+            for name in re.findall(r'"([^"]+)"', names):
+                write_atomic(
+                    _file_path(
+                        output, f'{directory}/{name}.{fingerprint}.js'
+                    ),
+                    client.get(f'{directory}/{name}.js').get_data(),
+                )
+
+    for name in ('_dash-layout', '_dash-dependencies'):
+        write_atomic(
+            os.path.join(output, f'{name}.json'),
+            client.get(_prefix + name).get_data(),
+        )
+
+    # Callback responses
+    tasks = collect_requests(only)
+    jobs = jobs or os.cpu_count() or 1
+    logger.info(
+        'Exporting %d callback responses with %d jobs', len(tasks), jobs
+    )
+    if jobs == 1:
+        results = map(respond, tasks)
+    else:
+        # Forked workers share the loaded datasets and registered callbacks
+        pool = ProcessPoolExecutor(
+            jobs, mp_context=multiprocessing.get_context('fork')
+        )
+        results = pool.map(respond, tasks, chunksize=16)
+
+    indexes = {}
+    failed = 0
+    for output_id, mode, key, digest in results:
+        if digest is None:
+            failed += 1
+            continue
+        index = indexes.setdefault(output_id, {'mode': mode, 'keys': {}})
+        index['keys'][key] = digest
+    if jobs != 1:
+        pool.shutdown()
+
+    # Index of every callback: request key to position in its objects,
+    # -1 for no update
+    callbacks = {}
+    for output_id, index in sorted(indexes.items()):
+        objects = sorted(set(index['keys'].values()) - {''})
+        positions = {digest: position for position, digest in enumerate(
+            objects
+        )}
+        name = hashlib.sha256(output_id.encode()).hexdigest()[:16]
+        callbacks[output_id] = f'_static/callbacks/{name}.json'
+        write_atomic(
+            os.path.join(output, callbacks[output_id]),
+            json.dumps(
+                {
+                    'mode': index['mode'],
+                    'objects': objects,
+                    'keys': {
+                        key: positions.get(digest, -1)
+                        for key, digest in index['keys'].items()
+                    },
+                },
+                ensure_ascii=False,
+                separators=(',', ':'),
+                sort_keys=True,
+            ),
+        )
+    write_atomic(
+        os.path.join(output, '_static', 'callbacks.json'),
+        json.dumps(callbacks, separators=(',', ':'), sort_keys=True),
+    )
+
+    size = sum(
+        os.path.getsize(os.path.join(directory, name))
+        for directory, _, names in os.walk(output)
+        for name in names
+    )
+    logger.info(
+        'Exported %d pages, %d resources and %d callback responses '
+        '(%d failed) into %s (%.1f MiB) in %.1f s',
+        len(pages),
+        len(resources),
+        len(tasks) - failed,
+        failed,
+        output,
+        size / 2**20,
+        time.perf_counter() - start,
+    )
+    return callbacks
+
+
+def check(output=EXPORT_PATH, samples=200):
+    """
+    Serves the export at 'output' with a local static file server and
+    requests everything the pages load. 'samples' callback requests are
+    compared with the responses of the app.
+
+    Returns the problems found
+    """
+    global _prefix
+    import dash
+
+    import app
+
+    _prefix = app.app.config.requests_pathname_prefix
+    server = ThreadingHTTPServer(
+        ('127.0.0.1', 0),
+        functools.partial(SimpleHTTPRequestHandler, directory=output),
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_address[1]}/'
+    problems = []
+
+    def get(url):
+        try:
+            with urllib.request.urlopen(base + url[len(_prefix):]) as res:
+                return res.read()
+        except OSError as error:
+            problems.append(f'{url}: {error}')
+            return None
+
+    # Pages and everything they load
+    pages = {}
+    for page in dash.page_registry.values():
+        url = _prefix + page['path'].lstrip('/')
+        html = get(url)
+        if html is not None:
+            pages[url] = html.decode()
+            if SCRIPT_URL not in pages[url]:
+                problems.append(f'{url}: {SCRIPT_URL} is not loaded')
+    for url in _resource_urls(pages) + [
+        _prefix + SCRIPT_URL,
+        _prefix + '_dash-layout.json',
+        _prefix + '_dash-dependencies.json',
+    ]:
+        get(url)
+
+    # Every indexed response exists
+    callbacks = json.loads(get(_prefix + '_static/callbacks.json') or '{}')
+    indexes = {}
+    for output_id, index_url in callbacks.items():
+        indexes[output_id] = json.loads(get(_prefix + index_url) or '{}')
+        problems.extend(
+            f'{output_id}: missing response {digest}'
+            for digest in indexes[output_id].get('objects', [])
+            if not os.path.exists(
+                object_path(os.path.join(output, '_static'), digest)
+            )
+        )
+
+    # Sampled requests answer like the app
+    tasks = collect_requests()
+    client = _test_client()
+    for output_id, mode, body in random.Random(0).sample(
+        tasks, min(samples, len(tasks))
+    ):
+        key = request_key(mode, body)
+        position = indexes.get(output_id, {}).get('keys', {}).get(key)
+        response = client.post(_prefix + '_dash-update-component', json=body)
+        if position is None:
+            if response.status_code in (200, 204):
+                problems.append(f'{output_id} {key}: not exported')
+            continue
+        if position < 0:
+            exported = None
+        else:
+            digest = indexes[output_id]['objects'][position]
+            exported = json.loads(get(
+                f'{_prefix}_static/objects/{digest[:2]}/{digest}.json'
+            ) or 'null')
+        if exported != (response.get_json() if position >= 0 else None):
+            problems.append(f'{output_id} {key}: differs from the app')
+
+    server.shutdown()
+    logger.info(
+        'Checked %d pages and %d sampled callback requests: %d problems',
+        len(pages),
+        min(samples, len(tasks)),
+        len(problems),
+    )
+    return problems
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', default=EXPORT_PATH)
+    parser.add_argument('--jobs', type=int, default=None)
+    parser.add_argument('--only', nargs='*', default=None)
+    parser.add_argument('--check', action='store_true')
+    arguments = parser.parse_args()
+
+    # Run the imported module, its functions are the ones the pool pickles
+    from modules import static_export as module
+
+    logging.basicConfig(level=logging.INFO)
+    if arguments.check:
+        found = module.check(arguments.output)
+        for problem in found:
+            logger.error(problem)
+        sys.exit(1 if found else 0)
+    module.export(arguments.output, arguments.jobs, arguments.only)
@@ -0,0 +1,246 @@
+"""
+Warm-up of the figures the pages show first.
+
+The first page that asks for one of these figures starts warm-up
+processes ('python -m modules.warmup') that build all of them, the pages
+then only wait for the ones that are not done yet. The processes write
+each figure serialized as plotly JSON together with its build time and
+exit, and 'figure' returns it as that JSON, so the figures are not
+validated and serialized again:
+
+    @providers.provider
+    def figure_all_time_standings():
+        return warmup.figure('all_time_standings')
+
+Set F1_WARMUP_JOBS to the number of warm-up processes, F1_WARMUP_JOBS=0
+builds every figure in the process that asks for it. Every app process
+(e.g. every gunicorn worker) starts its own, so the default is one and
+the number is capped at the cores.
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from concurrent.futures import Future
+
+import plotly.io as pio
+
+from plotly.io.json import to_json_plotly
+
+import modules.crash_vis_mod as cvm
+import modules.datastore as datastore
+import modules.driver_standings_mod as ds
+import modules.driver_standings_vis_mod as dsv
+import modules.startup_profile as startup_profile
+import modules.weather_crash_vis_mod as wcvm
+
+
+logger = logging.getLogger(__name__)
+
+
+######## Figures of the grid position page ########
+
+
+def _all_time_standings():
+    return dsv.create_figure_all_time_standings(
+        datastore.get('season_results')
+    )
+
+
+def _start_avg_placements():
+    return dsv.create_fig_start_avg_placements(
+        datastore.get('season_results'),
+        datastore.get('season_results_weather'),
+    )
+
+
+def _grid_finish(driver):
+    return dsv.create_grid_finish_figure(
+        driver,
+        datastore.get('season_results'),
+        datastore.row_index('season_results', 'driver_name'),
+    )
+
+
+def _driver_conditions(create_figure):
+    df_weather = datastore.get('season_results_weather')
+    return create_figure(
+        df_weather, placements=ds.condition_placements(df_weather)
+    )
+
+
+def _avg_all_drivers():
+    df = datastore.get('season_results')
+    df_weather = datastore.get('season_results_weather')
+    return dsv.create_avg_all_drivers_figure(
+        dsv.DEFAULT_RACES, df, df_weather, ds.driver_careers(df, df_weather)
+    )
+
+
+######## Figures of the retirements page ########
+
+
+def _retirements(create_figure, dataset):
+    wcvm.init_figs()
+    fig = create_figure(datastore.get(dataset))
+    fig.update_layout(
+        autosize=True,
+        margin=dict(l=70, r=40, t=80, b=40),
+    )
+    return fig
+
+
+# Builders of the warmed up figures by name
+FIGURES = {
+    'all_time_standings': _all_time_standings,
+    'start_avg_placements': _start_avg_placements,
+    'grid_finish_placeholder': lambda: _grid_finish(''),
+    'grid_finish_initial': lambda: _grid_finish(dsv.DEFAULT_DRIVER),
+    'driver_mw': lambda: _driver_conditions(dsv.driver_standings_mw),
+    'driver_dry': lambda: _driver_conditions(dsv.driver_standings_dry),
+    'avg_all_drivers_initial': _avg_all_drivers,
+    'crashes_weather': lambda: _retirements(
+        wcvm.create_fig_CraWeath, 'crashes_weather'
+    ),
+    'total_incidents': lambda: _retirements(
+        cvm.total_incidents_by_year, 'race_status'
+    ),
+    'retirements_rate': lambda: _retirements(
+        cvm.yearly_retirements_rate, 'race_status'
+    ),
+    'retirements_race': lambda: _retirements(
+        cvm.average_yearly_retirements, 'race_status'
+    ),
+}
+
+JOBS = min(
+    int(os.environ.get('F1_WARMUP_JOBS', 1)),
+    os.cpu_count() or 1,
+    len(FIGURES),
+)
+
+# Pending builds of the warm-up processes, started by the first call of
+# 'figure'
+_started = False
+_futures = {}
+_lock = threading.Lock()
+
+
+def build(name, template=None):
+    """
+    Builds the figure 'name' with the default template 'template' (by
+    default the one of the process)
+
+    Returns the name, the figure as plotly JSON and the build time in
+    seconds
+    """
+    # Builders may change the default template, the next one sees the
+    # template the page asking for it would see
+    previous = pio.templates.default
+    if template is not None:
+        pio.templates.default = template
+    start = time.perf_counter()
+    try:
+        payload = to_json_plotly(FIGURES[name]())
+    finally:
+        pio.templates.default = previous
+    return name, payload, time.perf_counter() - start
+
+
+def _read(process, futures):
+    # Hands out the figures of a warm-up process as it writes them
+    try:
+        for line in process.stdout:
+            name, payload, seconds = json.loads(line)
+            futures.pop(name).set_result((name, payload, seconds))
+    finally:
+        process.stdout.close()
+        error = RuntimeError(
+            f'warm-up process exited with code {process.wait()}'
+        )
+        for future in futures.values():
+            future.set_exception(error)
+
+
+def spawn(names, jobs, template=None):
+    """
+    Starts 'jobs' warm-up processes that build the figures 'names'
+    between them with the default template 'template' (by default the
+    one of this process)
+
+    Returns the futures of the results of 'build' by figure name
+    """
+    # The processes don't import the pages, they build with the template
+    # the pages set in this process
+    template = template or pio.templates.default
+    names = list(names)
+    futures = {}
+    for job in range(jobs):
+        share = {name: Future() for name in names[job::jobs]}
+        process = subprocess.Popen(
+            [sys.executable, '-m', __name__, template, *share],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        threading.Thread(
+            target=_read, args=(process, dict(share)), daemon=True
+        ).start()
+        futures.update(share)
+    return futures
+
+
+def _start():
+    # Workers of another pool (e.g. the prerender) don't start their own
+    if not JOBS or multiprocessing.current_process().daemon:
+        return
+    _futures.update(spawn(FIGURES, JOBS))
+    logger.info(
+        'Warming up %d figures in %d processes', len(FIGURES), JOBS
+    )
+
+
+def figure(name):
+    """
+    Returns the figure 'name' of FIGURES as plotly JSON, built by a
+    warm-up process or, without one, in this process
+    """
+    global _started
+    with _lock:
+        if not _started:
+            _started = True
+            _start()
+        future = _futures.pop(name, None)
+
+    start = time.perf_counter()
+    result = None
+    with startup_profile.span(name, 'figure') as record:
+        if future is not None:
+            try:
+                result = future.result()
+            except Exception as error:  # noqa: BLE001 - built here instead
+                logger.warning('Warm-up of %s failed: %r', name, error)
+        if result is None:
+            result = build(name)
+        name, payload, seconds = result
+        record['build_seconds'] = seconds
+    logger.info(
+        'Figure %s built in %.3f s, waited %.3f s',
+        name,
+        seconds,
+        time.perf_counter() - start,
+    )
+    return json.loads(payload)
+
+
+if __name__ == '__main__':
+    # A warm-up process: builds the figures named after the template and
+    # writes each result of 'build' as a JSON line
+    template, *names = sys.argv[1:]
+    for name in names:
+        print(json.dumps(build(name, template)), flush=True)
@@ -1,12 +1,17 @@
-import pandas as pd
 import dash
 
-from dash import Input, Output, dcc, html
+from dash import ClientsideFunction, Input, Output, State, dcc, html
 
 import dash_bootstrap_components as dbc
 
+import modules.datastore as datastore
 import modules.driver_standings_mod as ds
 import modules.driver_standings_vis_mod as dsv
+import modules.providers as providers
+import modules.warmup as warmup
+
+from modules.callback_cache import cached_callback
+from modules.figure_patch import figure_patch
 
 
 ####### Initialize the Dash app #######
@@ -17,32 +22,160 @@ dash.register_page(
 
 ############## Load Data ##############
 
-df = pd.read_csv('data/f1_1994_2024_season_results.csv')
+# Data of the page is computed on first use or by the prewarm once the
+# server runs (see 'modules.providers')
 
 
-name = ''
+@providers.provider
+def df():
+    return datastore.get('season_results')
 
-df_weather = pd.read_csv(
-    'data/f1_1994_2024_season_results_completed_weather.csv'
-)
+
+@providers.provider
+def df_weather():
+    return datastore.get('season_results_weather')
+
+
+# Row indexes for per driver and per circuit lookups without full scans
+@providers.provider
+def driver_index():
+    return datastore.row_index('season_results', 'driver_name')
+
+
+@providers.provider
+def circuit_index():
+    return datastore.row_index('season_results', 'circuit_id')
+
+
+# Grid and finish counts of every circuit for the circuit heatmap
+@providers.provider
+def circuit_tensor():
+    return ds.circuit_standings_tensor(df())
+
+
+# Dropdown options of every slider step, looked up by the callbacks
+@providers.provider
+def driver_options():
+    return {
+        driver_count: dsv.get_driver_options(
+            driver_count, df(), driver_index()
+        )
+        for driver_count in dsv.RACES_SLIDER_STEPS
+    }
+
+
+@providers.provider
+def circuit_options():
+    return {
+        slider_value: dsv.get_circuit_options(
+            slider_value * 20, df(), circuit_index()
+        )
+        for slider_value in dsv.CIRCUIT_SLIDER_STEPS
+    }
 
 
 ############ Create Graphs ############
 
-figure_all_time_standings = dsv.create_figure_all_time_standings(df)
-figure_start_avg_placements = dsv.create_fig_start_avg_placements(
-    df, df_weather
-)
-spcific_driver_layout = dsv.create_grid_finish_figure(name, df)
+# Figures of the initial layout, built by the warm-up pool (see warmup)
+@providers.provider
+def figure_all_time_standings():
+    return warmup.figure('all_time_standings')
+
+
+@providers.provider
+def figure_start_avg_placements():
+    return warmup.figure('start_avg_placements')
+
+
+@providers.provider
+def spcific_driver_layout():
+    return warmup.figure('grid_finish_placeholder')
+
+
+# Average placements of every driver per weather condition
+@providers.provider
+def figure_driver_mw():
+    return warmup.figure('driver_mw')
+
 
-figure_driver_mw = dsv.driver_standings_mw(df_weather)
-figure_driver_dry = dsv.driver_standings_dry(df_weather)
+@providers.provider
+def figure_driver_dry():
+    return warmup.figure('driver_dry')
+
+
+# Races and average placements of every driver for the races slider
+@providers.provider
+def careers():
+    return ds.driver_careers(df(), df_weather())
+
+
+# The figures of all slider steps are only built with F1_PREBUILD_FIGURES=1
+@providers.provider
+def avg_all_drivers_figures():
+    if not dsv.PREBUILD_FIGURES:
+        return {}
+    return dsv.create_avg_all_drivers_figures(df(), df_weather(), careers())
+
+
+def avg_all_drivers_figure(amount_of_races):
+    """
+    Returns the average placements figure of 'amount_of_races'
+    """
+    if amount_of_races in avg_all_drivers_figures():
+        return avg_all_drivers_figures()[amount_of_races]
+    return dsv.create_avg_all_drivers_figure(
+        amount_of_races, df(), df_weather(), careers()
+    )
+
+
+# Patches between the figures of both weather conditions, the graphs are
+# updated by patches and show the figures of the initial values first
+@providers.provider
+def figure_driver_dry_patch():
+    return figure_patch(figure_driver_dry())
+
+
+@providers.provider
+def figure_driver_mw_patch():
+    return figure_patch(figure_driver_mw())
 
 
 circuit_heatmap = dsv.create_circuit_heatmap_layout()
-driver_grid_start_finish = dsv.create_grid_finish_figure_layout()
-all_drivers_avg = dsv.create_avg_all_drivers_figure_layout()
-driver_conditions = dsv.create_driver_conditions_layout()
+
+
+# Data the circuit heatmap is built from in the browser
+@providers.provider
+def circuit_heatmap_store():
+    return dcc.Store(
+        id='circuit-heatmap-store',
+        data=(
+            dsv.circuit_heatmap_store_data(
+                circuit_tensor(), df(), circuit_index()
+            )
+            if dsv.CLIENTSIDE_HEATMAP
+            else None
+        ),
+    )
+
+
+@providers.provider
+def driver_grid_start_finish():
+    return dsv.create_grid_finish_figure_layout(
+        warmup.figure('grid_finish_initial')
+    )
+
+
+@providers.provider
+def all_drivers_avg():
+    return dsv.create_avg_all_drivers_figure_layout(
+        warmup.figure('avg_all_drivers_initial')
+    )
+
+
+@providers.provider
+def driver_conditions():
+    return dsv.create_driver_conditions_layout(figure_driver_dry())
+
 
 ########## Set up the layout ##########
 question_1_exp = """Qualifying takes place a day before the race and determines
@@ -112,371 +245,385 @@ will be displayed.
 """
 
 
-layout = html.Div(
-    [
-        dbc.Row(
-            dbc.Col(
-                html.Div(className='chequered-flag'),
-            ),
-            className='mb-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.H1(
-                    [
-                        'How does the starting grid position influence the '
-                        'finishing position of drivers in the seasons '
-                        'from 1994 - 2024?',
-                    ],
-                    className='text-center page-header text-light',
+@providers.provider
+def page_layout():
+    """
+    Returns the layout of the page, built on first use
+    """
+    return html.Div(
+        [
+            dbc.Row(
+                dbc.Col(
+                    html.Div(className='chequered-flag'),
                 ),
+                className='mb-4',
             ),
-            className='mb-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.P(
-                            question_1_exp,
-                        ),
-                    ],
-                    className='p-3 text-light',
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                        'backgroundColor': '#212529',
-                        'border-radius': '10px',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.H1(
+                        [
+                            'How does the starting grid position influence '
+                            'the finishing position of drivers in the seasons '
+                            'from 1994 - 2024?',
+                        ],
+                        className='text-center page-header text-light',
+                    ),
                 ),
+                className='mb-4',
             ),
-            className='mb-2 mt-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    children=[
-                        dcc.Graph(
-                            figure=figure_all_time_standings,
-                            config={'responsive': True},
-                        ),
-                    ],
-                    style={
-                        'margin': '0 auto',
-                        'width': '89%',
-                        'justifyContent': 'center',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.P(
+                                question_1_exp,
+                            ),
+                        ],
+                        className='p-3 text-light',
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                            'backgroundColor': '#212529',
+                            'border-radius': '10px',
+                        },
+                    ),
                 ),
+                className='mb-2 mt-4',
             ),
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.P(
-                            graph_one,
-                        ),
-                    ],
-                    className='p-3 text-light',
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                        'backgroundColor': '#212529',
-                        'border-radius': '10px',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        children=[
+                            dcc.Graph(
+                                figure=figure_all_time_standings(),
+                                config={'responsive': True},
+                            ),
+                        ],
+                        style={
+                            'margin': '0 auto',
+                            'width': '89%',
+                            'justifyContent': 'center',
+                        },
+                    ),
                 ),
             ),
-            className='mt-2 mb-5',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    children=[
-                        dcc.Graph(
-                            figure=figure_start_avg_placements,
-                            config={'responsive': True},
-                        ),
-                    ],
-                    style={
-                        'margin': '0 auto',
-                        'width': '89%',
-                        'justifyContent': 'center',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.P(
+                                graph_one,
+                            ),
+                        ],
+                        className='p-3 text-light',
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                            'backgroundColor': '#212529',
+                            'border-radius': '10px',
+                        },
+                    ),
                 ),
+                className='mt-2 mb-5',
             ),
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.P(
-                            all_time_standings_explanation,
-                        ),
-                    ],
-                    className='p-3 text-light',
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                        'backgroundColor': '#212529',
-                        'border-radius': '10px',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        children=[
+                            dcc.Graph(
+                                figure=figure_start_avg_placements(),
+                                config={'responsive': True},
+                            ),
+                        ],
+                        style={
+                            'margin': '0 auto',
+                            'width': '89%',
+                            'justifyContent': 'center',
+                        },
+                    ),
                 ),
             ),
-            className='mt-2 mb-5',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(className='chequered-flag'),
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.P(
+                                all_time_standings_explanation,
+                            ),
+                        ],
+                        className='p-3 text-light',
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                            'backgroundColor': '#212529',
+                            'border-radius': '10px',
+                        },
+                    ),
+                ),
+                className='mt-2 mb-5',
             ),
-            className='mb-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.H1(
-                    [
-                        'How does this differ between circuits that have '
-                        'been driven on at least X times?',
-                    ],
-                    className='text-center page-header text-light',
+            dbc.Row(
+                dbc.Col(
+                    html.Div(className='chequered-flag'),
                 ),
+                className='mb-4',
             ),
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.P(
-                            question_2_exp,
-                        ),
-                    ],
-                    className='p-3 text-light',
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                        'backgroundColor': '#212529',
-                        'border-radius': '10px',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.H1(
+                        [
+                            'How does this differ between circuits that have '
+                            'been driven on at least X times?',
+                        ],
+                        className='text-center page-header text-light',
+                    ),
                 ),
             ),
-            className='mb-2 mt-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    circuit_heatmap,
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.P(
+                                question_2_exp,
+                            ),
+                        ],
+                        className='p-3 text-light',
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                            'backgroundColor': '#212529',
+                            'border-radius': '10px',
+                        },
+                    ),
                 ),
+                className='mb-2 mt-4',
             ),
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.P(
-                            circuit_explanation,
-                        ),
-                    ],
-                    className='p-3 text-light',
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                        'backgroundColor': '#212529',
-                        'border-radius': '10px',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [circuit_heatmap, circuit_heatmap_store()],
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                        },
+                    ),
                 ),
             ),
-            className='mt-2 mb-5',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(className='chequered-flag'),
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.P(
+                                circuit_explanation,
+                            ),
+                        ],
+                        className='p-3 text-light',
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                            'backgroundColor': '#212529',
+                            'border-radius': '10px',
+                        },
+                    ),
+                ),
+                className='mt-2 mb-5',
             ),
-            className='mb-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.H1(
-                    [
-                        'How does this differ between drivers of different '
-                        'experience levels (as determined by the amount of '
-                        'races they participated in)?',
-                    ],
-                    className='text-center page-header text-light',
+            dbc.Row(
+                dbc.Col(
+                    html.Div(className='chequered-flag'),
                 ),
+                className='mb-4',
             ),
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.P(
-                            question_3_exp,
-                        ),
-                    ],
-                    className='p-3 text-light',
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                        'backgroundColor': '#212529',
-                        'border-radius': '10px',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.H1(
+                        [
+                            'How does this differ between drivers of '
+                            'different experience levels (as determined by the '
+                            'amount of races they participated in)?',
+                        ],
+                        className='text-center page-header text-light',
+                    ),
                 ),
             ),
-            className='mb-2 mt-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    driver_grid_start_finish,
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.P(
+                                question_3_exp,
+                            ),
+                        ],
+                        className='p-3 text-light',
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                            'backgroundColor': '#212529',
+                            'border-radius': '10px',
+                        },
+                    ),
                 ),
+                className='mb-2 mt-4',
             ),
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.P(
-                            graph_four,
-                        ),
-                    ],
-                    className='p-3 text-light',
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                        'backgroundColor': '#212529',
-                        'border-radius': '10px',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        driver_grid_start_finish(),
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                        },
+                    ),
                 ),
             ),
-            className='mt-2 mb-5',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    all_drivers_avg,
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.P(
+                                graph_four,
+                            ),
+                        ],
+                        className='p-3 text-light',
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                            'backgroundColor': '#212529',
+                            'border-radius': '10px',
+                        },
+                    ),
                 ),
+                className='mt-2 mb-5',
             ),
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.P(
-                            specific_driver_standings_explanation,
-                        ),
-                    ],
-                    className='p-3 text-light',
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                        'backgroundColor': '#212529',
-                        'border-radius': '10px',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        all_drivers_avg(),
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                        },
+                    ),
                 ),
             ),
-            className='mb-5',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(className='chequered-flag'),
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.P(
+                                specific_driver_standings_explanation,
+                            ),
+                        ],
+                        className='p-3 text-light',
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                            'backgroundColor': '#212529',
+                            'border-radius': '10px',
+                        },
+                    ),
+                ),
+                className='mb-5',
             ),
-            className='mb-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.H1(
-                    [
-                        'Are there specific drivers who excel or struggle '
-                        'more in wet conditions compared to dry conditions?',
-                    ],
-                    className='text-center page-header text-light',
+            dbc.Row(
+                dbc.Col(
+                    html.Div(className='chequered-flag'),
                 ),
+                className='mb-4',
             ),
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.P(
-                            question_4_exp,
-                        ),
-                    ],
-                    className='p-3 text-light',
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                        'backgroundColor': '#212529',
-                        'border-radius': '10px',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.H1(
+                        [
+                            'Are there specific drivers who excel or struggle '
+                            'more in wet conditions compared to dry '
+                            'conditions?',
+                        ],
+                        className='text-center page-header text-light',
+                    ),
                 ),
             ),
-            className='mb-2 mt-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    driver_conditions,
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                    },
-                )
-            )
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.P(
-                            weather_explanation,
-                        ),
-                    ],
-                    className='p-3 text-light',
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                        'backgroundColor': '#212529',
-                        'border-radius': '10px',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.P(
+                                question_4_exp,
+                            ),
+                        ],
+                        className='p-3 text-light',
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                            'backgroundColor': '#212529',
+                            'border-radius': '10px',
+                        },
+                    ),
                 ),
+                className='mb-2 mt-4',
             ),
-            className='mt-2 mb-5',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(className='chequered-flag'),
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        driver_conditions(),
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                        },
+                    )
+                )
             ),
-            className='mb-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    html.A(
-                        'Back to Top',
-                        href='#top',
-                        className='btn',
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.P(
+                                weather_explanation,
+                            ),
+                        ],
+                        className='p-3 text-light',
                         style={
-                            'backgroundColor': '#a36664',
-                            'color': 'white',
+                            'width': '89%',
+                            'margin': '0 auto',
+                            'backgroundColor': '#212529',
+                            'border-radius': '10px',
                         },
                     ),
-                    className='text-center',
                 ),
+                className='mt-2 mb-5',
             ),
-        ),
-    ],
-)
+            dbc.Row(
+                dbc.Col(
+                    html.Div(className='chequered-flag'),
+                ),
+                className='mb-4',
+            ),
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        html.A(
+                            'Back to Top',
+                            href='#top',
+                            className='btn',
+                            style={
+                                'backgroundColor': '#a36664',
+                                'color': 'white',
+                            },
+                        ),
+                        className='text-center',
+                    ),
+                ),
+            ),
+        ],
+    )
+
+
+def layout(**query_parameters):
+    """
+    Returns the layout of the page for Dash, which calls it on every
+    navigation to the page
+    """
+    return page_layout()
 
 
 ############ Callbacks #############
@@ -486,60 +633,132 @@ layout = html.Div(
     Output('driver-dropdown', 'options'),
     Input('driver-count-slider', 'value'),
 )
+@cached_callback()
 def update_driver_dropdown(driver_count):
-    drivers = ds.driver_list(driver_count, df)
-    drivers = sorted(drivers)
-    return [{'label': driver, 'value': driver} for driver in drivers]
+    if driver_count in driver_options():
+        return driver_options()[driver_count]
+    return dsv.get_driver_options(driver_count, df(), driver_index())
 
 
 @dash.callback(
     Output('grid-finish-positions', 'figure'),
     Input('driver-dropdown', 'value'),
+    prevent_initial_call=True,
 )
+@cached_callback()
 def update_grid_finish_figure(selected_driver):
-    return dsv.create_grid_finish_figure(selected_driver, df)
+    return figure_patch(
+        dsv.create_grid_finish_figure(selected_driver, df(), driver_index())
+    )
 
 
-@dash.callback(
-    [
-        Output('circuit-dropdown', 'options'),
-        Output('circuit-dropdown', 'value'),
-        Output('heatmap', 'figure'),
-    ],
-    [
-        Input('number-slider', 'value'),
-        Input('circuit-dropdown', 'value'),
-    ],
-)
+@cached_callback()
 def update_dropdown_and_heatmap(slider_value, selected_circuit):
-    return dsv.create_circuit_heatmap(slider_value, selected_circuit, df)
+    return dsv.create_circuit_heatmap(
+        slider_value,
+        selected_circuit,
+        df(),
+        circuit_index(),
+        circuit_tensor(),
+        circuit_options(),
+    )
+
+
+circuit_heatmap_outputs = [
+    Output('circuit-dropdown', 'options'),
+    Output('circuit-dropdown', 'value'),
+    Output('heatmap', 'figure'),
+]
+circuit_heatmap_inputs = [
+    Input('number-slider', 'value'),
+    Input('circuit-dropdown', 'value'),
+]
+
+if dsv.CLIENTSIDE_HEATMAP:
+    # Built from the circuit heatmap store by 'assets/circuit_heatmap.js'
+    dash.clientside_callback(
+        ClientsideFunction(namespace='circuitHeatmap', function_name='update'),
+        circuit_heatmap_outputs,
+        circuit_heatmap_inputs,
+        State('circuit-heatmap-store', 'data'),
+    )
+else:
+    dash.callback(circuit_heatmap_outputs, circuit_heatmap_inputs)(
+        update_dropdown_and_heatmap
+    )
 
 
 @dash.callback(
     Output('driver-placements', 'figure'),
     Input('races-slider', 'value'),
+    prevent_initial_call=True,
 )
+@cached_callback()
 def update_avg_all_drivers_graph(amount_of_races):
-    return dsv.create_avg_all_drivers_figure(
-        amount_of_races, df, df_weather
-    )
+    return figure_patch(avg_all_drivers_figure(amount_of_races))
 
 
 @dash.callback(
     Output('graph', 'figure'),
     [Input('dry-button', 'n_clicks'), Input('wet-button', 'n_clicks')],
-    prevent_initial_call=False,
+    prevent_initial_call=True,
 )
 def update_graph(dry_clicks, wet_clicks):
     # Determine which button was last clicked
     ctx = dash.callback_context
     if not ctx.triggered:
         # If no button has been clicked, return the default (dry) figure
-        return figure_driver_dry
+        return figure_driver_dry_patch()
 
     button_id = ctx.triggered[0]['prop_id'].split('.')[0]
 
     if button_id == 'dry-button':
-        return figure_driver_dry
+        return figure_driver_dry_patch()
     elif button_id == 'wet-button':
-        return figure_driver_mw
+        return figure_driver_mw_patch()
+
+
+############ Prerender inputs ############
+
+
+def prerender_inputs():
+    """
+    Returns the reachable inputs of the cached callbacks of this page
+    for the static snapshot (see 'modules.prerender')
+    """
+    # Dropdown values are the initial value, cleared (None) or an option
+    drivers = dict.fromkeys(
+        [None, dsv.DEFAULT_DRIVER]
+        + sorted(ds.driver_list(0, df(), driver_index()))
+    )
+    inputs = {
+        update_driver_dropdown: [
+            (driver_count,) for driver_count in dsv.RACES_SLIDER_STEPS
+        ],
+        update_grid_finish_figure: [(driver,) for driver in drivers],
+        update_avg_all_drivers_graph: [
+            (amount_of_races,) for amount_of_races in dsv.RACES_SLIDER_STEPS
+        ],
+    }
+
+    # Built in the browser unless F1_CLIENTSIDE_HEATMAP=0
+    if not dsv.CLIENTSIDE_HEATMAP:
+        circuits = dict.fromkeys(
+            [None, 'Silverstone']
+            + sorted(ds.circuit_list(20, df(), circuit_index()))
+        )
+        inputs[update_dropdown_and_heatmap] = [
+            (slider_value, circuit)
+            for slider_value in dsv.CIRCUIT_SLIDER_STEPS
+            for circuit in circuits
+        ]
+    return inputs
+
+
+def prerender_triggers():
+    """
+    Returns the callbacks of this page that only depend on which of their
+    inputs triggered them, with these inputs, for the static export (see
+    'modules.static_export')
+    """
+    return {update_graph: ['dry-button.n_clicks', 'wet-button.n_clicks']}
@@ -1,12 +1,15 @@
 import dash
-import pandas as pd
 import plotly.express as px
 
 from dash import Input, Output, html
 
 import dash_bootstrap_components as dbc
 
+import modules.datastore as datastore
 import modules.pitstop_mod as ptm
+import modules.providers as providers
+
+from modules.callback_cache import cached_callback
 
 
 ####### Initialize the Dash app #######
@@ -17,42 +20,79 @@ dash.register_page(__name__, path='/pit-stops', title='Pit Stop Analysis')
 
 ############## Load Data ##############
 
-DATA_PATH = 'data/'
+# Data of the page is computed on first use or by the prewarm once the
+# server runs (see 'modules.providers')
+
+
+@providers.provider
+def df():
+    return datastore.get('pitstops')
 
-df = pd.read_csv(
-    DATA_PATH + 'merged_pitstops.csv',
-)
 
 # This code has been modified by ChatGPT 
+# Durations are already converted to seconds by the datastore
+# (see 'ptm.parse_durations'), the parsed column feeds both dataframes
+
 # Create Dataframe for circuit Plot
 
-df_unique = df
-df_unique['duration'] = df_unique['duration'].apply(
-    ptm.convert_duration_to_seconds
-)
-df_unique = df_unique.dropna(subset=['duration'])
 
-unique_circuits = df_unique['race_name'].unique()
+@providers.provider
+def unique_circuits():
+    df_unique = df().dropna(subset=['duration'])
+    return df_unique['race_name'].unique()
+
+
+# Pit stops per race and driver with the years and row range of every
+# race, so the circuit callbacks only look them up, stored next to the
+# cache of the dataset
+@providers.provider
+def pitstop_summary():
+    return ptm.stored_pitstop_summary(df())
 
 
 # Create Dataframe for driver Plot
 
-df_filtered = df[['year', 'driver_name', 'duration', 'finish_position']].copy()
-df_filtered['duration'] = df_filtered['duration'].apply(
-    ptm.convert_duration_to_seconds
-)
-df_filtered = df_filtered.dropna(subset=['duration'])
 
-# Fahrer filtern, die mindestens 2 Jahre gefahren sind
-driver_years = df_filtered.groupby('driver_name')['year'].nunique()
-eligible_drivers = driver_years[driver_years >= 2].index
+@providers.provider
+def driver_pitstops():
+    """
+    Returns the pit stops with a duration and the summaries of the pit
+    stop speed categories of every driver
+    """
+    df_filtered = df()[['year', 'driver_name', 'duration', 'finish_position']]
+    # Copied, the category column is added to the frame
+    df_filtered = df_filtered.dropna(subset=['duration']).copy()
+
+    # Pit stop speed categories of every driver career in one pass
+    duration_categories, driver_categories = ptm.categorize_durations(
+        df_filtered['duration'], df_filtered['driver_name']
+    )
+    df_filtered['duration_category'] = duration_categories
+    return df_filtered, driver_categories
+
+
+@providers.provider
+def eligible_drivers():
+    df_filtered, _ = driver_pitstops()
+
+    # Fahrer filtern, die mindestens 2 Jahre gefahren sind
+    driver_years = df_filtered.groupby('driver_name', observed=True)[
+        'year'
+    ].nunique()
+    return driver_years[driver_years >= 2].index
 
 
 ############## Create Graphs ##############
 
 
-pitstops_layout = ptm.create_pitstop_layout(unique_circuits)
-pitstops_boxplot = ptm.create_pitstop_layout_boxplot(eligible_drivers)
+@providers.provider
+def pitstops_layout():
+    return ptm.create_pitstop_layout(unique_circuits())
+
+
+@providers.provider
+def pitstops_boxplot():
+    return ptm.create_pitstop_layout_boxplot(eligible_drivers())
 
 
 ############ Set up the layout ############
@@ -102,155 +142,168 @@ other factors play a more decisive role in determining a driver's finishing
 position.
 '''
 # This code has been modified by ChatGPT
-layout = html.Div(
-    [
-        dbc.Row(
-            dbc.Col(
-                html.Div(className='chequered-flag'),
-            ),
-            className='mb-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.H1(
-                    [
-                        'How does the number and the average duration of '
-                        'pit stops for a driver in a race relate to his '
-                        'finishing position? from 2011-2024',
-                    ],
-                    className='text-center page-header text-light',
+@providers.provider
+def page_layout():
+    """
+    Returns the layout of the page, built on first use
+    """
+    return html.Div(
+        [
+            dbc.Row(
+                dbc.Col(
+                    html.Div(className='chequered-flag'),
                 ),
+                className='mb-4',
             ),
-            className='mb-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.P(
-                            text1,
-                        ),
-                    ],
-                    className='p-3 text-light',
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                        'backgroundColor': '#212529',
-                        'border-radius': '10px',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.H1(
+                        [
+                            'How does the number and the average duration of '
+                            'pit stops for a driver in a race relate to his '
+                            'finishing position? from 2011-2024',
+                        ],
+                        className='text-center page-header text-light',
+                    ),
                 ),
+                className='mb-4',
             ),
-            className='mb-2 mt-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    pitstops_boxplot,
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.P(
+                                text1,
+                            ),
+                        ],
+                        className='p-3 text-light',
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                            'backgroundColor': '#212529',
+                            'border-radius': '10px',
+                        },
+                    ),
                 ),
+                className='mb-2 mt-4',
             ),
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.P(
-                            explanation_text1,
-                        ),
-                    ],
-                    className='p-3 text-light',
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                        'backgroundColor': '#212529',
-                        'border-radius': '10px',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        pitstops_boxplot(),
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                        },
+                    ),
                 ),
             ),
-            className='mt-2 mb-5',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(className='chequered-flag'),
-            ),
-            className='mb-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.P(
-                            text2,
-                        ),
-                    ],
-                    className='p-3 text-light',
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                        'backgroundColor': '#212529',
-                        'border-radius': '10px',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.P(
+                                explanation_text1,
+                            ),
+                        ],
+                        className='p-3 text-light',
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                            'backgroundColor': '#212529',
+                            'border-radius': '10px',
+                        },
+                    ),
                 ),
+                className='mt-2 mb-5',
             ),
-            className='mb-2 mt-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    pitstops_layout,
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(className='chequered-flag'),
                 ),
+                className='mb-4',
             ),
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.P(
-                            explanation_text2,
-                        ),
-                    ],
-                    className='p-3 text-light',
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                        'backgroundColor': '#212529',
-                        'border-radius': '10px',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.P(
+                                text2,
+                            ),
+                        ],
+                        className='p-3 text-light',
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                            'backgroundColor': '#212529',
+                            'border-radius': '10px',
+                        },
+                    ),
                 ),
+                className='mb-2 mt-4',
             ),
-            className='mt-2 mb-5',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(className='chequered-flag'),
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        pitstops_layout(),
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                        },
+                    ),
+                ),
             ),
-            className='mb-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    html.A(
-                        'Back to Top',
-                        href='#top',
-                        className='btn',
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.P(
+                                explanation_text2,
+                            ),
+                        ],
+                        className='p-3 text-light',
                         style={
-                            'backgroundColor': '#a36664',
-                            'color': 'white',
+                            'width': '89%',
+                            'margin': '0 auto',
+                            'backgroundColor': '#212529',
+                            'border-radius': '10px',
                         },
                     ),
-                    className='text-center',
                 ),
+                className='mt-2 mb-5',
             ),
-        ),
-    ],
-)
+            dbc.Row(
+                dbc.Col(
+                    html.Div(className='chequered-flag'),
+                ),
+                className='mb-4',
+            ),
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        html.A(
+                            'Back to Top',
+                            href='#top',
+                            className='btn',
+                            style={
+                                'backgroundColor': '#a36664',
+                                'color': 'white',
+                            },
+                        ),
+                        className='text-center',
+                    ),
+                ),
+            ),
+        ],
+    )
+
+
+def layout(**query_parameters):
+    """
+    Returns the layout of the page for Dash, which calls it on every
+    navigation to the page
+    """
+    return page_layout()
 
 
 ########### Initialize Callbacks ############
@@ -261,6 +314,7 @@ layout = html.Div(
     [Output('year-dropdown', 'options'), Output('year-dropdown', 'value')],
     Input('circuit-pitstops-dropdown', 'value'),
 )
+@cached_callback()
 def update_year_dropdown(selected_circuit):
     """
     Updates the year dropdown based on the selected circuit.
@@ -275,11 +329,10 @@ def update_year_dropdown(selected_circuit):
             - The default selected year (earliest available year) or None if
             no data exists.
     """
-    filtered_years = df[df['race_name'] == selected_circuit]['year'].unique()
-    year_options = [
-        {'label': str(year), 'value': year} for year in sorted(filtered_years)
-    ]
-    return year_options, filtered_years[0] if len(filtered_years) > 0 else None
+    summary = pitstop_summary()
+    years = summary['years'].get(selected_circuit, [])
+    year_options = [{'label': str(year), 'value': year} for year in years]
+    return year_options, summary['first_years'].get(selected_circuit)
 
 # This code has been modified by ChatGPT
 # Callback for the circuit pitstop Plot
@@ -295,6 +348,7 @@ def update_year_dropdown(selected_circuit):
     ],
 )
 # This code has been modified by ChatGPT
+@cached_callback()
 def update_pitstop_plot(selected_circuit, selected_year):
 
     """
@@ -316,19 +370,13 @@ def update_pitstop_plot(selected_circuit, selected_year):
             html.P('No Data Available'),
         )
 
-    filtered_df = df_unique[
-        (df_unique['race_name'] == selected_circuit)
-        & (df_unique['year'] == selected_year)
-    ]
-
-    filtered_df = filtered_df[(filtered_df['race_completed'] == True)]
+    summary = pitstop_summary()
+    race = ptm.race_pitstops(summary, selected_circuit, selected_year)
 
-    # Sum Total Pitstop Time per Driver and add finishing Position
-    driver_pitstops = (
-        filtered_df.groupby(['driver_name', 'finish_position'])['duration']
-        .sum()
-        .reset_index()
-    )
+    # Total Pitstop Time per Driver with finishing Position and category
+    driver_pitstops = race[race['race_completed']][
+        ['driver_name', 'finish_position', 'duration', 'duration_category']
+    ].reset_index(drop=True)
 
     # Sorted into 3 Categories by Total Pitstop Time
     driver_pitstops_sorted = driver_pitstops.sort_values(
@@ -336,7 +384,10 @@ def update_pitstop_plot(selected_circuit, selected_year):
     )
 
     return ptm.create_circuit_plot(
-        selected_circuit, selected_year, driver_pitstops_sorted
+        selected_circuit,
+        selected_year,
+        driver_pitstops_sorted,
+        summary['categories'].get((selected_circuit, selected_year)),
     )
 
 
@@ -346,6 +397,7 @@ def update_pitstop_plot(selected_circuit, selected_year):
     [Input('driver-pitstop-dropdown', 'value')],
 )
 # This code has been modified by ChatGPT
+@cached_callback()
 def update_plot(driver_name):
     """
     Updates the driver-specific pit stop analysis plot.
@@ -358,10 +410,36 @@ def update_plot(driver_name):
             - A box plot (Figure) showing the distribution of pit stop times.
             - A text component (html.P) summarizing the analysis.
     """
+    df_filtered, driver_categories = driver_pitstops()
     df_driver = df_filtered[df_filtered['driver_name'] == driver_name].copy()
     total_races = len(df_driver)
 
     # Sort by pitstop time
     df_driver_sorted = df_driver.sort_values('duration')
 
-    return ptm.create_driver_plot(driver_name, df_driver_sorted, total_races)
+    return ptm.create_driver_plot(
+        driver_name,
+        df_driver_sorted,
+        total_races,
+        driver_categories.get(driver_name),
+    )
+
+
+########### Prerender inputs ############
+
+
+def prerender_inputs():
+    """
+    Returns the reachable inputs of the cached callbacks of this page
+    for the static snapshot (see 'modules.prerender')
+    """
+    circuits = sorted(unique_circuits())
+    return {
+        update_year_dropdown: [(None,)] + [
+            (circuit,) for circuit in circuits
+        ],
+        update_pitstop_plot: [(None, None)]
+        + [(circuit, None) for circuit in circuits]
+        + list(pitstop_summary()['ranges']),
+        update_plot: [(None,)] + [(driver,) for driver in eligible_drivers()],
+    }
@@ -1,13 +1,17 @@
-import pandas as pd
 import dash
 
-from dash import Input, Output, dcc, html
+from dash import ClientsideFunction, Input, Output, State, dcc, html
 
 import dash_bootstrap_components as dbc
 
 import modules.crash_vis_mod as cvm
+import modules.datastore as datastore
+import modules.providers as providers
+import modules.warmup as warmup
 import modules.weather_crash_vis_mod as wcvm
 
+from modules.callback_cache import cached_callback
+
 
 ####### Initialize the Dash app #######
 
@@ -16,36 +20,63 @@ dash.register_page(__name__, path='/retirements', title='Retirement Analysis')
 
 ############## Load Data ##############
 
+# Data of the page is computed on first use or by the prewarm once the
+# server runs (see 'modules.providers')
+
+
+@providers.provider
+def df():
+    return datastore.get('race_status')
 
-DATA_PATH = 'data/'
 
-df = pd.read_csv(
-    DATA_PATH + 'f1_1994_2024_categorized_by_race_status.csv',
-    parse_dates=['date'],
-)
-df_CraWeath = pd.read_csv(DATA_PATH + 'crashes_and_weather.csv')
+# Incident sums per circuit and year for the year range of the dashboard
+@providers.provider
+def cumulative_incidents():
+    return cvm.cumulative_incidents(df())
 
 
 ############# Define Graphs ############
 
 
 wcvm.init_figs()
-fig_CraWeath = wcvm.create_fig_CraWeath(df_CraWeath)
-fig_total_incidents = cvm.total_incidents_by_year(df)
-fig_retirements_rate = cvm.yearly_retirements_rate(df)
-fig_retirements_race = cvm.average_yearly_retirements(df)
-incidents_layout = cvm.create_interactive_incidents_dashboard(df)
-
-
-for fig in [
-    fig_total_incidents,
-    fig_retirements_rate,
-    fig_retirements_race,
-    fig_CraWeath,
-]:
-    fig.update_layout(
-        autosize=True,
-        margin=dict(l=70, r=40, t=80, b=40),
+
+
+# Figures of the initial layout, built by the warm-up pool (see warmup)
+@providers.provider
+def fig_CraWeath():
+    return warmup.figure('crashes_weather')
+
+
+@providers.provider
+def fig_total_incidents():
+    return warmup.figure('total_incidents')
+
+
+@providers.provider
+def fig_retirements_rate():
+    return warmup.figure('retirements_rate')
+
+
+@providers.provider
+def fig_retirements_race():
+    return warmup.figure('retirements_race')
+
+
+@providers.provider
+def incidents_layout():
+    return cvm.create_interactive_incidents_dashboard(df())
+
+
+# Data the incidents figure is built from in the browser
+@providers.provider
+def incidents_store():
+    return dcc.Store(
+        id='incidents-store',
+        data=(
+            cvm.incidents_store_data(cumulative_incidents())
+            if cvm.CLIENTSIDE_INCIDENTS
+            else None
+        ),
     )
 
 
@@ -153,276 +184,334 @@ finish the race.
 """
 
 
-layout = html.Div(
-    [
-        dbc.Row(
-            dbc.Col(
-                html.Div(className='chequered-flag'),
+@providers.provider
+def page_layout():
+    """
+    Returns the layout of the page, built on first use
+    """
+    return html.Div(
+        [
+            dbc.Row(
+                dbc.Col(
+                    html.Div(className='chequered-flag'),
+                ),
+                className='mb-4',
             ),
-            className='mb-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.H1(
-                    [
-                        'How has the total number of crashes and retirements '
-                        'evolved in the seasons from 1994 - 2024?',
-                    ],
-                    className='text-center page-header text-light',
+            dbc.Row(
+                dbc.Col(
+                    html.H1(
+                        [
+                            'How has the total number of crashes and '
+                            'retirements evolved in the seasons from 1994 - '
+                            '2024?',
+                        ],
+                        className='text-center page-header text-light',
+                    ),
                 ),
+                className='mb-4',
             ),
-            className='mb-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.P(
-                            retirements_text,
-                        ),
-                    ],
-                    className='p-3 text-light',
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                        'backgroundColor': '#212529',
-                        'border-radius': '10px',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.P(
+                                retirements_text,
+                            ),
+                        ],
+                        className='p-3 text-light',
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                            'backgroundColor': '#212529',
+                            'border-radius': '10px',
+                        },
+                    ),
                 ),
+                className='mb-4 mt-4',
             ),
-            className='mb-4 mt-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.Div(
-                            dcc.Graph(
-                                figure=fig_retirements_rate,
-                                config={'responsive': True},
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.Div(
+                                dcc.Graph(
+                                    figure=fig_retirements_rate(),
+                                    config={'responsive': True},
+                                ),
+                                style={
+                                    'margin': '0 auto',
+                                    'width': '89%',
+                                },
                             ),
-                            style={
-                                'margin': '0 auto',
-                                'width': '89%',
-                            },
-                        ),
-                    ]
+                        ]
+                    ),
                 ),
+                className='mb-2',
             ),
-            className='mb-2',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.Div(
-                            dcc.Graph(
-                                figure=fig_retirements_race,
-                                config={'responsive': True},
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.Div(
+                                dcc.Graph(
+                                    figure=fig_retirements_race(),
+                                    config={'responsive': True},
+                                ),
+                                style={
+                                    'margin': '0 auto',
+                                    'width': '89%',
+                                },
                             ),
-                            style={
-                                'margin': '0 auto',
-                                'width': '89%',
-                            },
-                        ),
-                    ],
+                        ],
+                    ),
                 ),
+                className='mb-2',
             ),
-            className='mb-2',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.Div(
-                            dcc.Graph(
-                                figure=fig_total_incidents,
-                                config={'responsive': True},
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.Div(
+                                dcc.Graph(
+                                    figure=fig_total_incidents(),
+                                    config={'responsive': True},
+                                ),
+                                style={
+                                    'margin': '0 auto',
+                                    'width': '89%',
+                                },
                             ),
-                            style={
-                                'margin': '0 auto',
-                                'width': '89%',
-                            },
-                        ),
-                    ]
+                        ]
+                    ),
                 ),
             ),
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.P(
-                            total_incidents_explanation,
-                        ),
-                    ],
-                    className='p-3 text-light',
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                        'backgroundColor': '#212529',
-                        'border-radius': '10px',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.P(
+                                total_incidents_explanation,
+                            ),
+                        ],
+                        className='p-3 text-light',
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                            'backgroundColor': '#212529',
+                            'border-radius': '10px',
+                        },
+                    ),
                 ),
+                className='mt-2 mb-5',
             ),
-            className='mt-2 mb-5',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(className='chequered-flag'),
+            dbc.Row(
+                dbc.Col(
+                    html.Div(className='chequered-flag'),
+                ),
+                className='mb-4 mt-4',
             ),
-            className='mb-4 mt-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.H1(
-                    [
-                        'Which tracks have the highest frequency of crashes '
-                        'or retirements compared to others?',
-                    ],
-                    className='text-center page-header text-light',
+            dbc.Row(
+                dbc.Col(
+                    html.H1(
+                        [
+                            'Which tracks have the highest frequency of '
+                            'crashes or retirements compared to others?',
+                        ],
+                        className='text-center page-header text-light',
+                    ),
                 ),
+                className='mb-4 mt-4',
             ),
-            className='mb-4 mt-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    incidents_layout,
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [incidents_layout(), incidents_store()],
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                        },
+                    ),
                 ),
             ),
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.P(
-                            [
-                                helper_text,
-                                html.Br(),
-                                interactive_dashboard_explanation_monaco,
-                                html.Br(),
-                                interactive_dashboard_explanation_australia,
-                                html.Br(),
-                                interactive_dashboard_explanation_imola,
-                            ],
-                        ),
-                    ],
-                    className='p-3 text-light',
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                        'backgroundColor': '#212529',
-                        'border-radius': '10px',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.P(
+                                [
+                                    helper_text,
+                                    html.Br(),
+                                    interactive_dashboard_explanation_monaco,
+                                    html.Br(),
+                                    interactive_dashboard_explanation_australia,
+                                    html.Br(),
+                                    interactive_dashboard_explanation_imola,
+                                ],
+                            ),
+                        ],
+                        className='p-3 text-light',
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                            'backgroundColor': '#212529',
+                            'border-radius': '10px',
+                        },
+                    ),
                 ),
+                className='mt-2 mb-5',
             ),
-            className='mt-2 mb-5',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(className='chequered-flag'),
+            dbc.Row(
+                dbc.Col(
+                    html.Div(className='chequered-flag'),
+                ),
+                className='mb-4 mt-4',
             ),
-            className='mb-4 mt-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.H1(
-                    [
-                        'How does weather affect race completion rates and '
-                        'the likelihood of crashes or retirements in the '
-                        'seasons from 2005 - 2024?',
-                    ],
-                    className='text-center page-header text-light',
+            dbc.Row(
+                dbc.Col(
+                    html.H1(
+                        [
+                            'How does weather affect race completion rates '
+                            'and the likelihood of crashes or retirements in '
+                            'the seasons from 2005 - 2024?',
+                        ],
+                        className='text-center page-header text-light',
+                    ),
                 ),
+                className='mb-4 mt-4',
             ),
-            className='mb-4 mt-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.Div(
-                            dcc.Graph(
-                                figure=fig_CraWeath,
-                                config={'responsive': True},
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.Div(
+                                dcc.Graph(
+                                    figure=fig_CraWeath(),
+                                    config={'responsive': True},
+                                ),
+                                style={
+                                    'margin': '0 auto',
+                                    'width': '89%',
+                                },
                             ),
-                            style={
-                                'margin': '0 auto',
-                                'width': '89%',
-                            },
-                        ),
-                    ]
+                        ]
+                    ),
                 ),
             ),
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    [
-                        html.P(
-                            [
-                                crash_weather_explanation,
-                                html.Br(),
-                                crash_weather_chi2,
-                            ],
-                        ),
-                    ],
-                    className='p-3 text-light',
-                    style={
-                        'width': '89%',
-                        'margin': '0 auto',
-                        'backgroundColor': '#212529',
-                        'border-radius': '10px',
-                    },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        [
+                            html.P(
+                                [
+                                    crash_weather_explanation,
+                                    html.Br(),
+                                    crash_weather_chi2,
+                                ],
+                            ),
+                        ],
+                        className='p-3 text-light',
+                        style={
+                            'width': '89%',
+                            'margin': '0 auto',
+                            'backgroundColor': '#212529',
+                            'border-radius': '10px',
+                        },
+                    ),
                 ),
+                className='mt-2 mb-5',
             ),
-            className='mt-2 mb-5',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(className='chequered-flag'),
+            dbc.Row(
+                dbc.Col(
+                    html.Div(className='chequered-flag'),
+                ),
+                className='mb-4 mt-4',
             ),
-            className='mb-4 mt-4',
-        ),
-        dbc.Row(
-            dbc.Col(
-                html.Div(
-                    html.A(
-                        'Back to Top',
-                        href='#top',
-                        className='btn',
-                        style={
-                            'backgroundColor': '#a36664',
-                            'color': 'white',
-                        },
+            dbc.Row(
+                dbc.Col(
+                    html.Div(
+                        html.A(
+                            'Back to Top',
+                            href='#top',
+                            className='btn',
+                            style={
+                                'backgroundColor': '#a36664',
+                                'color': 'white',
+                            },
+                        ),
+                        className='text-center',
                     ),
-                    className='text-center',
                 ),
             ),
-        ),
-    ],
-)
-
-
-@dash.callback(
-    Output('incidents-graph', 'figure'),
-    [
-        Input('year-slider', 'value'),
-        Input('race-slider', 'value'),
-        Input('type-slider', 'value'),
-    ],
-)
+        ],
+    )
+
+
+def layout(**query_parameters):
+    """
+    Returns the layout of the page for Dash, which calls it on every
+    navigation to the page
+    """
+    return page_layout()
+
+
 # Modified by Claude
+@cached_callback()
 def update_figure(selected_years, min_race_count, type_value):
     start_year, end_year = selected_years
     type_mapping = {0: 'per_race', 1: 'per_race_driver'}
     type_str = type_mapping[type_value]
 
     return cvm.create_incidents_figure(
-        df, start_year, end_year, min_race_count, type_str
+        df(),
+        start_year,
+        end_year,
+        min_race_count,
+        type_str,
+        cumulative_incidents(),
+    )
+
+
+incidents_inputs = [
+    Input('year-slider', 'value'),
+    Input('race-slider', 'value'),
+    Input('type-slider', 'value'),
+]
+
+if cvm.CLIENTSIDE_INCIDENTS:
+    # Built from the incidents store by 'assets/incidents.js'
+    dash.clientside_callback(
+        ClientsideFunction(namespace='incidents', function_name='figure'),
+        Output('incidents-graph', 'figure'),
+        incidents_inputs,
+        State('incidents-store', 'data'),
     )
+else:
+    dash.callback(
+        Output('incidents-graph', 'figure'),
+        incidents_inputs,
+    )(update_figure)
+
+
+########### Prerender inputs ############
+
+
+def prerender_inputs():
+    """
+    Returns the reachable inputs of the cached callbacks of this page
+    for the static snapshot (see 'modules.prerender')
+    """
+    # Built in the browser unless F1_CLIENTSIDE_INCIDENTS=0
+    if cvm.CLIENTSIDE_INCIDENTS:
+        return {}
+
+    years = range(int(df()['year'].min()), int(df()['year'].max()) + 1)
+    return {
+        update_figure: [
+            ([start_year, end_year], min_race_count, type_value)
+            for start_year in years
+            for end_year in years
+            if start_year <= end_year
+            for min_race_count in range(1, 31)
+            for type_value in (0, 1)
+        ],
+    }
@@ -0,0 +1,9 @@
+import os
+import sys
+
+
+# The modules are imported from the repository root and the datastore
+# reads the data directory relative to it
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
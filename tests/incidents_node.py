@@ -0,0 +1,65 @@
+import base64
+import json
+import os
+import subprocess
+import tempfile
+
+import numpy as np
+
+
+SCRIPT = os.path.join(
+    os.path.dirname(__file__), os.pardir, 'assets', 'incidents.js'
+)
+
+# Runs the clientside callback for every case and prints the figures
+_RUNNER = """
+const fs = require('fs');
+globalThis.window = globalThis;
+eval(fs.readFileSync(process.argv[2], 'utf8'));
+const {store, cases} = JSON.parse(fs.readFileSync(process.argv[3], 'utf8'));
+const figure = window.dash_clientside.incidents.figure;
+const figures = cases.map(
+    ([years, minRaceCount, typeValue]) =>
+        figure(years, minRaceCount, typeValue, store)
+);
+process.stdout.write(JSON.stringify(figures));
+"""
+
+
+def decode(value):
+    """
+    Returns the plotly JSON 'value' with its base64 encoded numeric
+    arrays as plain lists, as the clientside callback builds them
+    """
+    if isinstance(value, dict):
+        if set(value) == {'dtype', 'bdata'}:
+            return np.frombuffer(
+                base64.b64decode(value['bdata']), dtype=value['dtype']
+            ).tolist()
+        return {key: decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [decode(item) for item in value]
+    return value
+
+
+def run_clientside(store, cases):
+    """
+    Runs the clientside callback of 'assets/incidents.js' with Node.js
+    for every case (years, minimum race count, type value) on 'store'
+
+    Returns the figures
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        data_path = os.path.join(directory, 'cases.json')
+        with open(data_path, 'w', encoding='utf-8') as file:
+            json.dump({'store': store, 'cases': cases}, file)
+        runner_path = os.path.join(directory, 'runner.js')
+        with open(runner_path, 'w', encoding='utf-8') as file:
+            file.write(_RUNNER)
+        output = subprocess.run(
+            ['node', runner_path, SCRIPT, data_path],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+    return json.loads(output)
@@ -0,0 +1,26 @@
+import modules.providers as providers
+
+
+def _ids(layout):
+    return {
+        component.id
+        for component in layout._traverse()
+        if getattr(component, 'id', None) is not None
+    }
+
+
+def test_validation_layout_has_the_callback_ids(monkeypatch):
+    monkeypatch.setattr(providers, 'PREWARM', False)
+    import app
+
+    assert app.server.test_client().get('/').status_code == 200
+
+    ids = _ids(app.app.validation_layout)
+    for output, callback in app.app.callback_map.items():
+        for dependency in output.strip('.').split('...'):
+            assert dependency.rsplit('.', 1)[0] in ids
+        for dependency in callback['inputs'] + callback['state']:
+            assert dependency['id'] in ids
+    # Only the components with an id, without their other properties
+    for component in app.app.validation_layout.children:
+        assert component.to_plotly_json()['props'] == {'id': component.id}
@@ -0,0 +1,110 @@
+import collections
+
+import pytest
+
+import modules.callback_cache as callback_cache
+import modules.prerender as prerender
+import modules.shared_cache as shared_cache
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """
+    The callback cache with empty entries, no shared backend and no
+    prerendered snapshot
+    """
+    monkeypatch.setattr(callback_cache, 'ENABLED', True)
+    monkeypatch.setattr(callback_cache, '_caches', {})
+    monkeypatch.setattr(
+        callback_cache, '_entries', collections.OrderedDict()
+    )
+    monkeypatch.setattr(prerender, 'SERVING', False)
+    monkeypatch.setattr(shared_cache, 'backend', lambda: None)
+    return callback_cache
+
+
+def _callback(cache, calls, name='callback'):
+    def callback(value):
+        calls.append(value)
+        # 100 bytes once serialized
+        return str(value) * 98
+
+    callback.__name__ = name
+    return cache.cached_callback()(callback)
+
+
+def _stats(callback):
+    stats = callback.cache_stats
+    return {
+        key: stats[key]
+        for key in ['entries', 'hits', 'misses', 'evictions']
+    }
+
+
+def test_entry_limit(cache, monkeypatch):
+    monkeypatch.setattr(cache, 'MAX_ENTRIES', 3)
+    calls = []
+    callback = _callback(cache, calls)
+
+    for value in [1, 2, 3, 1, 4, 2]:
+        assert callback(value) == str(value) * 98
+
+    # 2 was the least recently used entry when 4 was stored
+    assert calls == [1, 2, 3, 4, 2]
+    assert _stats(callback) == {
+        'entries': 3,
+        'hits': 1,
+        'misses': 5,
+        'evictions': 2,
+    }
+    assert callback.cache_stats['bytes'] == 300
+
+
+def test_byte_limit_shared_by_callbacks(cache, monkeypatch):
+    monkeypatch.setattr(cache, 'MAX_BYTES', 250)
+    calls = []
+    first = _callback(cache, calls, 'first')
+    second = _callback(cache, calls, 'second')
+
+    first(1)
+    second(2)
+    first(1)
+    second(3)
+    first(1)
+    second(2)
+
+    # Two results fit, the result of 'first' is the least recently used
+    # one when 3 is stored
+    assert calls == [1, 2, 3, 2]
+    assert _stats(first) == {
+        'entries': 1,
+        'hits': 2,
+        'misses': 1,
+        'evictions': 0,
+    }
+    assert _stats(second) == {
+        'entries': 1,
+        'hits': 0,
+        'misses': 3,
+        'evictions': 2,
+    }
+    assert sum(
+        callback.cache_stats['bytes'] for callback in [first, second]
+    ) == 200
+
+
+def test_result_larger_than_budget(cache, monkeypatch):
+    monkeypatch.setattr(cache, 'MAX_BYTES', 50)
+    calls = []
+    callback = _callback(cache, calls)
+
+    callback(1)
+    callback(1)
+
+    assert calls == [1, 1]
+    assert _stats(callback) == {
+        'entries': 0,
+        'hits': 0,
+        'misses': 2,
+        'evictions': 0,
+    }
@@ -0,0 +1,56 @@
+import json
+import random
+import shutil
+
+import pytest
+
+from plotly.io.json import to_json_plotly
+
+import modules.crash_vis_mod as cvm
+import modules.datastore as datastore
+
+from incidents_node import decode, run_clientside
+
+
+TYPES = ['per_race', 'per_race_driver']
+
+
+@pytest.mark.skipif(
+    shutil.which('node') is None, reason='needs Node.js for incidents.js'
+)
+def test_clientside_incidents_like_server():
+    df = datastore.get('race_status')
+    cumulative = cvm.cumulative_incidents(df)
+    years = cumulative['years'].tolist()
+    cases = [
+        [[start_year, end_year], min_race_count, type_value]
+        for start_year in years
+        for end_year in years
+        if start_year <= end_year
+        for min_race_count in range(1, 31)
+        for type_value in (0, 1)
+    ]
+    # Full range, single seasons and a selection without any circuit
+    edges = [
+        [[years[0], years[-1]], 1, 0],
+        [[years[0], years[-1]], 30, 1],
+        [[years[0], years[0]], 1, 1],
+        [[years[-1], years[-1]], 30, 0],
+    ]
+    cases = edges + random.Random(0).sample(cases, 300)
+
+    figures = run_clientside(cvm.incidents_store_data(cumulative), cases)
+
+    assert len(figures) == len(cases)
+
+    for (selected_years, min_race_count, type_value), clientside in zip(
+        cases, figures
+    ):
+        figure = cvm.create_incidents_figure(
+            df, *selected_years, min_race_count, TYPES[type_value], cumulative
+        )
+        assert decode(json.loads(to_json_plotly(figure))) == clientside, (
+            selected_years,
+            min_race_count,
+            type_value,
+        )
@@ -0,0 +1,67 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import modules.datastore as datastore
+
+from modules.datastore import cache, loader, schema
+
+
+@pytest.mark.parametrize('name', sorted(datastore.DATASETS))
+def test_get_is_read_only(name):
+    df = datastore.get(name)
+    loaded = datastore.load(name).copy()
+
+    for column in df.columns:
+        value = df[column].iloc[-1]
+        # pandas reports read-only datetime values with an AssertionError
+        # when it falls back to casting the column
+        with pytest.raises((ValueError, AssertionError)):
+            df.loc[0, column] = value
+
+    pd.testing.assert_frame_equal(datastore.load(name), loaded)
+
+
+def test_get_copy_changes_only_the_copy():
+    df = datastore.get('season_results')
+    loaded = datastore.load('season_results').copy()
+
+    with pytest.raises(ValueError, match='read-only'):
+        df['grid_position'] += 1
+
+    df['grid_position'] = df['grid_position'] + 1
+    df['condition'] = 'Dry'
+    df = df.copy()
+    df.loc[0, 'year'] = 0
+
+    pd.testing.assert_frame_equal(datastore.load('season_results'), loaded)
+    assert datastore.get('season_results').equals(loaded)
+
+
+def test_data_version_depends_on_content(tmp_path, monkeypatch):
+    version = datastore.data_version()
+    tokens = {
+        name: cache.source_token(name) for name in datastore.DATASETS
+    }
+
+    # A fresh checkout: equal CSVs with other mtimes and no parquet cache
+    for spec in datastore.DATASETS.values():
+        copy = tmp_path / spec['file']
+        shutil.copyfile(schema.DATA_PATH + spec['file'], copy)
+        os.utime(copy, ns=(0, 0))
+    monkeypatch.setattr(schema, 'DATA_PATH', f'{tmp_path}/')
+
+    assert {
+        name: cache.source_token(name) for name in datastore.DATASETS
+    } == tokens
+
+    with open(tmp_path / datastore.DATASETS['pitstops']['file'], 'a') as file:
+        file.write('\n')
+    assert cache.source_token('pitstops') != tokens['pitstops']
+
+    # As if no dataset was loaded yet
+    monkeypatch.setattr(loader, '_stats', {})
+    monkeypatch.setattr(loader, '_version', None)
+    assert datastore.data_version() != version
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import modules.datastore as datastore
+import modules.driver_standings_mod as ds
+
+
+def _value_counts_standings(df, max):
+    """
+    The former 'get_all_standings': 'value_counts' of the finish
+    positions of every grid position
+    """
+    tables = []
+    for grid_pos in range(1, max):
+        df_filtered = df[df['grid_position'] == grid_pos]
+        df_temp = df_filtered['finish_position'].value_counts().reset_index()
+        df_temp['grid_position'] = grid_pos
+        tables.append(df_temp[['grid_position', 'finish_position', 'count']])
+    return pd.concat(tables, ignore_index=True)
+
+
+def _by_positions(df):
+    return df.sort_values(['grid_position', 'finish_position']).reset_index(
+        drop=True
+    )
+
+
+@pytest.mark.parametrize('name', ['season_results', 'season_results_weather'])
+def test_count_standings_like_value_counts(name):
+    df = datastore.get(name)
+
+    standings, matrix = ds.count_standings(df, 23)
+
+    pd.testing.assert_frame_equal(
+        _by_positions(standings),
+        _by_positions(_value_counts_standings(df, 23)),
+    )
+    for grid, finish, count in standings.itertuples(index=False):
+        assert matrix[grid - 1, finish - 1] == count
+
+
+def test_count_standings_skips_positions_below_one():
+    df = pd.DataFrame(
+        {
+            'grid_position': np.array([1, 1, 1, 2, 0, 2, 1, 3], 'int8'),
+            'finish_position': np.array([2, 0, 3, 1, 1, 1, 3, 2], 'int8'),
+        }
+    )
+
+    standings, matrix = ds.count_standings(df, 23)
+
+    valid = df[df['finish_position'] >= 1]
+    pd.testing.assert_frame_equal(
+        _by_positions(standings),
+        _by_positions(_value_counts_standings(valid, 23)),
+    )
+    assert matrix.sum() == 6
+    # Most races first, equal counts in order of first appearance
+    assert standings.values.tolist() == [
+        [1, 3, 2],
+        [1, 2, 1],
+        [2, 1, 2],
+        [3, 2, 1],
+    ]
+
+
+def test_count_standings_without_rows():
+    df = pd.DataFrame(
+        {
+            'grid_position': np.array([0, 0], 'int8'),
+            'finish_position': np.array([1, 0], 'int8'),
+        }
+    )
+
+    standings, matrix = ds.count_standings(df, 23)
+
+    assert standings.empty
+    assert matrix.sum() == 0
+
+
+def _grid_placements(df):
+    """
+    Average finish and races per grid position from a plain groupby
+    """
+    df = df[(df['grid_position'] >= 1) & (df['grid_position'] < 23)]
+    df = df[df['finish_position'].notna()]
+    placements = df.groupby('grid_position')['finish_position'].agg(
+        ['mean', 'size']
+    )
+    return pd.DataFrame(
+        {
+            'grid_position': placements.index.to_numpy(dtype=np.float64),
+            'avg_placement': placements['mean'].to_numpy(),
+            'races': placements['size'].to_numpy(),
+        }
+    )
+
+
+FILTERS = [
+    {'years': (2010, 2015)},
+    {'circuit': 'monza'},
+    {'conditions': ['Wet', 'Mixed']},
+    {'years': (2005, 2020), 'circuit': 'silverstone', 'conditions': ['Dry']},
+]
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_grid_placements_filters(filters):
+    df = datastore.get('season_results_weather')
+
+    mask = pd.Series(True, index=df.index)
+    if 'years' in filters:
+        mask &= df['year'].between(*filters['years'])
+    if 'circuit' in filters:
+        mask &= df['circuit_id'] == filters['circuit']
+    if 'conditions' in filters:
+        mask &= df['condition'].isin(filters['conditions'])
+    assert 0 < mask.sum() < len(df)
+
+    pd.testing.assert_frame_equal(
+        ds.grid_placements(df, **filters), _grid_placements(df[mask])
+    )
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_start_avg_placements_filters(filters):
+    df = datastore.get('season_results')
+    df_weather = datastore.get('season_results_weather')
+
+    all_races, completed = ds.start_avg_placements(df, df_weather, **filters)
+
+    # The season results take the condition of their race
+    conditions = df_weather[['year', 'round', 'condition']].drop_duplicates()
+    df = df.merge(conditions, on=['year', 'round'], how='left')
+    pd.testing.assert_frame_equal(
+        all_races, ds.grid_placements(df, **filters)
+    )
+    pd.testing.assert_frame_equal(
+        completed, ds.grid_placements(df_weather, **filters)
+    )
+    assert all_races['races'].sum() >= completed['races'].sum() > 0
+
+
+def test_condition_filter_needs_weather():
+    df = datastore.get('season_results')
+
+    with pytest.raises(ValueError):
+        ds.grid_placements(df, conditions=['Wet'])
@@ -0,0 +1,153 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import modules.datastore as datastore
+import modules.pitstop_mod as ptm
+
+from modules.datastore import cache, schema
+
+
+# Durations in every format the scalar version handles
+DURATIONS = [
+    '23.456',
+    '1:02.345',
+    '01:05',
+    '12',
+    '0.5',
+    '.5',
+    '5.',
+    ' 12 ',
+    '-1.5',
+    '+3',
+    '1e2',
+    '1_000',
+    '٣',
+    '1:2:3',
+    ':5',
+    '5:',
+    'abc',
+    '',
+    '1.2.3',
+    None,
+    np.nan,
+]
+
+
+def _expected(values):
+    return np.array(
+        [ptm.convert_duration_to_seconds(value) for value in values]
+    )
+
+
+@pytest.mark.parametrize('arrow', [True, False])
+def test_parse_durations_strings(arrow, monkeypatch):
+    if not arrow:
+        monkeypatch.setattr(ptm, 'pa', None)
+    series = pd.Series(DURATIONS, dtype=object)
+
+    np.testing.assert_array_equal(
+        ptm.parse_durations(series).to_numpy(), _expected(DURATIONS)
+    )
+
+
+def test_parse_durations_mixed_types():
+    values = [12.5, 7, '1:00.5', None, True, 'x']
+    series = pd.Series(values, dtype=object)
+
+    np.testing.assert_array_equal(
+        ptm.parse_durations(series).to_numpy(), _expected(values)
+    )
+
+
+def test_parse_durations_numeric_and_empty():
+    series = pd.Series([1, 2, 3], name='duration')
+    assert ptm.parse_durations(series).dtype == 'float64'
+
+    empty = ptm.parse_durations(pd.Series([], dtype=object))
+    assert empty.empty
+
+
+def test_parse_durations_dataset():
+    raw = pd.read_csv(
+        'data/' + datastore.DATASETS['pitstops']['file'],
+        usecols=['duration'],
+        dtype=object,
+    )['duration']
+
+    np.testing.assert_array_equal(
+        ptm.parse_durations(raw).to_numpy(), _expected(raw.to_numpy())
+    )
+
+
+def _cut(durations):
+    """
+    Categories of 'durations' as 'pd.cut' gives them for the group alone,
+    None for groups with bins that are not unique
+    """
+    bins = [durations.min()] + durations.quantile(
+        ptm.DURATION_QUANTILES
+    ).tolist()
+    try:
+        categories = pd.cut(
+            durations,
+            bins=bins,
+            labels=ptm.DURATION_CATEGORIES,
+            include_lowest=True,
+        )
+    except ValueError:
+        return [None] * len(durations)
+    return categories.astype(object).where(categories.notna(), None).tolist()
+
+
+@pytest.mark.parametrize(
+    'columns', [['race_name', 'year'], ['driver_name']]
+)
+def test_categorize_durations_like_cut(columns):
+    df = datastore.get('pitstops').dropna(subset=['duration'])
+
+    categories, _ = ptm.categorize_durations(
+        df['duration'], [df[column] for column in columns]
+    )
+
+    categories = categories.astype(object).where(categories.notna(), None)
+    groups = df.groupby(columns, observed=True).groups
+    assert len(groups) > 1
+    for rows in groups.values():
+        assert categories.loc[rows].tolist() == _cut(df['duration'].loc[rows])
+
+
+def test_categorize_durations_edge_cases():
+    durations = pd.Series([3.0, 1.0, 2.0, 5.0, 4.0, 9.0, 2.0, 2.0, 7.0])
+    groups = pd.Series(['a', 'a', 'a', None, 'b', 'b', 'c', 'c', 'd'])
+
+    categories, summary = ptm.categorize_durations(durations, groups)
+
+    assert categories.tolist()[:3] == ['Slow', 'Fast', 'Average']
+    assert categories.tolist()[4:6] == ['Fast', 'Slow']
+    # No group, equal values and a single value give no bins
+    assert categories[[3, 6, 7, 8]].isna().all()
+    assert sorted(summary) == ['a', 'b']
+    assert summary['a']['Fast'] == (1, 1.0, 1.0)
+
+
+def test_stored_pitstop_summary(tmp_path, monkeypatch):
+    df = datastore.get('pitstops')
+    csv_file = datastore.DATASETS['pitstops']['file']
+    shutil.copyfile(schema.DATA_PATH + csv_file, tmp_path / csv_file)
+    monkeypatch.setattr(schema, 'DATA_PATH', f'{tmp_path}/')
+
+    computed = ptm.stored_pitstop_summary(df)
+    assert os.path.exists(cache.derived_path('pitstops', 'summary'))
+    stored = ptm.stored_pitstop_summary(df)
+
+    pd.testing.assert_frame_equal(stored['table'], computed['table'])
+    for key in ['years', 'first_years', 'ranges', 'categories']:
+        assert stored[key] == computed[key]
+        assert list(stored[key]) == list(computed[key])
+
+    # Another version of the summary code does not read the stored one
+    assert cache.read_derived('pitstops', 'summary', 0) is None
@@ -0,0 +1,38 @@
+import hashlib
+import json
+import logging
+
+import modules.datastore as datastore
+import modules.prerender as prerender
+
+
+def _snapshot(path, version, callback, inputs, payload):
+    digest = hashlib.sha256(payload.encode()).hexdigest()
+    prerender.write_atomic(prerender.object_path(path, digest), payload)
+    prerender.write_atomic(
+        str(path / 'manifest.json'),
+        json.dumps(
+            {
+                'data_version': version,
+                'callbacks': {callback: {inputs: digest}},
+            }
+        ),
+    )
+
+
+def test_lookup_by_data_version(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(prerender, 'PRERENDER_PATH', str(tmp_path))
+    monkeypatch.setattr(prerender, '_manifest', None)
+    monkeypatch.setattr(prerender, '_logged_version', None)
+    version = datastore.data_version()
+    callback = 'pages.page.callback'
+    _snapshot(tmp_path, version, callback, '[[1],{}]', '{}')
+
+    assert prerender.lookup(callback, version, '[[1],{}]') == '{}'
+    assert prerender.lookup(callback, version, '[[2],{}]') is None
+
+    # Another data version is a miss, logged once
+    with caplog.at_level(logging.WARNING, logger=prerender.__name__):
+        for _ in range(2):
+            assert prerender.lookup(callback, 'other', '[[1],{}]') is None
+    assert len(caplog.records) == 1
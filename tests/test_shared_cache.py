@@ -0,0 +1,37 @@
+import sqlite3
+
+import modules.shared_cache as shared_cache
+
+
+def test_sqlite_backend(tmp_path):
+    backend = shared_cache.SqliteBackend(
+        str(tmp_path / 'cache.sqlite'), max_entries=2
+    )
+    keys = [shared_cache.entry_key('v1', 'callback', str(i)) for i in range(3)]
+
+    for key in keys:
+        backend.set(key, f'payload {key}')
+
+    assert backend.get(keys[0]) is None
+    assert backend.get(keys[2]) == f'payload {keys[2]}'
+    assert backend.evictions == 1
+
+    backend.clear()
+    assert backend.get(keys[2]) is None
+
+
+def test_sqlite_backend_with_version_column(tmp_path):
+    # Files written before the version column was dropped
+    path = str(tmp_path / 'cache.sqlite')
+    connection = sqlite3.connect(path)
+    connection.execute(
+        'CREATE TABLE entries (key TEXT PRIMARY KEY, version TEXT, '
+        'payload TEXT, bytes INTEGER, used REAL)'
+    )
+    connection.commit()
+    connection.close()
+
+    backend = shared_cache.SqliteBackend(path)
+    backend.set('key', 'payload')
+
+    assert backend.get('key') == 'payload'
@@ -0,0 +1,27 @@
+import json
+
+import modules.warmup as warmup
+
+
+NAMES = ['grid_finish_placeholder', 'driver_mw', 'retirements_rate']
+
+
+def test_warm_up_processes_build_the_same_figures():
+    futures = warmup.spawn(NAMES, 2)
+
+    assert sorted(futures) == sorted(NAMES)
+    for name, future in futures.items():
+        assert future.result()[:2] == warmup.build(name)[:2]
+
+
+def test_figure_built_here_when_the_process_fails(monkeypatch):
+    # The warm-up process exits at the unknown template
+    monkeypatch.setattr(warmup, '_started', True)
+    monkeypatch.setattr(
+        warmup, '_futures', warmup.spawn(NAMES, 1, 'no such template')
+    )
+
+    assert warmup.figure('driver_mw') == json.loads(
+        warmup.build('driver_mw')[1]
+    )
+    assert 'driver_mw' not in warmup._futures